@@ -0,0 +1,54 @@
+"""
+Benchmark: decoding a CityBikes payload into the five station columns.
+Compares the previous path (response.json() -> list of dicts -> pl.DataFrame -> select)
+with decode_stations (native PyArrow JSON reader with a strict schema of the selected fields).
+Run from repo root: python benchmarks/bench_ingest_decode.py [--sizes 1000 10000 100000] [--repeat 5]
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+import polars as pl
+from benchmarks.synthetic import api_payload
+from src.ingest import STATION_COLUMNS, decode_stations
+
+def dict_decode(payload: bytes) -> pl.DataFrame:
+    """The decode path used before decode_stations."""
+    return pl.DataFrame(json.loads(payload)["network"]["stations"]).select(STATION_COLUMNS)
+
+def measure(fn, payload: bytes, repeat: int) -> tuple[float, float]:
+    """Return (best wall seconds, Python-heap peak MiB) for fn(payload)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(payload)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 2**20
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark station payload decoding.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'stations':>10} {'path':>8} {'best ms':>10} {'py peak MiB':>12}")
+    for n in args.sizes:
+        payload = api_payload(n)
+        assert decode_stations(payload).equals(dict_decode(payload))
+        for label, fn in (("dicts", dict_decode), ("native", decode_stations)):
+            seconds, peak = measure(fn, payload, args.repeat)
+            print(f"{n:>10} {label:>8} {seconds * 1000:>10.1f} {peak:>12.1f}")
+
+if __name__ == "__main__":
+    main()
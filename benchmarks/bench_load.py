@@ -0,0 +1,52 @@
+"""
+Benchmark: loading transformed data with write_database (replace) vs PostgreSQL COPY (load_data_bulk).
+Run from repo root: python benchmarks/bench_load.py --database-url postgresql://... [--rows 100000] [--chunk-size 50000]
+Without a PostgreSQL URL (or DATABASE_URL) only the write_database path is measured, against a temporary SQLite file.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from benchmarks.synthetic import station_frame
+from src.load import get_engine, load_data_bulk, load_data_into_database
+from src.transform import transform
+
+def best_seconds(load, repeat: int) -> float:
+    """Best wall time in seconds of load() over repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark database load paths.")
+    parser.add_argument("--database-url", type=str, default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+    df = transform(station_frame(args.rows))
+    paths = [("write_database", lambda: load_data_into_database(df, database_url))]
+    if get_engine(database_url).dialect.name == "postgresql":
+        paths.append(("copy", lambda: load_data_bulk(df, database_url, chunk_size=args.chunk_size)))
+    else:
+        print("Not a PostgreSQL URL: skipping the COPY path.")
+
+    results = [(label, best_seconds(load, args.repeat)) for label, load in paths]
+    print(f"\n{'path':>16} {'rows':>10} {'best s':>10} {'rows/sec':>12}")
+    for label, seconds in results:
+        print(f"{label:>16} {df.height:>10} {seconds:>10.3f} {df.height / seconds:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
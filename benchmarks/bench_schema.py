@@ -0,0 +1,63 @@
+"""
+Benchmark: Pandera schema validation vs the compiled fast path (CompiledSchema) on valid frames,
+and on frames where a fraction of rows violate the latitude bounds (failure cases built).
+Run from repo root: python benchmarks/bench_schema.py [--sizes 200 100000 1000000] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+import polars as pl
+from pandera.errors import SchemaErrors
+from benchmarks.synthetic import station_frame
+from src.schema_validator import get_compiled_schema
+from validation.citybikes_schema import CityBikeSchema
+
+def pandera_validate(df: pl.DataFrame):
+    try:
+        CityBikeSchema.validate(df, lazy=True)
+    except SchemaErrors as err:
+        return err.failure_cases
+    return None
+
+def compiled_validate(df: pl.DataFrame):
+    return get_compiled_schema().validate(df)
+
+def best_seconds(fn, df: pl.DataFrame, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Pandera vs compiled schema validation.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--invalid-ratio", type=float, default=0.01, help="Fraction of rows given an out-of-range latitude in the 'invalid' frames.")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'frame':>8} {'engine':>9} {'best ms':>10}")
+    for n in args.sizes:
+        valid = station_frame(n)
+        invalid = valid.with_columns(
+            pl.when(pl.int_range(pl.len()) < int(n * args.invalid_ratio) + 1)
+            .then(pl.lit(39.0))
+            .otherwise(pl.col("latitude"))
+            .alias("latitude")
+        )
+        for label, df in (("valid", valid), ("invalid", invalid)):
+            expected, actual = pandera_validate(df), compiled_validate(df)
+            assert (expected is None and actual is None) or actual.equals(expected)
+            for engine, fn in (("pandera", pandera_validate), ("compiled", compiled_validate)):
+                seconds = best_seconds(fn, df, args.repeat)
+                print(f"{n:>10} {label:>8} {engine:>9} {seconds * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: Soda scan latency and peak memory with the previous Polars -> Pandas -> DuckDB
+registration versus the Arrow view registration used by run_soda_scan.
+Each variant runs in its own subprocess, reading the same pre-generated Parquet file, so peak RSS
+reflects the scan rather than data generation.
+Run from repo root: python benchmarks/bench_soda.py [--rows 1000000] [--repeat 3]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+import duckdb
+import polars as pl
+from benchmarks.common import peak_rss_mib
+from benchmarks.synthetic import station_frame
+from src import soda_runner
+from src.soda_runner import VALIDATION_DIR, run_soda_scan
+from src.transform import transform
+
+def _register_pandas(con: duckdb.DuckDBPyConnection, dataset_name: str, df: pl.DataFrame) -> None:
+    """The registration used before the Arrow view: full Pandas copy plus per-column casts."""
+    pdf = df.to_pandas()
+    for col in pdf.select_dtypes(include=["string"]).columns:
+        pdf[col] = pdf[col].astype(object)
+    for col in pdf.select_dtypes(include=["int64"]).columns:
+        pdf[col] = pdf[col].astype("int32")
+    con.register(f"{dataset_name}__arrow", pdf)
+    con.execute(f'CREATE OR REPLACE VIEW "{dataset_name}" AS SELECT * FROM "{dataset_name}__arrow"')
+
+def run_variant(variant: str, data_path: str, repeat: int) -> dict:
+    if variant == "pandas":
+        soda_runner._register_arrow_view = _register_pandas
+    df = pl.read_parquet(data_path)
+    # Warm up imports and Soda's parser so only the scan itself is compared
+    run_soda_scan(df.head(10), "citybikes_transformed", VALIDATION_DIR / "soda_checks_transformed.yml")
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_soda_scan(df, "citybikes_transformed", VALIDATION_DIR / "soda_checks_transformed.yml")
+        best = min(best, time.perf_counter() - start)
+    return {"variant": variant, "rows": df.height, "best_seconds": best, "peak_rss_mib": peak_rss_mib()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Soda scan registration paths.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--variant", choices=["pandas", "arrow"], help=argparse.SUPPRESS)
+    parser.add_argument("--data", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.data, args.repeat)))
+        return
+
+    data_path = Path(tempfile.mkdtemp()) / "transformed.parquet"
+    transform(station_frame(args.rows)).write_parquet(data_path)
+
+    print(f"{'variant':>8} {'rows':>10} {'best s':>10} {'peak RSS MiB':>14}")
+    for variant in ("pandas", "arrow"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--variant", variant, "--data", str(data_path), "--repeat", str(args.repeat)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{variant:>8} {result['rows']:>10} {result['best_seconds']:>10.3f} {result['peak_rss_mib']:>14.1f}")
+
+if __name__ == "__main__":
+    main()
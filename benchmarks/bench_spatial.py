@@ -0,0 +1,108 @@
+"""
+Benchmark: grid spatial index (src/spatial.py) vs the naive O(n²) approach on synthetic stations
+with jittered near-duplicates.
+- pairs: every pair of stations within --distance metres (what dedup_nearby needs); the naive
+  version computes the haversine distance of every station to every later one, in numpy blocks
+- within: --queries radius queries; naive computes the distance to every station per query
+- nearest: --queries k-nearest queries; naive sorts the distances to every station per query
+Both sides must return the same pairs/stations, which the benchmark asserts.
+Run from repo root: python benchmarks/bench_spatial.py [--rows 100000] [--naive-rows 100000]
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+import numpy as np
+from benchmarks.synthetic import add_noise, station_frame
+from src.spatial import EARTH_RADIUS_M, StationIndex, dedup_nearby
+from src.transform import transform
+
+def naive_pairs(lat: np.ndarray, lon: np.ndarray, max_distance_m: float, block: int = 250) -> set[tuple[int, int]]:
+    """All (i, j), i < j, within max_distance_m, comparing each station with every later one."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    pairs = set()
+    for start in range(0, len(lat), block):
+        rows = slice(start, start + block)
+        # Only the columns after the block's first row can be a later station
+        a = (
+            np.sin((lat[None, start:] - lat[rows, None]) / 2) ** 2
+            + cos_lat[rows, None] * cos_lat[None, start:] * np.sin((lon[None, start:] - lon[rows, None]) / 2) ** 2
+        )
+        distance = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        i, j = np.nonzero(distance <= max_distance_m)
+        i, j = i + start, j + start
+        pairs.update(zip(i[i < j].tolist(), j[i < j].tolist()))
+    return pairs
+
+def naive_distances(lat: np.ndarray, lon: np.ndarray, query_lat: float, query_lon: float) -> np.ndarray:
+    lat, lon, query_lat, query_lon = np.radians(lat), np.radians(lon), np.radians(query_lat), np.radians(query_lon)
+    a = np.sin((lat - query_lat) / 2) ** 2 + np.cos(lat) * np.cos(query_lat) * np.sin((lon - query_lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the spatial index against naive O(n²) proximity search.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Synthetic stations before jittered copies are added.")
+    parser.add_argument("--jitter-ratio", type=float, default=0.05, help="Fraction of rows appended again with jittered coordinates.")
+    parser.add_argument("--jitter-m", type=float, default=5.0)
+    parser.add_argument("--distance", type=float, default=10.0, help="Pair / dedup distance in metres.")
+    parser.add_argument("--radius", type=float, default=500.0, help="Radius of the within queries in metres.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--cell-size", type=float, default=None, help="Cell size in metres of the index used for pairs (default: --distance).")
+    parser.add_argument("--query-cell-size", type=float, default=None, help="Cell size in metres of the index used for within/nearest (default: --radius).")
+    parser.add_argument("--naive-rows", type=int, default=None, help="Run the naive pair search on the first N stations only (default: all).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    raw = add_noise(station_frame(args.rows, args.seed), jitter_ratio=args.jitter_ratio, jitter_m=args.jitter_m, seed=args.seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = transform(raw)
+    lat, lon = df["latitude"].to_numpy(), df["longitude"].to_numpy()
+    rng = np.random.default_rng(args.seed)
+    queries = list(zip(rng.uniform(42.2, 42.6, args.queries), rng.uniform(-71.3, -70.8, args.queries)))
+    print(f"{df.height} transformed stations, {args.queries} queries")
+    print(f"{'benchmark':>24} {'index s':>10} {'naive s':>10} {'speedup':>9}")
+
+    def report(name: str, index_seconds: float, naive_seconds: float) -> None:
+        print(f"{name:>24} {index_seconds:>10.3f} {naive_seconds:>10.3f} {naive_seconds / index_seconds:>8.1f}x")
+
+    index, build_seconds = timed(lambda: StationIndex(df, cell_size_m=args.cell_size or args.distance))
+    print(f"{'build index':>24} {build_seconds:>10.3f}")
+
+    naive_rows = min(args.naive_rows or df.height, df.height)
+    subset_index = index if naive_rows == df.height else StationIndex(df.head(naive_rows), cell_size_m=index.cell_size_m)
+    pairs, index_seconds = timed(lambda: subset_index.pairs(args.distance))
+    expected, naive_seconds = timed(lambda: naive_pairs(lat[:naive_rows], lon[:naive_rows], args.distance))
+    assert set(pairs.select("left", "right").iter_rows()) == expected, "index and naive pairs differ"
+    report(f"pairs <= {args.distance:g} m ({naive_rows})", index_seconds, naive_seconds)
+
+    deduped, dedup_seconds = timed(lambda: dedup_nearby(df, args.distance))
+    print(f"{'dedup_nearby':>24} {dedup_seconds:>10.3f} {'':>10} {'':>9}  {df.height - deduped.height} near-duplicates dropped")
+
+    index, build_seconds = timed(lambda: StationIndex(df, cell_size_m=args.query_cell_size or args.radius))
+    print(f"{'build query index':>24} {build_seconds:>10.3f}")
+    results, index_seconds = timed(lambda: [index.within(q_lat, q_lon, args.radius).height for q_lat, q_lon in queries])
+    expected, naive_seconds = timed(lambda: [int((naive_distances(lat, lon, q_lat, q_lon) <= args.radius).sum()) for q_lat, q_lon in queries])
+    assert results == expected, "index and naive radius queries differ"
+    report(f"within {args.radius:g} m", index_seconds, naive_seconds)
+
+    results, index_seconds = timed(lambda: [index.nearest(q_lat, q_lon, args.k)["distance_m"].to_list() for q_lat, q_lon in queries])
+    expected, naive_seconds = timed(lambda: [np.sort(naive_distances(lat, lon, q_lat, q_lon))[:args.k].tolist() for q_lat, q_lon in queries])
+    assert all(np.allclose(r, e) for r, e in zip(results, expected)), "index and naive nearest queries differ"
+    report(f"nearest k={args.k}", index_seconds, naive_seconds)
+
+if __name__ == "__main__":
+    main()
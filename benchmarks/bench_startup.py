@@ -0,0 +1,65 @@
+"""
+Benchmark: import time of the CLI and of each stage's modules, from `python -X importtime`.
+Each scenario runs in a fresh interpreter; the reported time is the sum of the top-level imports'
+cumulative times (interpreter startup itself excluded).
+benchmarks/suite.py records these as import_* stages, so they are compared against the baseline too.
+Run from repo root: python benchmarks/bench_startup.py [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+
+# Scenario -> Python statement run with the repo root on sys.path (as main.py runs)
+SCENARIOS = {
+    "cli": "import src.main",
+    "ingest": "import src.ingest",
+    "schema": "import src.schema_validator",
+    "transform": "import src.transform",
+    "checks_native": "import src.native_checks",
+    "checks_soda": "import src.soda_runner as soda_runner; soda_runner.get_scanner(); import soda.scan, jinja2",
+    "load": "import src.load as load; load.get_engine('sqlite://')",
+}
+
+def import_seconds(statement: str) -> float:
+    """Seconds spent importing modules while running statement in a fresh interpreter."""
+    code = f"import sys; sys.path.insert(0, {str(_root)!r}); {statement}"
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONPROFILEIMPORTTIME"}
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        check=True, capture_output=True, text=True, env=env, cwd=_root,
+    ).stderr
+    total_us = 0
+    for line in stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"; nested imports are indented
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            total_us += int(cumulative)
+    return total_us / 1e6
+
+def measure(repeat: int = 5, scenarios: list[str] | None = None) -> dict[str, dict]:
+    """{"import_<scenario>": {"best_seconds", "median_seconds"}} for the given scenarios (default: all)."""
+    results = {}
+    for name in scenarios or SCENARIOS:
+        statement = SCENARIOS[name]
+        timings = [import_seconds(statement) for _ in range(repeat)]
+        results[f"import_{name}"] = {"best_seconds": min(timings), "median_seconds": statistics.median(timings)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI and per-stage import time.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':>22} {'best ms':>10} {'median ms':>10}")
+    for name, timing in measure(args.repeat).items():
+        print(f"{name:>22} {timing['best_seconds'] * 1000:>10.1f} {timing['median_seconds'] * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: eager transform vs the single-plan lazy transform (in-memory and streaming engines),
+plus the lazy plan fed straight from pl.scan_parquet ("scan") so the input never sits in memory whole.
+Each variant runs in its own subprocess on the same pre-generated Parquet file; wall time and
+peak RSS cover reading the input and transforming it.
+Run from repo root: python benchmarks/bench_transform.py [--rows 10000000]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+import polars as pl
+from benchmarks.common import peak_rss_mib
+from benchmarks.synthetic import station_frame
+from src.transform import transform, transform_lazy
+
+VARIANTS = {
+    "eager": {},
+    "lazy": {"lazy": True},
+    "streaming": {"lazy": True, "streaming": True},
+    "scan": None,
+}
+
+def run_variant(variant: str, data_path: str) -> dict:
+    start = time.perf_counter()
+    if variant == "scan":
+        rows_in = pl.scan_parquet(data_path).select(pl.len()).collect().item()
+        out = transform_lazy(pl.scan_parquet(data_path)).collect(engine="streaming")
+    else:
+        df = pl.read_parquet(data_path)
+        rows_in = df.height
+        out = transform(df, **VARIANTS[variant])
+    seconds = time.perf_counter() - start
+    return {"variant": variant, "rows_in": rows_in, "rows_out": out.height, "seconds": seconds, "peak_rss_mib": peak_rss_mib()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark eager vs lazy transform.")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1, help="Fraction of rows appended again as exact duplicates.")
+    parser.add_argument("--variant", choices=list(VARIANTS), help=argparse.SUPPRESS)
+    parser.add_argument("--data", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.data)))
+        return
+
+    data_path = Path(tempfile.mkdtemp()) / "stations.parquet"
+    df = station_frame(args.rows)
+    df = pl.concat([df, df.sample(fraction=args.duplicate_ratio, seed=0)])
+    df.write_parquet(data_path)
+    del df
+
+    print(f"{'variant':>10} {'rows in':>12} {'rows out':>12} {'seconds':>9} {'peak RSS MiB':>14}")
+    for variant in VARIANTS:
+        output = subprocess.run(
+            [sys.executable, __file__, "--variant", variant, "--data", str(data_path)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{variant:>10} {r['rows_in']:>12} {r['rows_out']:>12} {r['seconds']:>9.2f} {r['peak_rss_mib']:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+import resource
+import sys
+from pathlib import Path
+
+def peak_rss_mib() -> float:
+    """Peak resident set size of this process in MiB."""
+    # VmHWM is reset on exec, unlike ru_maxrss which a child inherits from the parent on Linux
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    # ru_maxrss is bytes on macOS, KiB elsewhere
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 / (1024 if sys.platform == "darwin" else 1)
@@ -0,0 +1,193 @@
+"""
+Benchmark suite: times every pipeline stage offline on deterministic synthetic data and compares
+the run against a baseline file.
+- ingest: fetch_citybike_data against a local stub HTTP server serving a synthetic payload
+- schema: run_schema_checks (pandera and compiled) on the clean frame and on one with out-of-range coordinates
+- transform: eager and lazy transform of the dirty frame
+- spatial_dedup: dedup_nearby (10 m, same name) on the transformed frame
+- checks: the transformed-data SodaCL checks with each --checks-engines engine (run_checks)
+- load: load_data_into_database into a temporary SQLite file (or --database-url)
+- import_*: import time of the CLI and of each stage's modules (see bench_startup.py)
+Run from repo root:
+    python benchmarks/suite.py [--rows 100000] [--output results.json]
+    python benchmarks/suite.py --baseline benchmarks/baseline.json --update-baseline
+    python benchmarks/suite.py --baseline benchmarks/baseline.json [--tolerance 0.25]
+The comparison exits with status 1 when a stage is slower than its baseline by more than the tolerance.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+import polars as pl
+from benchmarks.bench_startup import SCENARIOS, measure as measure_imports
+from benchmarks.synthetic import add_noise, api_payload, station_frame
+from src.ingest import fetch_citybike_data
+from src.load import load_data_into_database
+from src.schema_validator import run_schema_checks
+from src.soda_runner import VALIDATION_DIR, run_checks
+from src.spatial import dedup_nearby
+from src.transform import transform
+
+# Stages faster than this are compared on absolute time only, so timer noise cannot fail a run
+MIN_REGRESSION_SECONDS = 0.005
+
+@contextlib.contextmanager
+def stub_api(payload: bytes):
+    """Serve payload for every GET on a local port; yields the base URL to pass to fetch_citybike_data."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/networks"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def schema_halts(df: pl.DataFrame, engine: str) -> None:
+    """run_schema_checks on a frame expected to fail; the circuit breaker halt is part of the timed work."""
+    try:
+        run_schema_checks(df, engine=engine)
+    except SystemExit:
+        return
+    raise AssertionError("dirty frame passed the schema checks")
+
+def time_stage(fn, repeat: int) -> dict:
+    """Best and median wall seconds of fn over repeat runs (after one warm-up), with pipeline prints silenced."""
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    return {"best_seconds": min(timings), "median_seconds": statistics.median(timings)}
+
+def run_suite(args: argparse.Namespace) -> dict:
+    noise = {
+        "duplicate_ratio": args.duplicate_ratio,
+        "null_ratio": args.null_ratio,
+        "name_noise_ratio": args.name_noise_ratio,
+    }
+    clean = station_frame(args.rows, args.seed)
+    dirty = add_noise(clean, seed=args.seed, **noise)
+    invalid = add_noise(clean, out_of_range_ratio=args.out_of_range_ratio, seed=args.seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        transformed = transform(dirty)
+    database_url = args.database_url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+
+    stages = {}
+    with stub_api(api_payload(args.rows, args.seed, **noise)) as base_url:
+        stages["ingest"] = lambda: fetch_citybike_data("synthetic", base_url=base_url)
+        for engine in ("pandera", "compiled"):
+            stages[f"schema_{engine}"] = lambda engine=engine: run_schema_checks(clean, engine=engine)
+            stages[f"schema_{engine}_invalid"] = lambda engine=engine: schema_halts(invalid, engine)
+        stages["transform"] = lambda: transform(dirty)
+        stages["transform_lazy"] = lambda: transform(dirty, lazy=True)
+        stages["spatial_dedup"] = lambda: dedup_nearby(transformed, 10)
+        for engine in args.checks_engines:
+            stages[f"checks_{engine}"] = lambda engine=engine: run_checks(
+                transformed, "citybikes_transformed", VALIDATION_DIR / "soda_checks_transformed.yml", engine=engine
+            )
+        stages["load"] = lambda: load_data_into_database(transformed, database_url)
+        results = {name: time_stage(fn, args.repeat) for name, fn in stages.items()}
+    scenarios = [name for name in SCENARIOS if name != "checks_soda" or "soda" in args.checks_engines]
+    results.update(measure_imports(args.repeat, scenarios))
+
+    return {
+        "meta": {
+            "rows": args.rows,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "out_of_range_ratio": args.out_of_range_ratio,
+            **noise,
+            "python": platform.python_version(),
+            "polars": pl.__version__,
+            "machine": platform.machine(),
+        },
+        "stages": results,
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regression messages for stages whose best time exceeds the baseline by more than tolerance."""
+    regressions = []
+    for name, current in results["stages"].items():
+        previous = baseline["stages"].get(name)
+        if previous is None:
+            continue
+        limit = max(previous["best_seconds"] * (1 + tolerance), previous["best_seconds"] + MIN_REGRESSION_SECONDS)
+        if current["best_seconds"] > limit:
+            regressions.append(
+                f"{name}: {current['best_seconds'] * 1000:.1f} ms vs baseline {previous['best_seconds'] * 1000:.1f} ms "
+                f"(+{(current['best_seconds'] / previous['best_seconds'] - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every pipeline stage on synthetic data and compare against a baseline.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.05)
+    parser.add_argument("--null-ratio", type=float, default=0.01)
+    parser.add_argument("--name-noise-ratio", type=float, default=0.1)
+    parser.add_argument("--out-of-range-ratio", type=float, default=0.01, help="Rows with bad coordinates in the frame timed by the schema_*_invalid stages.")
+    parser.add_argument("--checks-engines", nargs="+", choices=["soda", "native"], default=["soda", "native"])
+    parser.add_argument("--database-url", type=str, default=None, help="Database for the load stage (default: a temporary SQLite file).")
+    parser.add_argument("--output", type=str, default=None, help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", type=str, default=None, help="Baseline results file to compare against.")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results to --baseline instead of comparing.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown per stage before the run fails (default 0.25 = 25%%).")
+    args = parser.parse_args()
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline requires --baseline")
+
+    results = run_suite(args)
+    print(f"{'stage':>24} {'best ms':>10} {'median ms':>10}")
+    for name, timing in results["stages"].items():
+        print(f"{name:>24} {timing['best_seconds'] * 1000:>10.1f} {timing['median_seconds'] * 1000:>10.1f}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.update_baseline:
+        Path(args.baseline).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+    elif args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        keys = ("rows", "seed", "duplicate_ratio", "null_ratio", "name_noise_ratio", "out_of_range_ratio")
+        mismatched = [k for k in keys if baseline["meta"].get(k) != results["meta"][k]]
+        if mismatched:
+            raise SystemExit(f"Baseline was recorded with different data settings ({', '.join(mismatched)}); not comparable.")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Performance regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print(f"No stage slower than baseline by more than {args.tolerance:.0%}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Deterministic synthetic CityBikes data for benchmarks.
+Frames and payloads can be made dirty with add_noise: duplicate rows (exact or with jittered
+coordinates), nulls, whitespace/Unicode noise in names and out-of-range coordinates, each at a
+given ratio of the rows.
+"""
+import json
+import random
+import numpy as np
+import polars as pl
+from src.ingest import STATION_SCHEMA
+
+def station_records(n: int, seed: int = 0) -> list[dict]:
+    """Return n station dicts shaped like the CityBikes API (Boston-area coordinates)."""
+    rng = random.Random(seed)
+    stations = []
+    for i in range(n):
+        free_bikes = rng.randint(0, 30)
+        stations.append({
+            "id": f"{i:08x}",
+            "name": f"Station {i}",
+            "latitude": round(rng.uniform(42.2, 42.6), 6),
+            "longitude": round(rng.uniform(-71.3, -70.8), 6),
+            "timestamp": "2024-01-01T00:00:00.000000Z",
+            "free_bikes": free_bikes,
+            "empty_slots": rng.randint(0, 30),
+            "extra": {
+                "uid": str(i),
+                "renting": 1,
+                "returning": 1,
+                "last_updated": 1704067200,
+                "address": f"{i} Main St",
+                "has_ebikes": free_bikes % 2 == 0,
+            },
+        })
+    return stations
+
+def api_payload(n: int, seed: int = 0, **noise: float) -> bytes:
+    """
+    Return a full network response body with n stations, as served by the API.
+    noise takes the add_noise ratios; the noisy station fields are written over the generated records.
+    """
+    stations = station_records(n, seed)
+    if any(noise.values()):
+        noisy = add_noise(station_frame(n, seed), seed=seed, **noise)
+        stations = [
+            {**stations[i % n], "id": f"{i:08x}", **row}
+            for i, row in enumerate(noisy.iter_rows(named=True))
+        ]
+    return json.dumps({
+        "network": {
+            "id": "synthetic",
+            "name": "Synthetic Bikes",
+            "location": {"city": "Boston, MA", "country": "US", "latitude": 42.36, "longitude": -71.06},
+            "stations": stations,
+        }
+    }).encode()
+
+def station_frame(n: int, seed: int = 0) -> pl.DataFrame:
+    """Return n raw stations as a Polars DataFrame with the ingest columns (vectorized, for large n)."""
+    rng = np.random.default_rng(seed)
+    return pl.DataFrame({
+        "name": pl.select(pl.format("Station {}", pl.int_range(n))).to_series(),
+        "free_bikes": rng.integers(0, 31, n),
+        "empty_slots": rng.integers(0, 31, n),
+        "latitude": rng.uniform(42.2, 42.6, n).round(6),
+        "longitude": rng.uniform(-71.3, -70.8, n).round(6),
+    }).cast(STATION_SCHEMA)
+
+# Leading/trailing whitespace wrapped around noisy names (tabs and non-breaking spaces included)
+_NAME_NOISE = [
+    ("  ", ""),
+    ("", "   "),
+    ("\t", " "),
+    ("", "\u00a0"),
+]
+# Out-of-range latitude/longitude pairs (outside the Boston schema bounds, or outside the globe)
+_BAD_COORDINATES = [(39.0, -71.06), (42.36, -75.0), (91.0, 0.0), (0.0, -181.0)]
+
+def add_noise(
+    df: pl.DataFrame,
+    duplicate_ratio: float = 0.0,
+    null_ratio: float = 0.0,
+    name_noise_ratio: float = 0.0,
+    out_of_range_ratio: float = 0.0,
+    jitter_ratio: float = 0.0,
+    jitter_m: float = 5.0,
+    seed: int = 0,
+) -> pl.DataFrame:
+    """
+    Return a dirty copy of a station frame, deterministic for a given seed.
+
+    Args:
+        duplicate_ratio: rows appended as exact copies of existing rows (fraction of df.height).
+        null_ratio: rows given a null in one of free_bikes, empty_slots, latitude or longitude.
+        name_noise_ratio: names wrapped in extra whitespace, with inner spaces doubled and an accented
+            character written decomposed (NFD, "e" + combining acute), the cases clean_name normalizes.
+        out_of_range_ratio: rows moved to coordinates outside the schema bounds.
+        jitter_ratio: rows appended as copies with latitude and longitude each moved by up to
+            jitter_m metres (near-duplicates that only a fuzzy, distance-based dedup catches).
+    """
+    rng = np.random.default_rng(seed)
+    n = df.height
+    if n == 0:
+        return df
+
+    def pick(ratio: float) -> pl.Series:
+        mask = np.zeros(n, dtype=bool)
+        mask[rng.choice(n, size=min(n, round(n * ratio)), replace=False)] = True
+        return pl.Series(mask)
+
+    if name_noise_ratio:
+        mask, variant = pick(name_noise_ratio), rng.integers(0, len(_NAME_NOISE), n)
+        prefix = pl.Series([_NAME_NOISE[v][0] for v in variant])
+        suffix = pl.Series([_NAME_NOISE[v][1] for v in variant])
+        noisy_name = pl.concat_str(
+            pl.lit(prefix),
+            pl.col("name").str.replace_all(" ", "  ").str.replace("Station", "Stati\u0065\u0301n"),
+            pl.lit(suffix),
+        )
+        df = df.with_columns(pl.when(pl.lit(mask)).then(noisy_name).otherwise(pl.col("name")).alias("name"))
+    if out_of_range_ratio:
+        mask, variant = pick(out_of_range_ratio), rng.integers(0, len(_BAD_COORDINATES), n)
+        bad_lat = pl.Series([_BAD_COORDINATES[v][0] for v in variant])
+        bad_lon = pl.Series([_BAD_COORDINATES[v][1] for v in variant])
+        df = df.with_columns(
+            pl.when(pl.lit(mask)).then(pl.lit(bad_lat)).otherwise(pl.col("latitude")).alias("latitude"),
+            pl.when(pl.lit(mask)).then(pl.lit(bad_lon)).otherwise(pl.col("longitude")).alias("longitude"),
+        )
+    if null_ratio:
+        mask, column = pick(null_ratio), rng.integers(0, 4, n)
+        df = df.with_columns(
+            pl.when(pl.lit(mask) & pl.lit(pl.Series(column == i))).then(None).otherwise(pl.col(name)).alias(name)
+            for i, name in enumerate(["free_bikes", "empty_slots", "latitude", "longitude"])
+        )
+    if duplicate_ratio:
+        copies = rng.integers(0, n, round(n * duplicate_ratio))
+        df = pl.concat([df, df[copies]])
+    if jitter_ratio:
+        copies = df[rng.integers(0, n, round(n * jitter_ratio))]
+        # ~111 km per degree of latitude; longitude degrees are shorter by cos(latitude)
+        jitter_deg = jitter_m / 111_195 / np.sqrt(2)
+        df = pl.concat([df, copies.with_columns(
+            pl.col("latitude") + pl.Series(rng.uniform(-jitter_deg, jitter_deg, copies.height)),
+            pl.col("longitude") + pl.Series(rng.uniform(-jitter_deg, jitter_deg, copies.height)) / (pl.col("latitude").radians().cos()),
+        )])
+    return df
@@ -1,6 +1,32 @@
 """Pipeline engine: ingest, transform, schema validator."""
-from src.ingest import fetch_citybike_data
-from src.schema_validator import run_schema_checks
-from src.transform import transform
+import importlib
+import sys
+import types
+
+# Resolved on first access, so "import src" (and the CLI, which imports src.* modules) does not
+# load Polars, Pandera or requests
+_LAZY_EXPORTS = {
+    "fetch_citybike_data": "src.ingest",
+    "transform": "src.transform",
+    "run_schema_checks": "src.schema_validator",
+}
 
 __all__ = ["fetch_citybike_data", "transform", "run_schema_checks"]
+
+def __getattr__(name: str):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name: str, value):
+        # Importing the src.transform submodule binds it as the package attribute "transform";
+        # keep the exported function there instead
+        if _LAZY_EXPORTS.get(name) == f"{__name__}.{name}" and isinstance(value, types.ModuleType):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+sys.modules[__name__].__class__ = _Package
@@ -0,0 +1,194 @@
+"""
+Statistical anomaly detection against rolling per-station and per-network baselines.
+The checks and the schema only catch hard violations (a latitude of 39); this stage catches a feed
+that is valid but implausible, e.g. every station suddenly empty or 90% of the stations missing.
+Each station keeps O(1) state (sample count and an exponentially weighted mean and variance of
+free_bikes) and the network keeps the same for its row count and mean free_bikes; a snapshot is
+scored against the baselines and its updated baselines computed in one vectorized pass, and they
+replace the old ones once the snapshot has made it through the rest of the pipeline (commit).
+A failing snapshot is not learned, so after a lasting change (a network that really shrank) the
+baselines are restarted from the snapshot once rebaseline_after snapshots in a row have failed, and
+stations missing from max_missed snapshots in a row lose their baseline.
+Thresholds live in validation/anomaly_thresholds.yml.
+"""
+import math
+import os
+from pathlib import Path
+import polars as pl
+import yaml
+from src.stations import KEY_COLUMNS
+
+ANOMALY_THRESHOLDS_PATH = Path(__file__).resolve().parent.parent / "validation" / "anomaly_thresholds.yml"
+# Exit codes: same convention as the Soda/native checks
+OUTCOME_CODES = {"pass": 0, "warn": 1, "fail": 2}
+_NETWORK_STATS = ("count", "row_count_mean", "row_count_var", "free_bikes_mean", "free_bikes_var", "failures")
+_NETWORK_SCHEMA = {name: pl.Int64 if name in ("count", "failures") else pl.Float64 for name in _NETWORK_STATS}
+
+def load_anomaly_thresholds(path: str | Path = ANOMALY_THRESHOLDS_PATH) -> dict:
+    """Read the anomaly thresholds file (alpha, min_samples, station, network and checks sections)."""
+    return yaml.safe_load(Path(path).read_text())
+
+def _ew_update(mean: float | None, var: float | None, value: float, alpha: float) -> tuple[float, float]:
+    """Exponentially weighted mean/variance after observing value (the first value starts the baseline)."""
+    if mean is None:
+        return value, 0.0
+    diff = value - mean
+    return mean + alpha * diff, (1 - alpha) * (var + alpha * diff * diff)
+
+def _new_network() -> dict:
+    """Network baseline before any snapshot (failures: consecutive failing snapshots)."""
+    return {name: 0 if _NETWORK_SCHEMA[name] == pl.Int64 else None for name in _NETWORK_STATS}
+
+def _outcome(value: float | None, thresholds: dict) -> str:
+    if value is None:
+        return "pass"
+    if abs(value) > thresholds["fail"]:
+        return "fail"
+    return "warn" if abs(value) > thresholds["warn"] else "pass"
+
+class AnomalyDetector:
+    """
+    Rolling baselines for one network, scored by check and updated by commit.
+
+    Args:
+        state_dir: optional directory holding the baselines between processes (stations.parquet,
+            network.parquet; read on creation, written by commit and by check for a failing snapshot).
+            Without it they only live in this object.
+        thresholds: parsed thresholds (default: validation/anomaly_thresholds.yml).
+        key_columns: columns identifying a station.
+    """
+
+    def __init__(self, state_dir: str | Path | None = None, thresholds: dict | None = None, key_columns: list[str] = KEY_COLUMNS):
+        self.state_dir = Path(state_dir) if state_dir is not None else None
+        self.thresholds = thresholds or load_anomaly_thresholds()
+        self.key_columns = key_columns
+        self.stations: pl.DataFrame | None = None
+        self.network: dict = _new_network()
+        if self.state_dir is not None and (self.state_dir / "network.parquet").is_file():
+            self.stations = pl.read_parquet(self.state_dir / "stations.parquet")
+            self.network = {**_new_network(), **pl.read_parquet(self.state_dir / "network.parquet").row(0, named=True)}
+            # State written before stations were aged out
+            if "missed" not in self.stations.columns:
+                self.stations = self.stations.with_columns(pl.lit(0, pl.Int64).alias("missed"))
+
+    def reset(self) -> None:
+        """Forget the baselines (in memory and in state_dir); the next snapshots warm them up again."""
+        self.stations = None
+        self.network = _new_network()
+        if self.state_dir is not None:
+            for name in ("network", "stations"):
+                (self.state_dir / f"{name}.parquet").unlink(missing_ok=True)
+
+    def check(self, df: pl.DataFrame) -> tuple[int, dict]:
+        """
+        Score a transformed snapshot against the baselines without changing them; pass the results
+        to commit once the snapshot has been checked and loaded. A failing snapshot only counts as a
+        consecutive failure; the rebaseline_after-th one in a row is downgraded to a warning and its
+        baselines start from this snapshot alone (results["rebaselined"]).
+
+        Returns:
+            Exit code: 0 pass, 1 warnings, 2 failures (the worst check outcome).
+            Results: {"metrics": {check: value or None while warming up}, "outcomes": {check: "pass" | "warn" | "fail"},
+            "outliers": stations beyond the z-score threshold, with baseline_mean, baseline_std and z_score,
+            "baselines": the updated baselines for commit, None when the snapshot failed, "rebaselined": bool}.
+        """
+        t = self.thresholds
+        alpha, min_samples = t["alpha"], t["min_samples"]
+        current = df.select(*self.key_columns, pl.col("free_bikes").cast(pl.Float64)).unique(subset=self.key_columns, keep="first")
+        if self.stations is None:
+            scored = current.with_columns(
+                pl.lit(0, pl.Int64).alias("count"), pl.lit(None, pl.Float64).alias("mean"), pl.lit(None, pl.Float64).alias("var")
+            )
+        else:
+            scored = current.join(self.stations, on=self.key_columns, how="left").with_columns(pl.col("count").fill_null(0))
+
+        # Score every station and compute its updated baseline in one pass
+        diff = pl.col("free_bikes") - pl.col("mean")
+        has_baseline = pl.col("count") >= min_samples
+        baseline_std = pl.max_horizontal(pl.col("var").sqrt(), pl.lit(float(t["station"]["min_std"])))
+        scored = scored.with_columns(
+            baseline_std.alias("baseline_std"),
+            pl.when(has_baseline).then(diff / baseline_std).alias("z_score"),
+            (pl.col("count") + 1).alias("new_count"),
+            pl.when(pl.col("mean").is_null()).then(pl.col("free_bikes")).otherwise(pl.col("mean") + alpha * diff).alias("new_mean"),
+            pl.when(pl.col("mean").is_null()).then(0.0).otherwise((1 - alpha) * (pl.col("var") + alpha * diff * diff)).alias("new_var"),
+        )
+        outliers = scored.filter(pl.col("z_score").abs() > t["station"]["z_score"]).select(
+            *self.key_columns, "free_bikes", pl.col("mean").alias("baseline_mean"), "baseline_std", "z_score"
+        )
+        with_baseline = scored.select(has_baseline.sum()).item()
+
+        network = self.network
+        row_count = df.height
+        mean_free_bikes = df.select(pl.col("free_bikes").mean()).item()
+        metrics = {"outlier_ratio": outliers.height / with_baseline if with_baseline else None, "row_count_drift": None, "mean_free_bikes_z": None}
+        if network["count"] >= min_samples:
+            if network["row_count_mean"]:
+                metrics["row_count_drift"] = row_count / network["row_count_mean"] - 1
+            if mean_free_bikes is not None and network["free_bikes_mean"] is not None:
+                std = max(math.sqrt(network["free_bikes_var"]), t["network"]["min_std"])
+                metrics["mean_free_bikes_z"] = (mean_free_bikes - network["free_bikes_mean"]) / std
+        outcomes = {name: _outcome(metrics[name], thresholds) for name, thresholds in t["checks"].items()}
+        exit_code = max((OUTCOME_CODES[o] for o in outcomes.values()), default=0)
+
+        baselines = None
+        rebaseline_after = t.get("rebaseline_after")
+        rebaselined = bool(exit_code == OUTCOME_CODES["fail"] and rebaseline_after and network["failures"] + 1 >= rebaseline_after)
+        if rebaselined:
+            exit_code = OUTCOME_CODES["warn"]
+            observed = current.select(*self.key_columns, pl.lit(1, pl.Int64).alias("count"), pl.col("free_bikes").alias("mean"), pl.lit(0.0).alias("var"))
+            baselines = self._fold(observed, None, _new_network(), row_count, mean_free_bikes)
+        elif exit_code < OUTCOME_CODES["fail"]:
+            observed = scored.select(
+                *self.key_columns,
+                pl.col("new_count").alias("count"),
+                pl.col("new_mean").alias("mean"),
+                pl.col("new_var").alias("var"),
+            )
+            baselines = self._fold(observed, self.stations, network, row_count, mean_free_bikes)
+        else:
+            # A failing snapshot is never folded in, so a broken feed does not become the new normal
+            self.network = {**network, "failures": network["failures"] + 1}
+            self._write_state()
+        results = {"metrics": metrics, "outcomes": outcomes, "outliers": outliers, "baselines": baselines, "rebaselined": rebaselined}
+        return exit_code, results
+
+    def _fold(
+        self, observed: pl.DataFrame, stations: pl.DataFrame | None, network: dict, row_count: int, mean_free_bikes: float | None
+    ) -> dict:
+        """Baselines after a snapshot: observed stations' updated stats, aged previous stations and the network stats."""
+        alpha, max_missed = self.thresholds["alpha"], self.thresholds["station"].get("max_missed")
+        observed = observed.with_columns(pl.lit(0, pl.Int64).alias("missed"))
+        if stations is not None:
+            # Stations missing from this snapshot keep their baseline until they have been missing max_missed times
+            missing = stations.join(observed, on=self.key_columns, how="anti").with_columns(pl.col("missed") + 1)
+            if max_missed is not None:
+                missing = missing.filter(pl.col("missed") <= max_missed)
+            observed = pl.concat([observed, missing])
+        row_count_mean, row_count_var = _ew_update(network["row_count_mean"], network["row_count_var"], float(row_count), alpha)
+        network = {**network, "count": network["count"] + 1, "row_count_mean": row_count_mean, "row_count_var": row_count_var, "failures": 0}
+        if mean_free_bikes is not None:
+            network["free_bikes_mean"], network["free_bikes_var"] = _ew_update(
+                network["free_bikes_mean"], network["free_bikes_var"], mean_free_bikes, alpha
+            )
+        return {"stations": observed, "network": network}
+
+    def commit(self, results: dict) -> None:
+        """Fold the snapshot scored by check into the baselines (call after it was checked and loaded; a failed snapshot is ignored)."""
+        baselines = results["baselines"]
+        if baselines is None:
+            return
+        self.stations = baselines["stations"]
+        self.network = baselines["network"]
+        self._write_state()
+
+    def _write_state(self) -> None:
+        if self.state_dir is None:
+            return
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        network = pl.DataFrame([self.network], schema=_NETWORK_SCHEMA)
+        # Stations first: network.parquet marks a complete state, and each file is replaced atomically
+        for name, frame in (("stations", self.stations), ("network", network)):
+            tmp_path = self.state_dir / f"{name}.parquet.tmp"
+            frame.write_parquet(tmp_path)
+            os.replace(tmp_path, self.state_dir / f"{name}.parquet")
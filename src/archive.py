@@ -0,0 +1,109 @@
+"""
+Columnar snapshot archive of raw and transformed runs.
+Every snapshot is written as one zstd-compressed Parquet file (with column statistics) under a
+Hive-style partition path:
+
+    <archive_dir>/<layer>/network_id=<id>/date=<YYYY-MM-DD>/hour=<HH>/<snapshot>.parquet
+
+so scan_archive (pl.scan_parquet with hive partitioning) prunes partitions and row groups for
+network/time predicates, and reads only the projected columns.
+"""
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+import polars as pl
+
+LAYERS = ("raw", "transformed")
+SNAPSHOT_COLUMN = "snapshot_ts"
+_SNAPSHOT_FORMAT = "%Y%m%dT%H%M%S%fZ"
+
+def snapshot_time() -> datetime:
+    """Current UTC time, the snapshot timestamp shared by the raw and transformed files of one run."""
+    return datetime.now(timezone.utc)
+
+def _partition_dir(archive_dir: str | Path, layer: str, network_id: str, ts: datetime) -> Path:
+    if layer not in LAYERS:
+        raise ValueError(f"Invalid archive layer: {layer}")
+    return Path(archive_dir) / layer / f"network_id={network_id}" / f"date={ts:%Y-%m-%d}" / f"hour={ts:%H}"
+
+def archive_snapshot(
+    df: pl.DataFrame,
+    archive_dir: str | Path,
+    layer: str,
+    network_id: str = "blue-bikes",
+    snapshot_ts: datetime | None = None,
+    compression: str = "zstd",
+) -> Path:
+    """
+    Write df as one snapshot of network_id in the given layer ("raw" or "transformed").
+    A snapshot_ts column (UTC) is added; the partition columns live only in the path.
+    The file is written under a temporary name and renamed, so readers never see a partial file.
+
+    Returns:
+        Path of the written Parquet file.
+    """
+    ts = (snapshot_ts or snapshot_time()).astimezone(timezone.utc)
+    directory = _partition_dir(archive_dir, layer, network_id, ts)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{ts.strftime(_SNAPSHOT_FORMAT)}.parquet"
+    tmp_path = path.with_suffix(".parquet.tmp")
+    (
+        df.drop("network_id", strict=False)
+        .with_columns(pl.lit(ts).dt.cast_time_unit("us").alias(SNAPSHOT_COLUMN))
+        .write_parquet(tmp_path, compression=compression, statistics=True)
+    )
+    os.replace(tmp_path, path)
+    return path
+
+def scan_archive(
+    archive_dir: str | Path,
+    layer: str = "raw",
+    network_id: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> pl.LazyFrame:
+    """
+    Lazily scan the archive of one layer, with network_id, date and hour as partition columns.
+    network_id and the [start, end) time range are applied as predicates, which Polars pushes
+    down to the partition paths and Parquet statistics; further filters and selects push down too.
+    """
+    root = Path(archive_dir) / layer
+    if layer not in LAYERS:
+        raise ValueError(f"Invalid archive layer: {layer}")
+    lf = pl.scan_parquet(
+        root / "**" / "*.parquet",
+        hive_partitioning=True,
+        hive_schema={"network_id": pl.String, "date": pl.Date, "hour": pl.Int32},
+    )
+    if network_id is not None:
+        lf = lf.filter(pl.col("network_id") == network_id)
+    if start is not None:
+        start = start.astimezone(timezone.utc)
+        lf = lf.filter(pl.col("date") >= start.date(), pl.col(SNAPSHOT_COLUMN) >= start)
+    if end is not None:
+        end = end.astimezone(timezone.utc)
+        lf = lf.filter(pl.col("date") <= end.date(), pl.col(SNAPSHOT_COLUMN) < end)
+    return lf
+
+def iter_snapshots(
+    archive_dir: str | Path,
+    layer: str = "raw",
+    network_id: str = "blue-bikes",
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> Iterator[tuple[datetime, pl.DataFrame]]:
+    """
+    Yield (snapshot_ts, frame) for every archived snapshot of network_id in time order, one file at a
+    time so memory stays bounded by the largest snapshot. Frames have the archived columns without
+    snapshot_ts.
+    """
+    network_dir = Path(archive_dir) / layer / f"network_id={network_id}"
+    start = start.astimezone(timezone.utc) if start is not None else None
+    end = end.astimezone(timezone.utc) if end is not None else None
+    # Partition and file names sort chronologically
+    for path in sorted(network_dir.glob("date=*/hour=*/*.parquet")):
+        ts = datetime.strptime(path.stem, _SNAPSHOT_FORMAT).replace(tzinfo=timezone.utc)
+        if (start is not None and ts < start) or (end is not None and ts >= end):
+            continue
+        yield ts, pl.read_parquet(path).drop(SNAPSHOT_COLUMN)
@@ -0,0 +1,100 @@
+"""
+Change detection between consecutive transformed snapshots.
+Each station (keyed on name + latitude + longitude) gets a 64-bit hash of its other columns; comparing
+those with the previous snapshot's hashes splits the current snapshot into new, changed, unchanged and
+removed stations, so the checks and the load only need to process what changed.
+The previous snapshot's keys and hashes are kept in memory (daemon mode) and optionally in a small
+Parquet state file, and only replaced once a run has passed its checks and loaded (see commit).
+"""
+import os
+from pathlib import Path
+import polars as pl
+from src.stations import KEY_COLUMNS
+
+HASH_COLUMN = "content_hash"
+# Polars hashes are only stable within one Polars version, so state files record the version
+_VERSION_COLUMN = "hash_version"
+
+def content_hashes(df: pl.DataFrame, key_columns: list[str] = KEY_COLUMNS) -> pl.DataFrame:
+    """Key columns plus one 64-bit hash of all remaining columns per row."""
+    value_columns = sorted(c for c in df.columns if c not in key_columns)
+    content = pl.struct(value_columns).hash(seed=0) if value_columns else pl.lit(0, dtype=pl.UInt64)
+    return df.select(*key_columns, content.alias(HASH_COLUMN))
+
+class ChangeSet:
+    """
+    Result of ChangeDetector.detect for one snapshot.
+
+    Attributes:
+        full: the whole current snapshot (for frame-level checks such as row_count and duplicate_count).
+        changed: rows of full that are new or whose values changed.
+        removed: key columns of stations in the previous snapshot that are missing from full.
+        counts: {"new", "changed", "unchanged", "removed"}.
+        has_baseline: False on the first run or when the snapshot has duplicate keys; changed is then all of full.
+    """
+
+    def __init__(self, full: pl.DataFrame, changed: pl.DataFrame, removed: pl.DataFrame, counts: dict[str, int], has_baseline: bool, hashes: pl.DataFrame):
+        self.full = full
+        self.changed = changed
+        self.removed = removed
+        self.counts = counts
+        self.has_baseline = has_baseline
+        self._hashes = hashes
+
+class ChangeDetector:
+    """
+    Keeps the previous snapshot's station hashes and diffs each new snapshot against them.
+
+    Args:
+        state_path: optional Parquet file holding the previous hashes between processes (read on
+            creation, written by commit). Without it the state only lives in this object.
+        key_columns: columns identifying a station.
+    """
+
+    def __init__(self, state_path: str | Path | None = None, key_columns: list[str] = KEY_COLUMNS):
+        self.state_path = Path(state_path) if state_path is not None else None
+        self.key_columns = key_columns
+        self.previous: pl.DataFrame | None = self._read_state()
+
+    def _read_state(self) -> pl.DataFrame | None:
+        if self.state_path is None or not self.state_path.is_file():
+            return None
+        state = pl.read_parquet(self.state_path)
+        if _VERSION_COLUMN not in state.columns or state.get_column(_VERSION_COLUMN).first() != pl.__version__:
+            print(f"Change detection state {self.state_path} was written by another Polars version; starting without a baseline.")
+            return None
+        return state.drop(_VERSION_COLUMN)
+
+    def detect(self, df: pl.DataFrame) -> ChangeSet:
+        """Split df into changed rows and removed keys relative to the last committed snapshot."""
+        hashes = content_hashes(df, self.key_columns)
+        has_duplicates = hashes.select(pl.struct(self.key_columns).is_duplicated().any()).item()
+        if self.previous is None or has_duplicates:
+            counts = {"new": df.height, "changed": 0, "unchanged": 0, "removed": 0}
+            return ChangeSet(df, df, df.select(self.key_columns).clear(), counts, False, hashes)
+
+        joined = df.with_columns(hashes.get_column(HASH_COLUMN)).join(
+            self.previous, on=self.key_columns, how="left", suffix="_previous"
+        )
+        previous_hash = pl.col(f"{HASH_COLUMN}_previous")
+        is_new = previous_hash.is_null()
+        is_changed = ~is_new & (previous_hash != pl.col(HASH_COLUMN))
+        changed = joined.filter(is_new | is_changed).select(df.columns)
+        new = joined.select(is_new.sum()).item()
+        removed = self.previous.join(hashes, on=self.key_columns, how="anti").select(self.key_columns)
+        counts = {
+            "new": new,
+            "changed": changed.height - new,
+            "unchanged": df.height - changed.height,
+            "removed": removed.height,
+        }
+        return ChangeSet(df, changed, removed, counts, True, hashes)
+
+    def commit(self, change_set: ChangeSet) -> None:
+        """Make change_set's snapshot the baseline for the next detect (call after it was checked and loaded)."""
+        self.previous = change_set._hashes
+        if self.state_path is not None:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_suffix(".tmp")
+            self.previous.with_columns(pl.lit(pl.__version__).alias(_VERSION_COLUMN)).write_parquet(tmp_path)
+            os.replace(tmp_path, self.state_path)
@@ -1,21 +1,223 @@
 """
 API calling logic for CityBikes. Fetches station data and returns a Polars DataFrame.
 """
+import asyncio
+import functools
+import io
+import json
+import time
 import polars as pl
 import requests
+from requests.adapters import HTTPAdapter
+from src.response_cache import ResponseCache
+from src.stations import STATION_COLUMNS, STATION_SCHEMA
 
-def fetch_citybike_data(network_id: str = "blue-bikes") -> pl.DataFrame:
-    """Fetch station data from CityBikes API and return selected columns."""
-    url = f"https://api.citybik.es/v2/networks/{network_id}"
+API_BASE_URL = "https://api.citybik.es/v2/networks"
+# HTTP status codes worth retrying (rate limiting and transient server errors)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_session: requests.Session | None = None
+_session_pool_size = 0
+
+def fetch_citybike_data(
+    network_id: str = "blue-bikes",
+    base_url: str = API_BASE_URL,
+    session: requests.Session | None = None,
+) -> pl.DataFrame:
+    """
+    Fetch station data from CityBikes API and return selected columns.
+    Pass a session (e.g. get_session()) to reuse its keep-alive connections across calls.
+    """
+    url = f"{base_url}/{network_id}"
     try:
-        response = requests.get(url, timeout=10)
+        response = (session or requests).get(url, timeout=10)
         response.raise_for_status()
-        data = response.json()
-        stations = data["network"]["stations"]
-        return pl.DataFrame(stations).select(
-            ["name", "free_bikes", "empty_slots", "latitude", "longitude"]
+        return decode_stations(response.content)
+    except (requests.exceptions.JSONDecodeError, json.JSONDecodeError) as e:
+        raise Exception(f"Error decoding JSON: {e} - The raw response content was likely not valid JSON.")
+    except requests.exceptions.ConnectionError as e:
+        raise Exception(f"Connection error: {e}")
+    except requests.exceptions.Timeout as e:
+        raise Exception(f"Timeout error: {e}")
+    except requests.exceptions.HTTPError as e:
+        raise Exception(f"HTTP error: {e}")
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Request error: {e}")
+    except Exception as e:
+        raise Exception(f"General error: {e}")
+
+def decode_stations(payload: bytes) -> pl.DataFrame:
+    """
+    Decode a network payload straight into typed station columns.
+    See decode_network, which also returns the network's location.
+    """
+    return decode_network(payload)[0]
+
+def decode_network(payload: bytes) -> tuple[pl.DataFrame, tuple[float, float] | None]:
+    """
+    Decode a network payload straight into typed station columns and the network's location.
+    PyArrow parses the bytes natively against a strict schema holding only the selected fields,
+    so no per-station Python dicts are built.
+    Any type drift (a numeric name, a boolean, string or fractional count, or a selected field
+    missing from every station) falls back to the generic decode, so the schema checks see
+    the data exactly as the API sent it.
+
+    Returns:
+        Station DataFrame with the selected columns.
+        Location: (latitude, longitude) of network.location, None if the payload has none.
+    """
+    import pyarrow as pa
+    import pyarrow.json as pa_json
+
+    try:
+        table = pa_json.read_json(
+            io.BytesIO(payload),
+            read_options=pa_json.ReadOptions(block_size=len(payload) + 1, use_threads=False),
+            parse_options=pa_json.ParseOptions(
+                explicit_schema=_payload_schema(), unexpected_field_behavior="ignore", newlines_in_values=True
+            ),
         )
-    except requests.exceptions.JSONDecodeError as e:
+    except pa.ArrowInvalid:
+        # Unlike the Polars reader, Arrow refuses values of another JSON type instead of coercing them
+        return _decode_generic(payload)
+    network = pl.from_arrow(table).get_column("network")
+    stations = network.struct.field("stations")
+    if stations.null_count():
+        raise KeyError("Payload has no network.stations list")
+    location = _network_location(network.struct.field("location").first())
+    if stations.list.len().sum() == 0:
+        return pl.DataFrame(schema=STATION_SCHEMA), location
+    frame = stations.explode().struct.unnest()
+    # The strict schema reads a field missing from every station as all nulls; only the generic decode
+    # tells a missing field (ColumnNotFoundError) from one that is null everywhere
+    if any(frame.get_column(column).null_count() == frame.height for column in STATION_COLUMNS):
+        return _decode_generic(payload)
+    return frame, location
+
+def _decode_generic(payload: bytes) -> tuple[pl.DataFrame, tuple[float, float] | None]:
+    """decode_network through the parsed JSON (Polars infers the column types from the values)."""
+    network = json.loads(payload)["network"]
+    return _stations_to_frame(network["stations"]), _network_location(network.get("location"))
+
+def _network_location(location: dict | None) -> tuple[float, float] | None:
+    """(latitude, longitude) of a network.location object, None unless both are numbers."""
+    if not isinstance(location, dict):
+        return None
+    coordinates = location.get("latitude"), location.get("longitude")
+    if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in coordinates):
+        return None
+    return float(coordinates[0]), float(coordinates[1])
+
+@functools.lru_cache(maxsize=1)
+def _payload_schema():
+    """Arrow schema of the payload with only the selected station fields and the network location (other fields are skipped)."""
+    import pyarrow as pa
+
+    arrow_types = {pl.String: pa.string(), pl.Int64: pa.int64(), pl.Float64: pa.float64()}
+    station = pa.struct([(name, arrow_types[dtype]) for name, dtype in STATION_SCHEMA.items()])
+    location = pa.struct([("latitude", pa.float64()), ("longitude", pa.float64())])
+    return pa.schema([("network", pa.struct([("location", location), ("stations", pa.list_(station))]))])
+
+def _stations_to_frame(stations: list[dict]) -> pl.DataFrame:
+    """Build a DataFrame with the selected station columns from the API station list."""
+    return pl.DataFrame(stations).select(STATION_COLUMNS)
+
+def get_session(pool_size: int = 10) -> requests.Session:
+    """
+    Return the module-level keep-alive session shared by batch fetches.
+    The connection pool is (re)mounted when a larger pool size is requested.
+    """
+    global _session, _session_pool_size
+    if _session is None:
+        _session = requests.Session()
+    if _session_pool_size < pool_size:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        _session.mount("http://", adapter)
+        _session.mount("https://", adapter)
+        _session_pool_size = pool_size
+    return _session
+
+def _request_payload(
+    session: requests.Session,
+    network_id: str,
+    base_url: str,
+    timeout: float,
+    cache: ResponseCache | None = None,
+) -> tuple[bytes, bool]:
+    """
+    Return the network payload and whether it was served from the cache.
+    With a cache, a payload younger than its TTL is reused without a request; otherwise a
+    conditional request is sent and a 304 Not Modified reuses the cached payload.
+    """
+    if cache is not None and cache.is_fresh(network_id):
+        return cache.load(network_id), True
+    headers = cache.conditional_headers(network_id) if cache is not None else {}
+    response = session.get(f"{base_url}/{network_id}", headers=headers, timeout=timeout)
+    if response.status_code == 304 and headers:
+        cache.revalidate(network_id)
+        return cache.load(network_id), True
+    response.raise_for_status()
+    if cache is not None:
+        cache.store(
+            network_id,
+            response.content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+    return response.content, False
+
+def _fetch_network(
+    session: requests.Session,
+    network_id: str,
+    base_url: str,
+    timeout: float,
+    retries: int,
+    backoff: float,
+    cache: ResponseCache | None = None,
+) -> tuple[pl.DataFrame, tuple[float, float] | None, int, bool]:
+    """
+    Fetch one network with retry and exponential backoff (blocking).
+    Returns the station DataFrame, the network location (see decode_network), the number of attempts
+    made and whether the payload came from the cache.
+    Client errors (4xx other than 429) and invalid payloads are not retried.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            payload, from_cache = _request_payload(session, network_id, base_url, timeout, cache)
+            return *decode_network(payload), attempt, from_cache
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error = e
+        except requests.exceptions.HTTPError as e:
+            if e.response is None or e.response.status_code not in RETRYABLE_STATUS_CODES:
+                e.attempts = attempt
+                raise
+            error = e
+        except Exception as e:
+            e.attempts = attempt
+            raise
+        if attempt > retries:
+            error.attempts = attempt
+            raise error
+        time.sleep(backoff * (2 ** (attempt - 1)))
+
+def fetch_citybike_data_cached(
+    cache: ResponseCache,
+    network_id: str = "blue-bikes",
+    base_url: str = API_BASE_URL,
+) -> tuple[pl.DataFrame, bool]:
+    """
+    Fetch station data through the on-disk response cache.
+
+    Returns:
+        Station DataFrame with the selected columns.
+        Unchanged: True if the payload came from the cache and was already processed by a previous run,
+        so downstream stages can be skipped.
+    """
+    try:
+        df, _, _, from_cache = _fetch_network(get_session(), network_id, base_url, timeout=10, retries=0, backoff=0, cache=cache)
+    except json.JSONDecodeError as e:
         raise Exception(f"Error decoding JSON: {e} - The raw response content was likely not valid JSON.")
     except requests.exceptions.ConnectionError as e:
         raise Exception(f"Connection error: {e}")
@@ -27,3 +229,71 @@ def fetch_citybike_data(network_id: str = "blue-bikes") -> pl.DataFrame:
         raise Exception(f"Request error: {e}")
     except Exception as e:
         raise Exception(f"General error: {e}")
+    return df, from_cache and cache.is_processed(network_id)
+
+async def fetch_networks_async(
+    network_ids: list[str],
+    max_concurrency: int = 8,
+    timeout: float = 10,
+    retries: int = 2,
+    backoff: float = 0.5,
+    base_url: str = API_BASE_URL,
+    cache: ResponseCache | None = None,
+) -> tuple[pl.DataFrame, dict[str, dict]]:
+    """
+    Fetch several networks concurrently over the shared keep-alive session.
+    At most max_concurrency requests are in flight at once; each one runs in a worker thread.
+    With a cache, each network is fetched with conditional requests (see _request_payload).
+
+    Returns:
+        Combined DataFrame of all successful networks, tagged with a network_id column.
+        Report: {network_id: {"status": "ok" | "failed", "rows": int, "attempts": int, "cached": bool, "seconds": float,
+        "error": str | None, "location": (latitude, longitude) of the network from the payload, or None}}
+    """
+    session = get_session(pool_size=max_concurrency)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch_one(network_id: str) -> tuple[str, pl.DataFrame | None, dict]:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                df, location, attempts, from_cache = await asyncio.to_thread(
+                    _fetch_network, session, network_id, base_url, timeout, retries, backoff, cache
+                )
+            except Exception as e:
+                return network_id, None, {
+                    "status": "failed",
+                    "rows": 0,
+                    "attempts": getattr(e, "attempts", retries + 1),
+                    "cached": False,
+                    "seconds": time.perf_counter() - start,
+                    "error": f"{type(e).__name__}: {e}",
+                    "location": None,
+                }
+            return network_id, df, {
+                "status": "ok",
+                "rows": df.height,
+                "attempts": attempts,
+                "cached": from_cache,
+                "seconds": time.perf_counter() - start,
+                "error": None,
+                "location": location,
+            }
+
+    results = await asyncio.gather(*(fetch_one(network_id) for network_id in dict.fromkeys(network_ids)))
+
+    frames = [
+        df.with_columns(pl.lit(network_id).alias("network_id"))
+        for network_id, df, _ in results
+        if df is not None
+    ]
+    report = {network_id: status for network_id, _, status in results}
+    if frames:
+        combined = pl.concat(frames, how="vertical_relaxed")
+    else:
+        combined = pl.DataFrame(schema={**STATION_SCHEMA, "network_id": pl.String})
+    return combined, report
+
+def fetch_networks(network_ids: list[str], **kwargs) -> tuple[pl.DataFrame, dict[str, dict]]:
+    """Synchronous wrapper around fetch_networks_async (see it for arguments and return values)."""
+    return asyncio.run(fetch_networks_async(network_ids, **kwargs))
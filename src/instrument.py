@@ -0,0 +1,214 @@
+"""
+Per-stage instrumentation for pipeline runs.
+Records wall time, CPU time, peak RSS and row counts in/out for each stage, optionally with a
+cProfile or tracemalloc dump per stage, and writes the run as a JSON report and/or a Prometheus
+textfile (for node_exporter's textfile collector).
+"""
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+PROFILERS = ("cprofile", "tracemalloc")
+# Lines of the tracemalloc top-allocations dump per stage
+TRACEMALLOC_TOP = 25
+
+_STATUS = Path("/proc/self/status")
+_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+def _rss_mib(field: str) -> float | None:
+    """VmRSS / VmHWM of this process in MiB (None where /proc is unavailable)."""
+    try:
+        for line in _STATUS.read_text().splitlines():
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def _peak_rss_mib() -> float:
+    peak = _rss_mib("VmHWM")
+    if peak is not None:
+        return peak
+    # ru_maxrss is bytes on macOS, KiB elsewhere
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+def _reset_peak_rss() -> bool:
+    """Reset VmHWM to the current RSS (Linux 4.0+), so the next reading is the stage's own peak."""
+    try:
+        _CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+def _height(value: Any) -> int | None:
+    """Row count of a DataFrame-like value (None for anything else)."""
+    height = getattr(value, "height", None)
+    return height if isinstance(height, int) else None
+
+class StageRecord(dict):
+    """Metrics of one stage; rows_out can be set inside the stage block."""
+
+class RunRecorder:
+    """
+    Collects StageRecords for one pipeline run.
+
+    Args:
+        profile: optional per-stage profiler, "cprofile" (<stage>.prof) or "tracemalloc"
+            (<stage>.tracemalloc.txt with the top allocation sites, plus the traced peak in the record).
+        profile_dir: directory for the profiler dumps (created if missing).
+        labels: extra labels put on the report and on every Prometheus sample (e.g. {"mode": "clean"}).
+    """
+
+    def __init__(self, profile: str | None = None, profile_dir: str | Path = "profiles", labels: dict[str, str] | None = None):
+        if profile is not None and profile not in PROFILERS:
+            raise ValueError(f"Unknown profiler {profile!r}; expected one of {PROFILERS}")
+        self.profile = profile
+        self.profile_dir = Path(profile_dir)
+        self.labels = dict(labels or {})
+        self.stages: list[StageRecord] = []
+        self.started_at = datetime.now(timezone.utc)
+        self.status = "ok"
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        # Highest high-water mark seen so far: each stage resets VmHWM, so one reading at the end
+        # would only cover the time since the last stage started
+        self._peak_rss_mib = 0.0
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None) -> Iterator[StageRecord]:
+        """
+        Time the enclosed block as stage name. Set record["rows_out"] inside the block to report output rows.
+        A stage that raises (including a circuit-breaker SystemExit) is recorded with status "failed".
+        """
+        record = StageRecord(name=name, status="ok", rows_in=rows_in, rows_out=None)
+        profiler = None
+        if self.profile == "cprofile":
+            profiler = cProfile.Profile()
+        elif self.profile == "tracemalloc":
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        # The peak before this stage (earlier stages, work between stages) is lost by the reset
+        self._peak_rss_mib = max(self._peak_rss_mib, _peak_rss_mib())
+        peak_is_stage = _reset_peak_rss()
+        record["rss_start_mib"] = _rss_mib("VmRSS")
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        except BaseException as e:
+            record["status"] = "failed"
+            record["error"] = f"{type(e).__name__}: {e}"
+            self.status = "failed"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record["wall_seconds"] = time.perf_counter() - start
+            record["cpu_seconds"] = time.process_time() - cpu_start
+            record["peak_rss_mib"] = _peak_rss_mib()
+            self._peak_rss_mib = max(self._peak_rss_mib, record["peak_rss_mib"])
+            # Without a resettable high-water mark the peak is the process-wide one so far
+            record["peak_rss_scope"] = "stage" if peak_is_stage else "process"
+            if profiler is not None:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(self.profile_dir / f"{name}.prof")
+            elif self.profile == "tracemalloc":
+                record["traced_peak_mib"] = tracemalloc.get_traced_memory()[1] / 2**20
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                top = snapshot.statistics("lineno")[:TRACEMALLOC_TOP]
+                (self.profile_dir / f"{name}.tracemalloc.txt").write_text("\n".join(str(stat) for stat in top) + "\n")
+            self.stages.append(record)
+
+    def call(self, name: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) as stage name and return its result.
+        rows_in is the height of the first DataFrame argument, rows_out the height of a DataFrame result.
+        """
+        rows_in = next((h for h in map(_height, (*args, *kwargs.values())) if h is not None), None)
+        with self.stage(name, rows_in=rows_in) as record:
+            result = func(*args, **kwargs)
+            record["rows_out"] = _height(result)
+        return result
+
+    def report(self) -> dict:
+        """The run as a JSON-serializable dict; peak_rss_mib is the run's peak across all stages and the time between them."""
+        return {
+            "started_at": self.started_at.isoformat(),
+            "status": self.status,
+            "labels": self.labels,
+            "wall_seconds": time.perf_counter() - self._start,
+            "cpu_seconds": time.process_time() - self._cpu_start,
+            "peak_rss_mib": max(self._peak_rss_mib, _peak_rss_mib()),
+            "profile": self.profile,
+            "stages": [dict(record) for record in self.stages],
+        }
+
+    def write_json(self, path: str | Path) -> None:
+        """Write report() as JSON to path."""
+        _atomic_write(Path(path), json.dumps(self.report(), indent=2) + "\n")
+
+    def write_prometheus(self, path: str | Path) -> None:
+        """
+        Write the run in the Prometheus text exposition format to path (a .prom file for the textfile collector).
+        Stage metrics carry a stage label; a failed run is exported as bike_pipeline_run_success 0.
+        """
+        report = self.report()
+        base = dict(self.labels)
+        lines = []
+
+        def metric(name: str, help_text: str, samples: list[tuple[dict, float | None]]) -> None:
+            samples = [(labels, value) for labels, value in samples if value is not None]
+            if not samples:
+                return
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels({**base, **labels})} {value}")
+
+        metric("bike_pipeline_run_success", "1 if every stage of the last run passed.", [({}, int(report["status"] == "ok"))])
+        metric("bike_pipeline_run_timestamp_seconds", "Start time of the last run.", [({}, self.started_at.timestamp())])
+        metric("bike_pipeline_run_wall_seconds", "Wall time of the last run.", [({}, report["wall_seconds"])])
+        metric("bike_pipeline_run_peak_rss_bytes", "Peak resident set size of the last run.", [({}, report["peak_rss_mib"] * 2**20)])
+        for name, key, help_text, scale in (
+            ("bike_pipeline_stage_wall_seconds", "wall_seconds", "Wall time per stage.", 1),
+            ("bike_pipeline_stage_cpu_seconds", "cpu_seconds", "CPU time per stage.", 1),
+            ("bike_pipeline_stage_peak_rss_bytes", "peak_rss_mib", "Peak resident set size per stage.", 2**20),
+            ("bike_pipeline_stage_traced_peak_bytes", "traced_peak_mib", "Peak traced Python allocations per stage (tracemalloc).", 2**20),
+            ("bike_pipeline_stage_rows_in", "rows_in", "Rows into each stage.", 1),
+            ("bike_pipeline_stage_rows_out", "rows_out", "Rows out of each stage.", 1),
+        ):
+            metric(name, help_text, [
+                ({"stage": s["name"]}, None if s.get(key) is None else s[key] * scale)
+                for s in report["stages"]
+            ])
+        metric("bike_pipeline_stage_success", "1 if the stage passed.", [
+            ({"stage": s["name"]}, int(s["status"] == "ok")) for s in report["stages"]
+        ])
+        _atomic_write(Path(path), "\n".join(lines) + "\n")
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+def _atomic_write(path: Path, text: str) -> None:
+    # The textfile collector may read at any time, so never expose a half-written file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
@@ -1,18 +1,19 @@
 """
 Demo execution: fetch CityBikes data and run the circuit breaker.
 Run from repo root: python src/main.py --mode <clean|faulty> --fault-type <schema|transform> --soda
-Or from src/: python main.py --mode <clean|faulty> --fault-type <schema|transform> --soda
+(or python -m src.main ...). Or from src/: python main.py --mode <clean|faulty> --fault-type <schema|transform> --soda
 Fault type is optional and defaults to schema (will only run in faulty mode).
 Soda is optional and defaults to false.
+Add --daemon --interval N to keep the process running and repeat the pipeline every N seconds.
 """
 import os
 from dotenv import load_dotenv
 import sys
+from datetime import datetime, timezone
 from pathlib import Path
-import polars as pl
 import argparse
 
-# Ensure project root is on path so other modules can be imported
+# Ensure project root is on path so the src package (and validation) can be imported
 _root = Path(__file__).resolve().parent.parent
 if str(_root) not in sys.path:
     sys.path.insert(0, str(_root))
@@ -24,15 +25,14 @@ else:
     # Fallback to default behavior (current directory)
     load_dotenv()
 
+# Only required by runs that load data (clean mode)
 DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("Database URL is not set in the .env file")
 
-from ingest import fetch_citybike_data
-from transform import transform
-from schema_validator import run_schema_checks
-from soda_runner import monitor_raw_data, monitor_transformed_data
-from load import load_data_into_database
+# Standard library only: the pipeline modules (Polars, Pandera, requests, Soda/DuckDB, SQLAlchemy)
+# are imported inside run_pipeline by the stages that use them
+from src.response_cache import ResponseCache
+from src.instrument import PROFILERS, RunRecorder
+from src.scheduler import Scheduler
 
 def main():
     parser = argparse.ArgumentParser(description="Run the bike data quality pipeline.")
@@ -45,36 +45,313 @@ def main():
         choices=["schema", "transform"],
         help="When --mode faulty: which fault to inject — 'schema' (invalid latitude) or 'transform' (invalid availability_pct + extra row). Ignored when --mode clean.",
     )
+    parser.add_argument("--lazy-transform", action="store_true", help="Run transform as a single lazy Polars plan collected once.")
+    parser.add_argument(
+        "--checks-engine",
+        type=str,
+        default="soda",
+        choices=["soda", "native"],
+        help="Engine for the --soda checks: 'soda' (Soda Core) or 'native' (single-pass Polars evaluation of the same SodaCL files).",
+    )
+    parser.add_argument(
+        "--schema-engine",
+        type=str,
+        default="pandera",
+        choices=["pandera", "compiled"],
+        help="Engine for the schema checks: 'pandera' (per-run Pandera validation) or 'compiled' (the same schema compiled once into Polars expressions).",
+    )
+    parser.add_argument(
+        "--load-mode",
+        type=str,
+        default="replace",
+        choices=["replace", "upsert", "copy", "history"],
+        help="How to load transformed data: 'replace' rewrites the table, 'upsert' applies only inserted/updated/deleted stations, 'copy' rewrites the table with PostgreSQL COPY, 'history' appends the snapshot to citybikes_history and updates the hourly/daily rollup tables.",
+    )
+    parser.add_argument("--stream", action="store_true", help="Clean mode only: process --input in bounded-size batches instead of fetching from the API (always replaces the table, atomically).")
+    parser.add_argument("--input", type=str, default=None, help="With --stream: Parquet/NDJSON file, or a directory of them.")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="With --stream: rows per batch (default 100000).")
+    parser.add_argument("--networks", type=str, default=None, help="Clean mode only: comma-separated CityBikes network ids to run in parallel (one summary, one batched load with a network_id column).")
+    parser.add_argument("--workers", type=int, default=None, help="With --networks: worker processes (default: one per CPU).")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Cache API responses in this directory and skip the pipeline when the data is unchanged (clean mode only).")
+    parser.add_argument("--archive-dir", type=str, default=None, help="Clean mode: archive the raw and transformed data of every run as partitioned Parquet under this directory. With --replay: the archive to read.")
+    parser.add_argument("--replay", action="store_true", help="Clean mode only: re-run validation, checks and transform on the archived raw snapshots in --archive-dir instead of fetching (no load).")
+    parser.add_argument("--replay-start", type=datetime.fromisoformat, default=None, help="With --replay: first snapshot time to include (ISO 8601, UTC if no offset).")
+    parser.add_argument("--replay-end", type=datetime.fromisoformat, default=None, help="With --replay: snapshot time to stop before (ISO 8601, UTC if no offset).")
+    parser.add_argument("--dedup-distance", type=float, default=None, metavar="METERS", help="Clean mode (single network): after transform, drop stations within METERS of another station with the same name (fuzzy dedup for jittered coordinates, see src/spatial.py).")
+    parser.add_argument("--anomaly-detection", action="store_true", help="Clean mode (single network): score each transformed snapshot against rolling per-station and per-network baselines; warnings are reported, failures halt the pipeline like the checks.")
+    parser.add_argument("--anomaly-state", type=str, default=None, help="With --anomaly-detection: directory keeping the rolling baselines between runs (default .cache/anomaly_state/blue-bikes; in --daemon mode they are kept in memory unless this is given).")
+    parser.add_argument("--anomaly-reset", action="store_true", help="With --anomaly-detection: discard the stored baselines on start and warm them up again (e.g. after a planned change to the network).")
+    parser.add_argument("--anomaly-thresholds", type=str, default=None, help="With --anomaly-detection: thresholds file (default validation/anomaly_thresholds.yml).")
+    parser.add_argument("--change-detection", action="store_true", help="Clean mode (single network): diff each transformed snapshot against the previous one and run the transformed checks and the load on new/changed/removed stations only (row_count and duplicate checks still see the whole snapshot).")
+    parser.add_argument("--change-state", type=str, default=None, help="With --change-detection: Parquet file keeping the previous snapshot's station hashes between runs (default .cache/change_state/blue-bikes.parquet; in --daemon mode the state is kept in memory unless this is given).")
+    parser.add_argument("--cache-ttl", type=float, default=60, help="Seconds a cached response is reused without contacting the API (default 60).")
+    parser.add_argument("--run-report", type=str, default=None, help="Write per-stage wall/CPU time, peak RSS and row counts of this run to this JSON file.")
+    parser.add_argument("--metrics-textfile", type=str, default=None, help="Write the same run metrics in Prometheus text format to this file (e.g. for node_exporter's textfile collector).")
+    parser.add_argument("--profile", type=str, default=None, choices=PROFILERS, help="Dump a cProfile (.prof) or tracemalloc (top allocations) profile per stage into --profile-dir.")
+    parser.add_argument("--profile-dir", type=str, default="profiles", help="With --profile: directory for the per-stage dumps (default ./profiles).")
+    parser.add_argument("--daemon", action="store_true", help="Keep running and repeat the pipeline every --interval seconds, reusing imports, DB engine, HTTP session and Soda/DuckDB setup. Stops on SIGTERM/SIGINT after the current cycle.")
+    parser.add_argument("--interval", type=float, default=60, help="With --daemon: seconds between cycle starts (default 60). Cycles that would overlap a still-running one are skipped.")
     args = parser.parse_args()
+    if args.stream and not args.input:
+        parser.error("--stream requires --input")
+    if args.stream and args.load_mode != "replace":
+        parser.error("--stream loads through a staged table swap and only supports --load-mode replace")
+    if args.replay and not args.archive_dir:
+        parser.error("--replay requires --archive-dir")
+    if args.dedup_distance is not None and (args.dedup_distance <= 0 or args.networks or args.stream or args.replay):
+        parser.error("--dedup-distance must be positive and applies to single-network clean runs")
+    if args.anomaly_detection and (args.networks or args.stream or args.replay):
+        parser.error("--anomaly-detection applies to single-network clean runs")
+    if args.change_detection and (args.networks or args.stream or args.replay or args.load_mode not in ("replace", "upsert")):
+        parser.error("--change-detection applies to single-network clean runs with --load-mode replace or upsert")
+    if args.interval <= 0:
+        parser.error("--interval must be positive")
+    if args.mode == "clean" and not args.replay and not DATABASE_URL:
+        raise ValueError("Database URL is not set in the .env file")
+
+    if args.daemon:
+        from src.ingest import get_session
+
+        session = get_session()
+        # The response cache, change-detection state and anomaly baselines are opened once, so they stay in memory between cycles
+        cache = ResponseCache(args.cache_dir, ttl=args.cache_ttl) if args.cache_dir else None
+        detector = anomaly_detector = None
+        if args.change_detection:
+            from src.change_detection import ChangeDetector
+
+            detector = ChangeDetector(args.change_state)
+        if args.anomaly_detection:
+            anomaly_detector = make_anomaly_detector(args, args.anomaly_state)
+        # One worker pool for all cycles of a --networks daemon, instead of spawning fresh workers every cycle
+        pool = None
+        if args.mode == "clean" and args.networks and not args.replay:
+            from src.runner import make_process_pool
+
+            pool = make_process_pool(args.workers)
+        try:
+            Scheduler(
+                lambda: run_once(args, session=session, cache=cache, detector=detector, anomaly_detector=anomaly_detector, pool=pool),
+                args.interval,
+            ).run()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    else:
+        run_once(args)
+
+def make_anomaly_detector(args: argparse.Namespace, state_dir):
+    """AnomalyDetector with the thresholds file from --anomaly-thresholds (or the default one)."""
+    from src.anomaly import AnomalyDetector, load_anomaly_thresholds
+
+    thresholds = load_anomaly_thresholds(args.anomaly_thresholds) if args.anomaly_thresholds else None
+    detector = AnomalyDetector(state_dir, thresholds=thresholds)
+    if args.anomaly_reset:
+        detector.reset()
+    return detector
+
+def run_once(
+    args: argparse.Namespace, session=None, cache: ResponseCache | None = None, detector=None, anomaly_detector=None, pool=None
+) -> None:
+    """Run the pipeline once and write the run report / metrics file if requested."""
+    recorder = RunRecorder(profile=args.profile, profile_dir=args.profile_dir, labels={"mode": args.mode})
+    try:
+        run_pipeline(args, recorder, session=session, cache=cache, detector=detector, anomaly_detector=anomaly_detector, pool=pool)
+    except BaseException:
+        recorder.status = "failed"
+        raise
+    finally:
+        # Written even when the circuit breaker halts the run, so the failing stage is visible
+        if args.run_report:
+            recorder.write_json(args.run_report)
+        if args.metrics_textfile:
+            recorder.write_prometheus(args.metrics_textfile)
+
+def run_pipeline(
+    args: argparse.Namespace,
+    recorder: RunRecorder,
+    session=None,
+    cache: ResponseCache | None = None,
+    detector=None,
+    anomaly_detector=None,
+    pool=None,
+) -> None:
+    """
+    Run the pipeline selected by the parsed arguments, recording each stage with recorder.
+    session, cache, the change detector, the anomaly detector and the --networks worker pool are reused
+    between daemon cycles; by default they are created per run.
+    """
+    if cache is None and args.cache_dir:
+        cache = ResponseCache(args.cache_dir, ttl=args.cache_ttl)
+    stage = recorder.call
+    if args.mode == "clean" and args.replay:
+        from src.runner import replay_network
+
+        start, end = (
+            ts.replace(tzinfo=timezone.utc) if ts is not None and ts.tzinfo is None else ts
+            for ts in (args.replay_start, args.replay_end)
+        )
+        network_ids = [n.strip() for n in args.networks.split(",") if n.strip()] if args.networks else ["blue-bikes"]
+        failed = 0
+        for network_id in network_ids:
+            summary = stage(
+                f"replay_{network_id}",
+                replay_network,
+                args.archive_dir,
+                network_id,
+                start,
+                end,
+                checks_engine=args.checks_engine if args.soda else None,
+                schema_engine=args.schema_engine,
+                lazy_transform=args.lazy_transform,
+            )
+            failed += summary["failed"]
+        if failed:
+            raise SystemExit(f"Replay: {failed} archived snapshot(s) failed the checks.")
+    elif args.mode == "clean" and args.networks:
+        from src.runner import run_networks
+
+        stage(
+            "networks",
+            run_networks,
+            [n.strip() for n in args.networks.split(",") if n.strip()],
+            max_workers=args.workers,
+            checks_engine=args.checks_engine if args.soda else None,
+            schema_engine=args.schema_engine,
+            lazy_transform=args.lazy_transform,
+            database_url=DATABASE_URL,
+            load_mode=args.load_mode,
+            archive_dir=args.archive_dir,
+            pool=pool,
+            cache=cache,
+        )
+    elif args.mode == "clean" and args.stream:
+        from src.stream import run_stream
+
+        stage(
+            "stream",
+            run_stream,
+            args.input,
+            batch_size=args.batch_size,
+            checks_engine=args.checks_engine if args.soda else None,
+            database_url=DATABASE_URL,
+            lazy_transform=args.lazy_transform,
+            schema_engine=args.schema_engine,
+        )
+    elif args.mode == "clean":
+        from src.archive import archive_snapshot, snapshot_time
+        from src.ingest import fetch_citybike_data, fetch_citybike_data_cached
+        from src.schema_validator import run_schema_checks
+        from src.transform import transform
 
-    if args.mode == "clean":
-        data = fetch_citybike_data()
-        run_schema_checks(data)
+        if cache is not None:
+            data, unchanged = stage("fetch", fetch_citybike_data_cached, cache)
+            if unchanged:
+                print("CityBikes data unchanged since the last successful run; skipping validation, transform and load.")
+                return
+        else:
+            data = stage("fetch", fetch_citybike_data, session=session)
+        snapshot_ts = snapshot_time()
+        if args.archive_dir:
+            stage("archive_raw", archive_snapshot, data, args.archive_dir, "raw", "blue-bikes", snapshot_ts)
+        stage("schema_checks", run_schema_checks, data, engine=args.schema_engine)
         if args.soda:
-            rc = monitor_raw_data(data)
-            if rc != 0:
-                raise SystemExit(f"Soda raw-data checks failed (exit code {rc}).")
-        transformed_data = transform(data)
+            from src.soda_runner import monitor_raw_data
+
+            with recorder.stage("raw_checks", rows_in=data.height):
+                rc = monitor_raw_data(data, engine=args.checks_engine)
+                if rc != 0:
+                    raise SystemExit(f"Soda raw-data checks failed (exit code {rc}).")
+        transformed_data = stage("transform", transform, data, lazy=args.lazy_transform)
+        if args.dedup_distance is not None:
+            from src.spatial import dedup_nearby
+
+            deduplicated = stage("spatial_dedup", dedup_nearby, transformed_data, args.dedup_distance)
+            print(f"Spatial dedup: dropped {transformed_data.height - deduplicated.height} stations within {args.dedup_distance:g} m of a same-named station.")
+            transformed_data = deduplicated
+        if args.archive_dir:
+            stage("archive_transformed", archive_snapshot, transformed_data, args.archive_dir, "transformed", "blue-bikes", snapshot_ts)
+        anomaly_results = None
+        if args.anomaly_detection:
+            if anomaly_detector is None:
+                anomaly_detector = make_anomaly_detector(args, args.anomaly_state or _root / ".cache" / "anomaly_state" / "blue-bikes")
+            with recorder.stage("anomaly_checks", rows_in=transformed_data.height) as record:
+                rc, anomaly_results = anomaly_detector.check(transformed_data)
+                record["rows_out"] = anomaly_results["outliers"].height
+                for name, value in anomaly_results["metrics"].items():
+                    shown = "warming up" if value is None else f"{value:.3f}"
+                    print(f"Anomaly check {name}: {shown} ({anomaly_results['outcomes'][name]})")
+                print(f"Anomaly checks: {anomaly_results['outliers'].height} station outlier(s).")
+                if anomaly_results["rebaselined"]:
+                    print("Anomaly checks: the feed has failed too many snapshots in a row; restarting the baselines from this one.")
+                if rc == 2:
+                    raise SystemExit(f"Anomaly checks failed (exit code {rc}).")
+                if rc == 1:
+                    print("Anomaly checks: warnings raised; continuing.")
+        check_data, full_frame, changes = transformed_data, None, None
+        if args.change_detection:
+            from src.change_detection import ChangeDetector
+
+            if detector is None:
+                detector = ChangeDetector(args.change_state or _root / ".cache" / "change_state" / "blue-bikes.parquet")
+            with recorder.stage("detect_changes", rows_in=transformed_data.height) as record:
+                changes = detector.detect(transformed_data)
+                record["rows_out"] = changes.changed.height
+            print(
+                "Change detection: {new} new, {changed} changed, {unchanged} unchanged, {removed} removed stations.".format(**changes.counts)
+                if changes.has_baseline else "Change detection: no previous snapshot to compare with; processing every station."
+            )
+            check_data, full_frame = changes.changed, changes.full
         if args.soda:
-            rc = monitor_transformed_data(transformed_data)
-            if rc != 0:
-                raise SystemExit(f"Soda transformed-data checks failed (exit code {rc}).")
+            from src.soda_runner import monitor_transformed_data
+
+            with recorder.stage("transformed_checks", rows_in=check_data.height):
+                rc = monitor_transformed_data(check_data, engine=args.checks_engine, full_frame=full_frame)
+                if rc != 0:
+                    raise SystemExit(f"Soda transformed-data checks failed (exit code {rc}).")
             print("Soda Core: raw and transformed data checks passed.")
-        load_data_into_database(transformed_data, DATABASE_URL)
+
+        from src.load import load_data_bulk, load_data_changes, load_data_history, load_data_incremental, load_data_into_database
+
+        if changes is not None and changes.has_baseline:
+            stage("load", load_data_changes, changes.changed, changes.removed, DATABASE_URL)
+        elif changes is not None or args.load_mode == "upsert":
+            stage("load", load_data_incremental, transformed_data, DATABASE_URL)
+        elif args.load_mode == "history":
+            stage("load", load_data_history, transformed_data, DATABASE_URL, snapshot_ts=snapshot_ts)
+        elif args.load_mode == "copy":
+            stage("load", load_data_bulk, transformed_data, DATABASE_URL)
+        else:
+            stage("load", load_data_into_database, transformed_data, DATABASE_URL)
+        # Baselines only move on once the snapshot has passed every check and is loaded
+        if changes is not None:
+            detector.commit(changes)
+        if anomaly_results is not None:
+            anomaly_detector.commit(anomaly_results)
+        if cache is not None:
+            cache.mark_processed("blue-bikes")
     elif args.mode == "faulty":
+        import polars as pl
+        from src.ingest import fetch_citybike_data
+        from src.schema_validator import run_schema_checks
+
         if args.fault_type == "schema":
-            data = fetch_citybike_data()
+            data = stage("fetch", fetch_citybike_data, session=session)
             # Set the latitude value to 39, which is outside the allowed range
             data = data.with_columns(pl.lit(39).alias("latitude").cast(pl.Float64))
-            run_schema_checks(data)
+            stage("schema_checks", run_schema_checks, data, engine=args.schema_engine)
         elif args.fault_type == "transform":
-            data = fetch_citybike_data()
-            run_schema_checks(data)
+            from src.transform import transform
+
+            data = stage("fetch", fetch_citybike_data, session=session)
+            stage("schema_checks", run_schema_checks, data, engine=args.schema_engine)
             if args.soda:
-                rc = monitor_raw_data(data)
-                if rc != 0:
-                    raise SystemExit(f"Soda raw-data checks failed (exit code {rc}).")
-            transformed_data = transform(data)
+                from src.soda_runner import monitor_raw_data
+
+                with recorder.stage("raw_checks", rows_in=data.height):
+                    rc = monitor_raw_data(data, engine=args.checks_engine)
+                    if rc != 0:
+                        raise SystemExit(f"Soda raw-data checks failed (exit code {rc}).")
+            transformed_data = stage("transform", transform, data, lazy=args.lazy_transform)
             # Add a row with complete duplicate values of another
             transformed_data = transformed_data.extend(
                 pl.DataFrame({
@@ -92,9 +369,12 @@ def main():
                 pl.lit(39.5).alias("total_docks")
             )
             if args.soda:
-                rc = monitor_transformed_data(transformed_data)
-                if rc != 0:
-                    raise SystemExit(f"Soda transformed-data checks failed (exit code {rc}).")
+                from src.soda_runner import monitor_transformed_data
+
+                with recorder.stage("transformed_checks", rows_in=transformed_data.height):
+                    rc = monitor_transformed_data(transformed_data, engine=args.checks_engine)
+                    if rc != 0:
+                        raise SystemExit(f"Soda transformed-data checks failed (exit code {rc}).")
         else:
             raise ValueError(f"Invalid faulty type: {args.fault_type}")
     else:
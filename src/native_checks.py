@@ -0,0 +1,222 @@
+"""
+Native quality-check engine: evaluates the SodaCL checks used by this project directly with Polars.
+Every metric in a checks file is compiled into one lazy aggregation, so a scan is a single pass over
+the frame with no DuckDB, Jinja or scan bookkeeping. Results mirror run_soda_scan's (exit_code, scan_results).
+
+Supported SodaCL subset: row_count, missing_count(col), min(col), max(col) and duplicate_count(cols)
+with a comparison against a number (optionally with a name), and schema checks with
+"when wrong column type" / "when required column missing" under warn or fail.
+"""
+import operator
+import re
+from pathlib import Path
+import polars as pl
+import yaml
+
+_OPERATORS = {
+    "<=": operator.le,
+    ">=": operator.ge,
+    "!=": operator.ne,
+    "<": operator.lt,
+    ">": operator.gt,
+    "=": operator.eq,
+}
+_METRIC_CHECK = re.compile(
+    r"^(?P<metric>row_count|missing_count|min|max|duplicate_count)"
+    r"(?:\((?P<args>[^)]*)\))?\s*(?P<op><=|>=|!=|<|>|=)\s*(?P<threshold>-?\d+(?:\.\d+)?)$"
+)
+
+# Column type names as seen by the Soda DuckDB data source (Int64 is registered as INTEGER, see soda_runner)
+_SODA_TYPES = {
+    pl.String: "varchar",
+    pl.Int64: "integer",
+    pl.Int32: "integer",
+    pl.Int16: "smallint",
+    pl.Int8: "tinyint",
+    pl.UInt64: "ubigint",
+    pl.UInt32: "uinteger",
+    pl.UInt16: "usmallint",
+    pl.UInt8: "utinyint",
+    pl.Float64: "double",
+    pl.Float32: "float",
+    pl.Boolean: "boolean",
+    pl.Date: "date",
+    pl.Datetime: "timestamp",
+}
+
+# Soda Core exit codes
+_EXIT_PASS, _EXIT_WARN, _EXIT_FAIL, _EXIT_ERROR = 0, 1, 2, 3
+
+# Metrics of the whole frame rather than of individual rows (see run_native_checks' full_frame)
+FRAME_METRICS = {"row_count", "duplicate_count"}
+
+_compiled: dict[Path, tuple[int, list[dict]]] = {}
+
+def _metric_expr(metric: str, columns: list[str]) -> pl.Expr:
+    if metric == "row_count":
+        return pl.len()
+    if metric == "missing_count":
+        return pl.col(columns[0]).null_count()
+    if metric == "min":
+        return pl.col(columns[0]).min()
+    if metric == "max":
+        return pl.col(columns[0]).max()
+    # duplicate_count: number of distinct key values occurring more than once, ignoring rows with a null key
+    key = pl.struct(columns)
+    not_null = pl.all_horizontal(pl.col(c).is_not_null() for c in columns)
+    return key.filter(not_null & key.is_duplicated()).n_unique()
+
+def _parse_check(entry) -> dict:
+    """Turn one SodaCL list entry into a compiled check description."""
+    if isinstance(entry, dict):
+        (definition, config), = entry.items()
+        config = config or {}
+    else:
+        definition, config = entry, {}
+    definition = definition.strip()
+
+    if definition == "schema":
+        levels = {}
+        for level in ("warn", "fail"):
+            rules = config.get(level) or {}
+            levels[level] = {
+                "types": {column: str(t).lower() for column, t in (rules.get("when wrong column type") or {}).items()},
+                "required": list(rules.get("when required column missing") or []),
+            }
+        return {"kind": "schema", "name": config.get("name", "Schema Check"), "levels": levels}
+
+    match = _METRIC_CHECK.match(definition)
+    if match is None:
+        raise ValueError(f"Unsupported SodaCL check for the native engine: {definition!r}")
+    columns = [c.strip() for c in (match["args"] or "").split(",") if c.strip()]
+    if match["metric"] != "row_count" and not columns:
+        raise ValueError(f"SodaCL check needs a column: {definition!r}")
+    return {
+        "kind": "metric",
+        "name": config.get("name", definition),
+        "metric": match["metric"],
+        "columns": columns,
+        "op": _OPERATORS[match["op"]],
+        "threshold": float(match["threshold"]),
+    }
+
+def compile_checks(sodacl_path: str | Path) -> list[dict]:
+    """
+    Parse a SodaCL file into compiled checks, each tagged with its dataset ("table").
+    Cached per file and re-parsed when the file's modification time changes.
+    """
+    sodacl_path = Path(sodacl_path)
+    if not sodacl_path.is_file():
+        raise FileNotFoundError(f"SodaCL file not found: {sodacl_path}")
+    mtime = sodacl_path.stat().st_mtime_ns
+    cached = _compiled.get(sodacl_path)
+    if cached is None or cached[0] != mtime:
+        checks = []
+        for header, entries in (yaml.safe_load(sodacl_path.read_text()) or {}).items():
+            if not header.startswith("checks for "):
+                raise ValueError(f"Unsupported SodaCL section for the native engine: {header!r}")
+            table = header.removeprefix("checks for ").strip()
+            for entry in entries or []:
+                checks.append({**_parse_check(entry), "table": table})
+        cached = _compiled[sodacl_path] = (mtime, checks)
+    return cached[1]
+
+def _schema_outcome(check: dict, df: pl.DataFrame) -> str:
+    actual = {name: _SODA_TYPES.get(dtype.base_type(), str(dtype).lower()) for name, dtype in df.schema.items()}
+    for level in ("fail", "warn"):
+        rules = check["levels"][level]
+        missing = [c for c in rules["required"] if c not in actual]
+        wrong_type = [c for c, expected in rules["types"].items() if actual.get(c) != expected]
+        if missing or wrong_type:
+            return level
+    return "pass"
+
+def run_native_checks(
+    df: pl.DataFrame,
+    dataset_name: str,
+    sodacl_path: str | Path,
+    full_frame: pl.DataFrame | None = None,
+) -> tuple[int, dict]:
+    """
+    Evaluate the SodaCL checks for dataset_name against df in one Polars aggregation pass.
+    With full_frame, df is only the part of full_frame that changed since a snapshot that passed
+    (see change_detection): row-level metrics (missing_count, min, max) are evaluated on df, which
+    gives the same pass/fail outcome, while frame-level metrics (row_count, duplicate_count) are
+    evaluated on full_frame.
+
+    Returns:
+        Exit code: same convention as Soda Core (0 pass, 1 warnings, 2 failures, 3 errors).
+        Scan results: {"checks": [{"name", "table", "column", "outcome", "diagnostics": {"value"}}], ...},
+        compatible with display_scan_results_in_html.
+    """
+    checks = [c for c in compile_checks(sodacl_path) if c["table"] == dataset_name]
+    metric_checks = [c for c in checks if c["kind"] == "metric"]
+
+    results = []
+    has_errors = False
+    missing_columns = {col for c in metric_checks for col in c["columns"] if col not in df.columns}
+    if missing_columns:
+        has_errors = True
+        print(f"Native checks: columns not found in {dataset_name}: {sorted(missing_columns)}")
+        metric_checks = [c for c in metric_checks if not set(c["columns"]) & missing_columns]
+    metric_values = {}
+    if full_frame is None:
+        passes = [(df, metric_checks)]
+    else:
+        passes = [
+            (df, [c for c in metric_checks if c["metric"] not in FRAME_METRICS]),
+            (full_frame, [c for c in metric_checks if c["metric"] in FRAME_METRICS]),
+        ]
+    for frame, frame_checks in passes:
+        values = frame.lazy().select(
+            _metric_expr(c["metric"], c["columns"]).alias(f"m{i}") for i, c in enumerate(frame_checks)
+        ).collect().row(0) if frame_checks else ()
+        metric_values.update((id(c), v) for c, v in zip(frame_checks, values))
+
+    for check in checks:
+        column = None
+        if check["kind"] == "schema":
+            outcome, value = _schema_outcome(check, df), None
+        elif id(check) not in metric_values:
+            continue
+        else:
+            value = metric_values[id(check)]
+            if value is None:
+                # Soda skips checks whose metric has no value (e.g. min of an empty frame)
+                continue
+            outcome = "pass" if check["op"](value, check["threshold"]) else "fail"
+            if check["metric"] != "duplicate_count" and check["columns"]:
+                column = check["columns"][0]
+        results.append({
+            "name": check["name"],
+            "table": check["table"],
+            "column": column,
+            "type": "generic",
+            "outcome": outcome,
+            "diagnostics": {"value": value},
+        })
+
+    has_failures = any(r["outcome"] == "fail" for r in results)
+    has_warnings = any(r["outcome"] == "warn" for r in results)
+    if has_errors:
+        exit_code = _EXIT_ERROR
+    elif has_failures:
+        exit_code = _EXIT_FAIL
+    elif has_warnings:
+        exit_code = _EXIT_WARN
+    else:
+        exit_code = _EXIT_PASS
+    if exit_code != 0:
+        print("--- Native checks output (failures / warnings) ---")
+        for r in results:
+            if r["outcome"] != "pass":
+                print(f"{r['outcome'].upper()}: {r['table']} - {r['name']} (value: {r['diagnostics']['value']})")
+    scan_results = {
+        "definitionName": None,
+        "defaultDataSource": "native",
+        "hasErrors": has_errors,
+        "hasWarnings": has_warnings,
+        "hasFailures": has_failures,
+        "checks": results,
+    }
+    return exit_code, scan_results
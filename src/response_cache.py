@@ -0,0 +1,123 @@
+"""
+On-disk cache for CityBikes API responses.
+Stores the raw payload per network with its ETag / Last-Modified validators so later fetches
+can send conditional requests, and evicts least-recently-used networks beyond a size budget.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of network payloads.
+    Layout: <cache_dir>/index.json holds per-network metadata, <cache_dir>/<sha1>.json holds each payload.
+
+    Args:
+        cache_dir: directory for the index and payload files (created if missing).
+        ttl: seconds a stored payload is served without contacting the API.
+        max_bytes: total payload size kept on disk before evicting least-recently-used networks.
+        max_entries: optional cap on the number of cached networks.
+    """
+
+    def __init__(self, cache_dir: str | Path, ttl: float = 60, max_bytes: int = 50_000_000, max_entries: int | None = None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._index_path = self.cache_dir / "index.json"
+        self._lock = threading.Lock()
+        self._index = self._read_index()
+
+    def _read_index(self) -> dict[str, dict]:
+        try:
+            return json.loads(self._index_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_index(self) -> None:
+        tmp_path = self._index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._index))
+        os.replace(tmp_path, self._index_path)
+
+    def _payload_path(self, network_id: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(network_id.encode()).hexdigest()}.json"
+
+    def is_fresh(self, network_id: str) -> bool:
+        """True if the network was fetched or revalidated less than ttl seconds ago."""
+        entry = self._index.get(network_id)
+        return entry is not None and time.time() - entry["fetched_at"] < self.ttl
+
+    def is_processed(self, network_id: str) -> bool:
+        """True if the cached payload already went through the whole pipeline (see mark_processed)."""
+        entry = self._index.get(network_id)
+        return entry is not None and entry.get("processed", False)
+
+    def conditional_headers(self, network_id: str) -> dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for the cached payload (empty if not cached)."""
+        entry = self._index.get(network_id)
+        if entry is None or not self._payload_path(network_id).is_file():
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def load(self, network_id: str) -> bytes:
+        """Return the cached payload and mark the network as recently used."""
+        payload = self._payload_path(network_id).read_bytes()
+        with self._lock:
+            self._index[network_id]["accessed_at"] = time.time()
+            self._write_index()
+        return payload
+
+    def store(self, network_id: str, payload: bytes, etag: str | None = None, last_modified: str | None = None) -> None:
+        """Save a freshly downloaded payload with its validators, then evict down to the size budget."""
+        path = self._payload_path(network_id)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, path)
+        now = time.time()
+        with self._lock:
+            self._index[network_id] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": now,
+                "accessed_at": now,
+                "size": len(payload),
+                "processed": False,
+            }
+            self._evict(keep=network_id)
+            self._write_index()
+
+    def revalidate(self, network_id: str) -> None:
+        """Record a 304 Not Modified: the cached payload is current again for another ttl."""
+        with self._lock:
+            self._index[network_id]["fetched_at"] = time.time()
+            self._write_index()
+
+    def mark_processed(self, network_id: str) -> None:
+        """Record that the cached payload was validated, transformed and loaded successfully."""
+        with self._lock:
+            if network_id in self._index:
+                self._index[network_id]["processed"] = True
+                self._write_index()
+
+    def _evict(self, keep: str) -> None:
+        """Drop least-recently-used networks (never `keep`) until within max_bytes / max_entries."""
+        by_age = sorted(self._index, key=lambda network_id: self._index[network_id]["accessed_at"])
+        total = sum(entry["size"] for entry in self._index.values())
+        for network_id in by_age:
+            over_size = total > self.max_bytes
+            over_count = self.max_entries is not None and len(self._index) > self.max_entries
+            if not (over_size or over_count):
+                break
+            if network_id == keep:
+                continue
+            total -= self._index.pop(network_id)["size"]
+            self._payload_path(network_id).unlink(missing_ok=True)
@@ -0,0 +1,238 @@
+"""
+Multi-network runner: fetches many CityBikes networks concurrently, fans the CPU-bound stages
+(schema validation, quality checks, transform) out across a process pool and loads every network
+that passed in one batched load.
+The circuit breaker is applied per network: a network that fails its checks is reported and left
+out of the load instead of halting the whole run.
+"""
+import contextlib
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import polars as pl
+import yaml
+from src.archive import archive_snapshot, iter_snapshots, snapshot_time
+from src.ingest import fetch_networks
+from src.load import load_data_bulk, load_data_history, load_data_incremental, load_data_into_database
+from src.schema_validator import run_schema_checks
+from src.soda_runner import monitor_raw_data, monitor_transformed_data
+from src.transform import transform
+from validation.citybikes_schema import build_citybike_schema
+
+NETWORK_BOUNDS_PATH = Path(__file__).resolve().parent.parent / "validation" / "network_bounds.yml"
+# Half-width (degrees) of the box around the network location for networks without configured bounds
+DEFAULT_BOUNDS_MARGIN = 0.5
+
+_LOADERS = {
+    "replace": load_data_into_database,
+    "upsert": load_data_incremental,
+    "copy": load_data_bulk,
+    "history": load_data_history,
+}
+
+def load_network_bounds(path: str | Path = NETWORK_BOUNDS_PATH) -> dict[str, dict[str, list[float]]]:
+    """Read {network_id: {"latitude": [min, max], "longitude": [min, max]}} (empty if the file is missing)."""
+    path = Path(path)
+    if not path.is_file():
+        return {}
+    return yaml.safe_load(path.read_text()) or {}
+
+def network_bounds(
+    configured: dict | None = None,
+    location: tuple[float, float] | None = None,
+    margin: float = DEFAULT_BOUNDS_MARGIN,
+) -> tuple[float, float, float, float] | None:
+    """
+    (lat_min, lat_max, lon_min, lon_max) for a network: the configured box if given, otherwise the
+    network's location from the API payload (network.location) +- margin, widened to whole tenths
+    of a degree so the bounds (and the schema built from them) stay stable between runs.
+    None when there is neither: the bounds never come from the stations under test, since a box
+    around shifted or swapped coordinates would let them pass.
+    """
+    if configured:
+        return (*configured["latitude"], *configured["longitude"])
+    if location is None:
+        return None
+    lat, lon = location
+    return (
+        math.floor((lat - margin) * 10) / 10,
+        math.ceil((lat + margin) * 10) / 10,
+        math.floor((lon - margin) * 10) / 10,
+        math.ceil((lon + margin) * 10) / 10,
+    )
+
+def process_network(
+    network_id: str,
+    df: pl.DataFrame,
+    bounds: dict | None = None,
+    checks_engine: str | None = None,
+    schema_engine: str = "pandera",
+    lazy_transform: bool = False,
+    location: tuple[float, float] | None = None,
+) -> dict:
+    """
+    Validate, check and transform one network's stations (runs in a worker process).
+    The coordinates are checked against the configured bounds, or a box around the network location
+    (see network_bounds); a network with neither fails.
+    A circuit-breaker halt (SystemExit) or an unexpected error only fails this network.
+
+    Returns:
+        {"network_id", "status": "ok" | "failed" | "error", "rows_in", "rows_out", "seconds", "error", "data"}
+        where data is the transformed frame tagged with network_id (None unless status is "ok").
+    """
+    start = time.perf_counter()
+    result = {"network_id": network_id, "status": "ok", "rows_in": df.height, "rows_out": 0, "error": None, "data": None}
+    try:
+        box = network_bounds(bounds, location)
+        if box is None:
+            raise SystemExit(f"No coordinate bounds for {network_id}: not in network_bounds.yml and the payload has no network location.")
+        schema = build_citybike_schema(*box)
+        run_schema_checks(df, engine=schema_engine, schema=schema)
+        if checks_engine:
+            rc = monitor_raw_data(df, engine=checks_engine)
+            if rc != 0:
+                raise SystemExit(f"Soda raw-data checks failed (exit code {rc}).")
+        transformed = transform(df, lazy=lazy_transform)
+        if checks_engine:
+            rc = monitor_transformed_data(transformed, engine=checks_engine)
+            if rc != 0:
+                raise SystemExit(f"Soda transformed-data checks failed (exit code {rc}).")
+        result["data"] = transformed.with_columns(pl.lit(network_id).alias("network_id"))
+        result["rows_out"] = transformed.height
+    except SystemExit as e:
+        result["status"], result["error"] = "failed", str(e)
+    except Exception as e:
+        result["status"], result["error"] = "error", f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def make_process_pool(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """Worker pool for run_networks (default: one process per CPU)."""
+    # spawn: forking a process that already runs Polars/DuckDB threads can deadlock
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+def run_networks(
+    network_ids: list[str],
+    max_workers: int | None = None,
+    checks_engine: str | None = None,
+    schema_engine: str = "pandera",
+    lazy_transform: bool = False,
+    database_url: str | None = None,
+    load_mode: str = "replace",
+    bounds_path: str | Path = NETWORK_BOUNDS_PATH,
+    archive_dir: str | Path | None = None,
+    pool: ProcessPoolExecutor | None = None,
+    **fetch_kwargs,
+) -> dict:
+    """
+    Run the clean pipeline for every network in network_ids.
+    Networks are fetched concurrently in this process (see fetch_networks; fetch_kwargs are passed on),
+    then processed in a pool of max_workers processes (default: one per CPU), or in pool if given: a
+    long-running caller (--daemon) passes one from make_process_pool so the spawned workers and their
+    imports are reused between runs instead of started per run; it stays open. All networks that passed
+    are loaded together with one call of the load_mode loader; the table gets a network_id column, and
+    the replace, upsert and copy loaders only replace the rows of those networks (failed ones keep their last load).
+    With archive_dir, every fetched network is archived in the raw layer and every passing one in the
+    transformed layer (see src.archive), all under the same snapshot timestamp.
+
+    Returns:
+        Summary: {"networks", "ok", "failed", "rows_loaded", "results": {network_id: {"status", "rows_in", "rows_out", "seconds", "error"}}}
+    """
+    network_ids = list(dict.fromkeys(network_ids))
+    configured_bounds = load_network_bounds(bounds_path)
+    stations, fetch_report = fetch_networks(network_ids, **fetch_kwargs)
+    snapshot_ts = snapshot_time()
+    results = {
+        network_id: {"status": "error", "rows_in": 0, "rows_out": 0, "seconds": report["seconds"], "error": report["error"]}
+        for network_id, report in fetch_report.items()
+        if report["status"] != "ok"
+    }
+
+    frames = {
+        network_id: part.drop("network_id")
+        for (network_id,), part in stations.partition_by("network_id", as_dict=True, maintain_order=True).items()
+    }
+    if archive_dir is not None:
+        for network_id, df in frames.items():
+            archive_snapshot(df, archive_dir, "raw", network_id, snapshot_ts)
+    transformed = []
+    with contextlib.nullcontext(pool) if pool is not None else make_process_pool(max_workers) as pool:
+        futures = [
+            pool.submit(
+                process_network, network_id, df, configured_bounds.get(network_id),
+                checks_engine, schema_engine, lazy_transform, fetch_report[network_id].get("location"),
+            )
+            for network_id, df in frames.items()
+        ]
+        for future in futures:
+            result = future.result()
+            data = result.pop("data")
+            network_id = result.pop("network_id")
+            results[network_id] = result
+            if data is not None:
+                transformed.append(data)
+                if archive_dir is not None:
+                    archive_snapshot(data, archive_dir, "transformed", network_id, snapshot_ts)
+            else:
+                print(f"Network {network_id} {result['status']}: {result['error']}")
+
+    rows_loaded = 0
+    if transformed and database_url:
+        combined = pl.concat(transformed, how="vertical_relaxed")
+        if load_mode == "history":
+            combined = combined.with_columns(pl.lit(snapshot_ts).alias("snapshot_ts"))
+        _LOADERS[load_mode](combined, database_url)
+        rows_loaded = combined.height
+
+    summary = {
+        "networks": len(network_ids),
+        "ok": sum(r["status"] == "ok" for r in results.values()),
+        "failed": sum(r["status"] != "ok" for r in results.values()),
+        "rows_loaded": rows_loaded,
+        "results": {network_id: results[network_id] for network_id in network_ids},
+    }
+    print(
+        f"Runner finished: {summary['ok']}/{summary['networks']} networks passed, "
+        f"{summary['failed']} failed, {summary['rows_loaded']} rows loaded."
+    )
+    return summary
+
+def replay_network(
+    archive_dir: str | Path,
+    network_id: str = "blue-bikes",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    checks_engine: str | None = None,
+    schema_engine: str = "pandera",
+    lazy_transform: bool = False,
+    bounds_path: str | Path = NETWORK_BOUNDS_PATH,
+) -> dict:
+    """
+    Re-run validation, checks and transform on every archived raw snapshot of network_id in [start, end),
+    in time order, instead of fetching from the API. Nothing is loaded or archived; a snapshot that
+    fails only fails itself, so new checks can be backtested over the whole history.
+    The archive holds only the stations, so networks need configured bounds (network_bounds.yml).
+
+    Returns:
+        Summary: {"network_id", "snapshots", "ok", "failed", "results": [{"snapshot_ts", "status", "rows_in", "rows_out", "seconds", "error"}]}
+    """
+    bounds = load_network_bounds(bounds_path).get(network_id)
+    results = []
+    for snapshot_ts, df in iter_snapshots(archive_dir, "raw", network_id, start, end):
+        result = process_network(network_id, df, bounds, checks_engine, schema_engine, lazy_transform)
+        del result["data"], result["network_id"]
+        if result["status"] != "ok":
+            print(f"Snapshot {snapshot_ts.isoformat()} of {network_id} {result['status']}: {result['error']}")
+        results.append({"snapshot_ts": snapshot_ts.isoformat(), **result})
+    summary = {
+        "network_id": network_id,
+        "snapshots": len(results),
+        "ok": sum(r["status"] == "ok" for r in results),
+        "failed": sum(r["status"] != "ok" for r in results),
+        "results": results,
+    }
+    print(f"Replay of {network_id}: {summary['ok']}/{summary['snapshots']} snapshots passed, {summary['failed']} failed.")
+    return summary
@@ -0,0 +1,94 @@
+"""
+Fixed-interval scheduler for running the pipeline as a long-lived (daemon) process.
+Cycles start on a drift-free grid (start + k * interval); a cycle that overruns skips the ticks it
+missed instead of queueing them, and SIGTERM/SIGINT stop the loop after the current cycle.
+"""
+import signal
+import threading
+import time
+from typing import Callable
+
+class Scheduler:
+    """
+    Run cycle() every interval seconds until stop() is called or a SIGTERM/SIGINT arrives.
+    A cycle that raises (including a circuit-breaker SystemExit) is reported and the next cycle still runs.
+
+    Args:
+        cycle: the work to run each tick.
+        interval: seconds between cycle starts.
+        max_cycles: optional number of cycles after which the scheduler returns (None runs until stopped).
+        clock / sleep: monotonic clock and interruptible wait(timeout) -> stopped, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        cycle: Callable[[], None],
+        interval: float,
+        max_cycles: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], bool] | None = None,
+    ):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.cycle = cycle
+        self.interval = interval
+        self.max_cycles = max_cycles
+        self._clock = clock
+        self._stop = threading.Event()
+        self._sleep = sleep or self._stop.wait
+        self.stats = {"cycles": 0, "failed": 0, "skipped": 0}
+
+    def stop(self, *_) -> None:
+        """Ask the loop to exit once the running cycle (if any) finishes; usable as a signal handler."""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def run(self) -> dict:
+        """
+        Run cycles until stopped; returns {"cycles", "failed", "skipped"} where skipped counts the
+        ticks dropped because a cycle was still running when they were due.
+        Signal handlers are only installed when called from the main thread.
+        """
+        previous = {}
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                previous[sig] = signal.signal(sig, self.stop)
+        try:
+            start = self._clock()
+            tick = 0
+            while not self.stopped:
+                self._run_cycle(tick)
+                if self.stopped or (self.max_cycles is not None and self.stats["cycles"] >= self.max_cycles):
+                    break
+                # Next slot on the grid after now; slots that passed during the cycle are skipped
+                elapsed_ticks = int((self._clock() - start) // self.interval)
+                next_tick = max(tick + 1, elapsed_ticks + 1)
+                self.stats["skipped"] += next_tick - tick - 1
+                if next_tick - tick > 1:
+                    print(f"Cycle {tick} overran the {self.interval:g}s interval; skipping {next_tick - tick - 1} tick(s).")
+                tick = next_tick
+                delay = start + tick * self.interval - self._clock()
+                if delay > 0 and self._sleep(delay):
+                    break
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+        print(
+            f"Scheduler stopped after {self.stats['cycles']} cycle(s) "
+            f"({self.stats['failed']} failed, {self.stats['skipped']} skipped)."
+        )
+        return dict(self.stats)
+
+    def _run_cycle(self, tick: int) -> None:
+        started = self._clock()
+        try:
+            self.cycle()
+        except (Exception, SystemExit) as e:
+            self.stats["failed"] += 1
+            print(f"Cycle {tick} failed: {type(e).__name__}: {e}")
+        finally:
+            self.stats["cycles"] += 1
+        print(f"Cycle {tick} finished in {self._clock() - started:.2f}s.")
@@ -2,14 +2,172 @@
 Pipeline breaker logic: halts the pipeline when data fails the expected schema.
 """
 import polars as pl
+import pandera.polars as pa
 from pandera.errors import SchemaErrors
 from validation.citybikes_schema import CityBikeSchema
 
-def run_schema_checks(df: pl.DataFrame) -> None:
-    """Validate df against CityBikeSchema; exit on failure."""
+# Pandera built-in checks the compiled validator understands, as Polars predicates over a column
+_CHECK_PREDICATES = {
+    "greater_than_or_equal_to": lambda col, s: col >= s["min_value"],
+    "greater_than": lambda col, s: col > s["min_value"],
+    "less_than_or_equal_to": lambda col, s: col <= s["max_value"],
+    "less_than": lambda col, s: col < s["max_value"],
+    "equal_to": lambda col, s: col == s["value"],
+    "not_equal_to": lambda col, s: col != s["value"],
+    "in_range": lambda col, s: (
+        (col >= s["min_value"] if s.get("include_min", True) else col > s["min_value"])
+        & (col <= s["max_value"] if s.get("include_max", True) else col < s["max_value"])
+    ),
+    "isin": lambda col, s: col.is_in(list(s["allowed_values"])),
+    "notin": lambda col, s: ~col.is_in(list(s["forbidden_values"])),
+}
+
+_FAILURE_CASES_SCHEMA = {
+    "failure_case": pl.String,
+    "schema_context": pl.String,
+    "column": pl.String,
+    "check": pl.String,
+    "check_number": pl.Int32,
+    "index": pl.Int32,
+}
+
+class CompiledSchema:
+    """
+    A Pandera schema compiled once into Polars expressions.
+    validate() checks presence, dtypes, nullability and every column check in one vectorized pass
+    that only counts violations; failure cases (same table format as Pandera's) are built only for
+    the checks that failed. Raises ValueError at compile time for checks it cannot translate.
+    """
+
+    def __init__(self, schema: pa.DataFrameSchema | type[pa.DataFrameModel]):
+        if isinstance(schema, type):
+            schema = schema.to_schema()
+        self.name = schema.name
+        self.columns = []
+        for name, column in schema.columns.items():
+            checks = []
+            for check in column.checks:
+                predicate = _CHECK_PREDICATES.get(check.name)
+                if predicate is None:
+                    raise ValueError(f"Check {check.error or check.name!r} on column {name!r} cannot be compiled")
+                checks.append((check.error or check.name, predicate(pl.col(name), check.statistics)))
+            self.columns.append({
+                "name": name,
+                "dtype": column.dtype.type if column.dtype is not None else None,
+                "dtype_label": str(column.dtype) if column.dtype is not None else None,
+                "nullable": column.nullable,
+                "checks": checks,
+            })
+
+    def validate(self, df: pl.DataFrame) -> pl.DataFrame | None:
+        """Return None if df is valid, otherwise the failure cases (failure_case, schema_context, column, check, check_number, index)."""
+        present = [c for c in self.columns if c["name"] in df.columns]
+        counts = {}
+        exprs = []
+        for column in present:
+            name = column["name"]
+            if not column["nullable"]:
+                exprs.append(_is_null(df, name).sum().alias(f"{name}|not_nullable"))
+            if df.schema[name].is_numeric() or df.schema[name] == column["dtype"]:
+                for number, (_, predicate) in enumerate(column["checks"]):
+                    exprs.append((~predicate).sum().alias(f"{name}|{number}"))
+        if exprs:
+            counts = df.select(exprs).row(0, named=True)
+
+        dtype_failures = [c for c in present if c["dtype"] is not None and df.schema[c["name"]] != c["dtype"]]
+        missing = [c for c in self.columns if c["name"] not in df.columns]
+        if not missing and not dtype_failures and not any(counts.values()):
+            return None
+
+        indexed = df.with_row_index("index")
+        frames = [
+            pl.DataFrame({
+                "failure_case": [c["name"] for c in missing],
+                "schema_context": "DataFrameSchema",
+                "column": self.name,
+                "check": "column_in_dataframe",
+            })
+        ]
+        for column in present:
+            name = column["name"]
+            if counts.get(f"{name}|not_nullable"):
+                frames.append(self._cases(indexed, name, _is_null(df, name), "not_nullable", None))
+            if column in dtype_failures:
+                frames.append(pl.DataFrame({
+                    "failure_case": [str(df.schema[name])],
+                    "schema_context": "Column",
+                    "column": name,
+                    "check": f"dtype('{column['dtype_label']}')",
+                }))
+            for number, (label, predicate) in enumerate(column["checks"]):
+                key = f"{name}|{number}"
+                if key not in counts:
+                    # Not comparable (e.g. string column under a numeric check): report the error like Pandera
+                    try:
+                        indexed.select(predicate)
+                    except Exception as e:
+                        frames.append(pl.DataFrame({
+                            "failure_case": [repr(e)],
+                            "schema_context": "Column",
+                            "column": name,
+                            "check": label,
+                            "check_number": [number],
+                        }))
+                elif counts[key]:
+                    frames.append(self._cases(indexed, name, ~predicate, label, number))
+        return pl.concat([_as_failure_cases(f) for f in frames], how="vertical")
+
+    @staticmethod
+    def _cases(indexed: pl.DataFrame, name: str, failed: pl.Expr, check: str, check_number: int | None) -> pl.DataFrame:
+        return indexed.filter(failed).select(
+            pl.col(name).cast(pl.String).alias("failure_case"),
+            pl.lit("Column").alias("schema_context"),
+            pl.lit(name).alias("column"),
+            pl.lit(check).alias("check"),
+            pl.lit(check_number, dtype=pl.Int32).alias("check_number"),
+            pl.col("index"),
+        )
+
+def _is_null(df: pl.DataFrame, name: str) -> pl.Expr:
+    """Null mask of a column; NaN counts as null in float columns, as in Pandera's nullable check."""
+    if df.schema[name].is_float():
+        return pl.col(name).is_null() | pl.col(name).is_nan()
+    return pl.col(name).is_null()
+
+def _as_failure_cases(df: pl.DataFrame) -> pl.DataFrame:
+    """Add the missing failure-case columns as nulls, in Pandera's column order and dtypes."""
+    return df.with_columns(
+        pl.lit(None).alias(c) for c in _FAILURE_CASES_SCHEMA if c not in df.columns
+    ).select(list(_FAILURE_CASES_SCHEMA)).cast(_FAILURE_CASES_SCHEMA)
+
+_compiled_schemas: dict[int, tuple[object, CompiledSchema]] = {}
+
+def get_compiled_schema(schema=CityBikeSchema) -> CompiledSchema:
+    """Return the CompiledSchema for a Pandera schema or model, compiling it on first use."""
+    cached = _compiled_schemas.get(id(schema))
+    if cached is None or cached[0] is not schema:
+        cached = _compiled_schemas[id(schema)] = (schema, CompiledSchema(schema))
+    return cached[1]
+
+def run_schema_checks(df: pl.DataFrame, engine: str = "pandera", schema=CityBikeSchema) -> None:
+    """
+    Validate df against CityBikeSchema (or the given Pandera schema); exit on failure.
+    engine='compiled' runs the schema compiled into Polars expressions (see CompiledSchema)
+    instead of Pandera's per-run validation; failures are reported the same way.
+    """
+    print("Validating Data Quality...")
+    if engine == "compiled":
+        failure_cases = get_compiled_schema(schema).validate(df)
+        if failure_cases is None:
+            print("Quality Check Passed.")
+            return
+        print("Error in Data Quality Check!")
+        print(failure_cases[["column", "check", "failure_case"]])
+        raise SystemExit("Pipeline Halted: Data Integrity Violation.")
+    if engine != "pandera":
+        raise ValueError(f"Invalid schema engine: {engine}")
     try:
-        print("Validating Data Quality...")
-        CityBikeSchema.validate(df, lazy=True)
+        schema.validate(df, lazy=True)
         print("Quality Check Passed.")
     except SchemaErrors as err:
         print("Error in Data Quality Check!")
@@ -1,14 +1,12 @@
 """
 Run Soda Core checks on CityBikes data (raw and/or transformed).
 Uses DuckDB to register in-memory DataFrames.
+Soda, DuckDB and Jinja2 are imported on first use, so the native engine never loads them.
 """
-import duckdb
-import pandas as pd
 import polars as pl
 import sys
 from pathlib import Path
-from jinja2 import Template
-from soda.scan import Scan
+from src.native_checks import run_native_checks
 
 # Ensure project root is on path so other modules can be imported
 _root = Path(__file__).resolve().parent.parent
@@ -17,17 +15,98 @@ if str(_root) not in sys.path:
 
 VALIDATION_DIR = _root / "validation"
 REPORT_DIR = _root / "reports"
+# Private Scan attribute holding the parsed SodaCL (see SodaScanner)
+_SODACL_CFG = "_sodacl_cfg"
 
-def _pandas_for_duckdb(df: pl.DataFrame) -> pd.DataFrame:
-    """Convert Polars to Pandas with dtypes DuckDB accepts (object for strings, int32 for ints)."""
-    pdf = df.to_pandas()
-    # DuckDB can fail on Pandas StringDtype; use object for string columns
-    for col in pdf.select_dtypes(include=["string"]).columns:
-        pdf[col] = pdf[col].astype(object)
+def _register_arrow_view(con: "duckdb.DuckDBPyConnection", dataset_name: str, df: pl.DataFrame) -> None:
+    """
+    Register a Polars DataFrame with DuckDB through Arrow (no copy) and expose it as a view
+    named dataset_name with the column types the SodaCL schema checks expect.
+    """
+    arrow_name = f"{dataset_name}__arrow"
+    con.register(arrow_name, df.to_arrow())
     # Use INTEGER (int32) instead of BIGINT (int64) for numeric columns
-    for col in pdf.select_dtypes(include=["int64"]).columns:
-        pdf[col] = pdf[col].astype("int32")
-    return pdf
+    columns = ", ".join(
+        f'CAST("{name}" AS INTEGER) AS "{name}"' if dtype == pl.Int64 else f'"{name}"'
+        for name, dtype in df.schema.items()
+    )
+    con.execute(f'CREATE OR REPLACE VIEW "{dataset_name}" AS SELECT {columns} FROM "{arrow_name}"')
+
+class SodaScanner:
+    """
+    Reusable Soda scanner for long-running processes.
+    Holds one in-memory DuckDB connection for every scan and caches each SodaCL file's parsed
+    configuration, re-parsing a file only when its modification time changes.
+    The cache reuses Soda Core's private Scan._sodacl_cfg (soda-core 3.5); with a Soda version that
+    does not have it, every scan parses its file with add_sodacl_yaml_file instead.
+    """
+
+    def __init__(self, data_source_name: str = "duckdb"):
+        import duckdb
+
+        self.data_source_name = data_source_name
+        self._con = duckdb.connect(":memory:")
+        self._sodacl_cache: dict[Path, tuple[int, object]] = {}
+
+    def _parsed_sodacl(self, sodacl_path: Path):
+        """Return the cached parsed SodaCL for the file, or None if it does not parse cleanly (or cannot be cached)."""
+        mtime = sodacl_path.stat().st_mtime_ns
+        cached = self._sodacl_cache.get(sodacl_path)
+        if cached is None or cached[0] != mtime:
+            from soda.scan import Scan
+
+            parse_scan = Scan()
+            parse_scan.set_data_source_name(self.data_source_name)
+            parse_scan.add_sodacl_yaml_file(str(sodacl_path))
+            if parse_scan.has_error_logs() or not hasattr(parse_scan, _SODACL_CFG):
+                return None
+            cached = self._sodacl_cache[sodacl_path] = (mtime, getattr(parse_scan, _SODACL_CFG))
+        return cached[1]
+
+    def scan(self, df: pl.DataFrame, dataset_name: str, sodacl_path: str | Path) -> tuple[int, dict]:
+        """Run the SodaCL checks in sodacl_path against df (see run_soda_scan for the return values)."""
+        sodacl_path = Path(sodacl_path)
+        if not sodacl_path.is_file():
+            raise FileNotFoundError(f"SodaCL file not found: {sodacl_path}")
+
+        from soda.scan import Scan
+
+        _register_arrow_view(self._con, dataset_name, df)
+        try:
+            scan = Scan()
+            scan.add_duckdb_connection(self._con)
+            scan.set_data_source_name(self.data_source_name)
+            sodacl_cfg = self._parsed_sodacl(sodacl_path) if hasattr(scan, _SODACL_CFG) else None
+            if sodacl_cfg is not None:
+                setattr(scan, _SODACL_CFG, sodacl_cfg)
+            else:
+                # Parse errors (or no cacheable parse): add the file the usual way, so errors are reported in the scan results
+                scan.add_sodacl_yaml_file(str(sodacl_path))
+            exit_code = scan.execute()
+            if exit_code != 0:
+                logs = getattr(scan, "get_logs_text", None)
+                if callable(logs):
+                    print("--- Soda Core scan output (failures / errors) ---")
+                    print(logs())
+                else:
+                    print("Soda scan failed (exit code %s). Enable verbose logging for details." % exit_code)
+            scan_results = scan.get_scan_results()
+        finally:
+            self._con.execute(f'DROP VIEW IF EXISTS "{dataset_name}"')
+            self._con.unregister(f"{dataset_name}__arrow")
+        return exit_code, scan_results
+
+    def close(self) -> None:
+        self._con.close()
+
+_scanners: dict[str, SodaScanner] = {}
+
+def get_scanner(data_source_name: str = "duckdb") -> SodaScanner:
+    """Return the process-wide scanner for data_source_name, creating it on first use."""
+    scanner = _scanners.get(data_source_name)
+    if scanner is None:
+        scanner = _scanners[data_source_name] = SodaScanner(data_source_name)
+    return scanner
 
 def run_soda_scan(
     df: pl.DataFrame,
@@ -37,32 +116,14 @@ def run_soda_scan(
 ) -> int:
     """
     Run SodaCL checks from a YAML file against a Polars DataFrame.
-    Registers the DataFrame in DuckDB and runs the scan.
+    Registers the DataFrame in DuckDB via Arrow and runs the scan on the shared scanner
+    (one DuckDB connection and parsed SodaCL cache per process).
 
     Returns:
         Exit code: 0 if all checks pass, non-zero if any fail.
         Scan results: dictionary containing the results of the scan.
     """
-    sodacl_path = Path(sodacl_path)
-    if not sodacl_path.is_file():
-        raise FileNotFoundError(f"SodaCL file not found: {sodacl_path}")
-
-    with duckdb.connect(":memory:") as con:
-        con.register(dataset_name, _pandas_for_duckdb(df))
-        scan = Scan()
-        scan.add_duckdb_connection(con)
-        scan.set_data_source_name(data_source_name)
-        scan.add_sodacl_yaml_file(str(sodacl_path))
-        exit_code = scan.execute()
-        if exit_code != 0:
-            logs = getattr(scan, "get_logs_text", None)
-            if callable(logs):
-                print("--- Soda Core scan output (failures / errors) ---")
-                print(logs())
-            else:
-                print("Soda scan failed (exit code %s). Enable verbose logging for details." % exit_code)
-        scan_results = scan.get_scan_results()
-    return exit_code, scan_results
+    return get_scanner(data_source_name).scan(df, dataset_name, sodacl_path)
 
 def display_scan_results_in_html(scan_results: dict, dataset_name: str) -> None:
     """Display Soda Core scan results in HTML.
@@ -72,6 +133,8 @@ def display_scan_results_in_html(scan_results: dict, dataset_name: str) -> None:
     Returns:
         None
     """
+    from jinja2 import Template
+
     check_results = scan_results.get("checks", [])
 
     # Create HTML Template
@@ -104,12 +167,31 @@ def display_scan_results_in_html(scan_results: dict, dataset_name: str) -> None:
     with open(REPORT_DIR / f"soda_report_{dataset_name}.html", "w") as f:
         f.write(html_content)
 
-def monitor_raw_data(df: pl.DataFrame) -> int:
+def run_checks(
+    df: pl.DataFrame,
+    dataset_name: str,
+    sodacl_path: str | Path,
+    engine: str = "soda",
+    full_frame: pl.DataFrame | None = None,
+) -> tuple[int, dict]:
+    """
+    Run the SodaCL checks with the chosen engine: 'soda' (Soda Core on DuckDB) or 'native' (Polars, see native_checks).
+    full_frame: when df holds only the changed rows of full_frame (see run_native_checks). Soda scans cannot split
+    row- and frame-level checks, so the soda engine scans full_frame instead.
+    """
+    if engine == "native":
+        return run_native_checks(df, dataset_name, sodacl_path, full_frame=full_frame)
+    if engine == "soda":
+        return run_soda_scan(df if full_frame is None else full_frame, dataset_name, sodacl_path)
+    raise ValueError(f"Invalid checks engine: {engine}")
+
+def monitor_raw_data(df: pl.DataFrame, engine: str = "soda") -> int:
     """Run Soda checks for raw (post-ingest) CityBikes data."""
-    exit_code, scan_results = run_soda_scan(
+    exit_code, scan_results = run_checks(
         df=df,
         dataset_name="citybikes_raw",
         sodacl_path=VALIDATION_DIR / "soda_checks_raw.yml",
+        engine=engine,
     )
 
     display_scan_results_in_html(scan_results, "raw")
@@ -117,12 +199,17 @@ def monitor_raw_data(df: pl.DataFrame) -> int:
 
     return exit_code
 
-def monitor_transformed_data(df: pl.DataFrame) -> int:
-    """Run Soda checks for transformed CityBikes data (post-transform)."""
-    exit_code, scan_results = run_soda_scan(
+def monitor_transformed_data(df: pl.DataFrame, engine: str = "soda", full_frame: pl.DataFrame | None = None) -> int:
+    """
+    Run Soda checks for transformed CityBikes data (post-transform).
+    Pass the whole snapshot as full_frame when df holds only its changed stations (see run_checks).
+    """
+    exit_code, scan_results = run_checks(
         df=df,
         dataset_name="citybikes_transformed",
         sodacl_path=VALIDATION_DIR / "soda_checks_transformed.yml",
+        engine=engine,
+        full_frame=full_frame,
     )
 
     display_scan_results_in_html(scan_results, "transformed")
@@ -0,0 +1,190 @@
+"""
+Spatial index over station coordinates for proximity queries and coordinate-based dedup.
+Stations are bucketed into a uniform latitude/longitude grid whose cells are at least cell_size_m
+wide, and the cells are kept sorted by a single Int64 key, so a radius or k-nearest query only
+binary-searches the few cells around the point, and all pairs within a distance come from one
+join per neighbouring cell offset instead of comparing every station with every other (O(n²)).
+Distances are great-circle (haversine) metres.
+"""
+import math
+import polars as pl
+
+EARTH_RADIUS_M = 6_371_008.8
+_METERS_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180
+# Cell key = cx * 2**32 + (cy + 2**31): sorting by key sorts by (cx, cy), one key range per grid column
+_CELL_SHIFT = 2**32
+_CELL_OFFSET = 2**31
+
+def haversine_m(lat1: pl.Expr | float, lon1: pl.Expr | float, lat2: pl.Expr | float, lon2: pl.Expr | float) -> pl.Expr:
+    """Great-circle distance in metres between two coordinates given as expressions or floats (degrees)."""
+    lat1, lon1, lat2, lon2 = (x if isinstance(x, pl.Expr) else pl.lit(float(x)) for x in (lat1, lon1, lat2, lon2))
+    a = (
+        ((lat2 - lat1).radians() / 2).sin().pow(2)
+        + lat1.radians().cos() * lat2.radians().cos() * ((lon2 - lon1).radians() / 2).sin().pow(2)
+    )
+    return 2 * EARTH_RADIUS_M * a.sqrt().clip(upper_bound=1.0).arcsin()
+
+class StationIndex:
+    """
+    Grid index over the coordinates of a (transformed) station frame; rows with null coordinates are not indexed.
+    Cells are cell_size_m tall and at least cell_size_m wide at every latitude in the frame, so a
+    query of radius r only visits the ceil(r / cell_size_m) rings of cells around the point. Pick a
+    cell size near the usual query radius (very small cells make large queries visit many cells).
+    The grid does not wrap around the antimeridian.
+
+    Args:
+        df: frame to index; query results are rows of df with an extra distance_m column.
+        cell_size_m: grid cell size in metres.
+        latitude / longitude: coordinate column names.
+    """
+
+    def __init__(self, df: pl.DataFrame, cell_size_m: float = 100.0, latitude: str = "latitude", longitude: str = "longitude"):
+        if cell_size_m <= 0:
+            raise ValueError("cell_size_m must be positive")
+        self.df = df
+        self.cell_size_m = cell_size_m
+        self.latitude = latitude
+        self.longitude = longitude
+        self.cell_lat = cell_size_m / _METERS_PER_DEGREE
+        # Longitude cells are sized for the highest latitude, where a degree of longitude is shortest
+        max_abs_lat = df.select(pl.col(latitude).abs().max()).item() if df.height else 0.0
+        self.cell_lon = self.cell_lat / max(math.cos(math.radians(min(max_abs_lat or 0.0, 89.9))), 1e-3)
+        cells = (
+            df.select(
+                pl.int_range(0, pl.len(), dtype=pl.UInt32).alias("_row"),
+                pl.col(latitude).cast(pl.Float64).alias("_lat"),
+                pl.col(longitude).cast(pl.Float64).alias("_lon"),
+            )
+            .drop_nulls()
+            .with_columns(
+                (pl.col("_lon") / self.cell_lon).floor().cast(pl.Int64).alias("_cx"),
+                (pl.col("_lat") / self.cell_lat).floor().cast(pl.Int64).alias("_cy"),
+            )
+        )
+        self._cells = cells.with_columns(
+            (pl.col("_cx") * _CELL_SHIFT + pl.col("_cy") + _CELL_OFFSET).alias("_key")
+        ).sort("_key")
+        self._keys = self._cells.get_column("_key")
+
+    def __len__(self) -> int:
+        return self._cells.height
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lon / self.cell_lon), math.floor(lat / self.cell_lat)
+
+    def _candidates(self, lat: float, lon: float, rings: int) -> pl.DataFrame:
+        """Indexed rows in the (2 * rings + 1)² cells around (lat, lon), with their distance_m."""
+        cx, cy = self._cell(lat, lon)
+        columns = range(cx - rings, cx + rings + 1)
+        low = pl.Series([x * _CELL_SHIFT + cy - rings + _CELL_OFFSET for x in columns], dtype=pl.Int64)
+        high = pl.Series([x * _CELL_SHIFT + cy + rings + _CELL_OFFSET for x in columns], dtype=pl.Int64)
+        starts = self._keys.search_sorted(low, side="left").to_list()
+        ends = self._keys.search_sorted(high, side="right").to_list()
+        slices = [self._cells.slice(start, end - start) for start, end in zip(starts, ends) if end > start]
+        candidates = pl.concat(slices) if slices else self._cells.clear()
+        return candidates.select("_row", haversine_m(pl.col("_lat"), pl.col("_lon"), lat, lon).alias("distance_m"))
+
+    def _rows(self, matches: pl.DataFrame) -> pl.DataFrame:
+        """Rows of df for matches' _row (in that order), with the distance_m column."""
+        return self.df[matches.get_column("_row")].with_columns(matches.get_column("distance_m"))
+
+    def within(self, latitude: float, longitude: float, radius_m: float) -> pl.DataFrame:
+        """
+        Stations within radius_m metres of (latitude, longitude).
+
+        Returns:
+            Matching rows of df with a distance_m column, nearest first.
+        """
+        rings = max(math.ceil(radius_m / self.cell_size_m), 0)
+        matches = self._candidates(latitude, longitude, rings).filter(pl.col("distance_m") <= radius_m)
+        return self._rows(matches.sort("distance_m", "_row"))
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1) -> pl.DataFrame:
+        """
+        The k stations nearest to (latitude, longitude), searching a doubling number of cell rings
+        until the k-th candidate is closer than the searched square's edge (or the whole grid is covered).
+
+        Returns:
+            Up to k rows of df with a distance_m column, nearest first.
+        """
+        if k <= 0 or not len(self):
+            return self._rows(self._cells.clear().select("_row", pl.lit(0.0).alias("distance_m")))
+        cx, cy = self._cell(latitude, longitude)
+        xs, ys = self._cells.get_column("_cx"), self._cells.get_column("_cy")
+        max_rings = max(abs(cx - xs.min()), abs(cx - xs.max()), abs(cy - ys.min()), abs(cy - ys.max()), 1)
+        rings = 1
+        while True:
+            candidates = self._candidates(latitude, longitude, rings).sort("distance_m", "_row")
+            # Every station within rings * cell_size_m of the point lies inside the searched square
+            if rings >= max_rings or (candidates.height >= k and candidates.item(k - 1, "distance_m") <= rings * self.cell_size_m):
+                return self._rows(candidates.head(k))
+            rings = min(rings * 2, max_rings)
+
+    def pairs(self, max_distance_m: float) -> pl.DataFrame:
+        """
+        All pairs of indexed stations at most max_distance_m metres apart, found with one join per
+        neighbouring cell offset.
+
+        Returns:
+            Frame with left and right (row positions in df, left < right) and distance_m.
+        """
+        rings = max(math.ceil(max_distance_m / self.cell_size_m), 0)
+        left = self._cells.select(pl.col("_row").alias("left"), pl.col("_lat").alias("_lat_left"), pl.col("_lon").alias("_lon_left"), "_key")
+        right = self._cells.select(pl.col("_row").alias("right"), "_lat", "_lon", "_key")
+        joined = []
+        for dx in range(-rings, rings + 1):
+            for dy in range(-rings, rings + 1):
+                shifted = left.with_columns(pl.col("_key") + dx * _CELL_SHIFT + dy)
+                # Each unordered pair is found once: from the lower row's cell towards the higher row's
+                joined.append(shifted.join(right, on="_key").filter(pl.col("left") < pl.col("right")))
+        return (
+            pl.concat(joined)
+            .select("left", "right", haversine_m(pl.col("_lat_left"), pl.col("_lon_left"), pl.col("_lat"), pl.col("_lon")).alias("distance_m"))
+            .filter(pl.col("distance_m") <= max_distance_m)
+            .sort("left", "right")
+        )
+
+def dedup_nearby(df: pl.DataFrame, max_distance_m: float, by: list[str] | None = None, index: StationIndex | None = None) -> pl.DataFrame:
+    """
+    Fuzzy version of df.unique(subset=[*by, "latitude", "longitude"]): rows are visited in
+    (latitude, longitude) order and a row is dropped if it lies within max_distance_m metres of a
+    row that was kept and has the same values in the by columns (default ["name"]; [] compares
+    coordinates only). A chain of close stations therefore keeps every station that is farther than
+    max_distance_m from all kept ones. Which copy survives depends only on the coordinates, not on
+    row order, so the same snapshot always dedups to the same rows (transform's order among
+    same-named rows is not stable). Row order is preserved.
+
+    Returns:
+        df without the near-duplicate rows.
+    """
+    by = ["name"] if by is None else by
+    if df.height < 2:
+        return df
+    index = index or StationIndex(df, cell_size_m=max(max_distance_m, 1e-3))
+    # rank[i] = position of row i when ordered by coordinates (row position breaks ties)
+    rank = pl.int_range(0, pl.len(), dtype=pl.UInt32).sort_by(index.latitude, index.longitude, pl.int_range(0, pl.len())).arg_sort()
+    keys = df.select(*by, rank.alias("_rank"))
+    pairs = (
+        index.pairs(max_distance_m)
+        .join(keys.with_row_index("left"), on="left")
+        .join(keys.with_row_index("right"), on="right", suffix="_right")
+        .filter(pl.all_horizontal(pl.col(c).eq(pl.col(f"{c}_right")) for c in by) if by else pl.lit(True))
+    )
+    # Each pair as (row, an earlier-ranked neighbour); only rows with such a neighbour can be dropped
+    first = pl.col("_rank") < pl.col("_rank_right")
+    candidates = (
+        pairs.select(
+            pl.when(first).then(pl.col("right")).otherwise(pl.col("left")).alias("row"),
+            pl.when(first).then(pl.col("_rank_right")).otherwise(pl.col("_rank")).alias("_rank"),
+            pl.when(first).then(pl.col("left")).otherwise(pl.col("right")).alias("earlier"),
+        )
+        .group_by("row", "_rank")
+        .agg("earlier")
+        .sort("_rank")
+    )
+    # In rank order every earlier neighbour is already decided: drop a row only next to a kept one
+    dropped = set()
+    for row, _, earlier in candidates.iter_rows():
+        if any(neighbour not in dropped for neighbour in earlier):
+            dropped.add(row)
+    return df.filter(~pl.int_range(0, pl.len(), dtype=pl.UInt32).is_in(list(dropped)))
@@ -0,0 +1,17 @@
+"""
+Station columns shared by the pipeline stages: the raw station schema and the station key.
+Polars only, so light stages (change detection, anomaly detection) can use them without importing
+the HTTP client (ingest) or SQLAlchemy (load).
+"""
+import polars as pl
+
+STATION_SCHEMA = {
+    "name": pl.String,
+    "free_bikes": pl.Int64,
+    "empty_slots": pl.Int64,
+    "latitude": pl.Float64,
+    "longitude": pl.Float64,
+}
+STATION_COLUMNS = list(STATION_SCHEMA)
+# A station is identified by its name and (rounded) coordinates
+KEY_COLUMNS = ["name", "latitude", "longitude"]
@@ -0,0 +1,179 @@
+"""
+Streaming (batched) pipeline for large station/history archives.
+Reads Parquet or NDJSON input in bounded-size batches and pushes each batch through schema checks,
+optional quality checks, transform and a staged load, so memory is bounded by the batch size plus
+one 64-bit hash per distinct station key.
+"""
+import io
+from pathlib import Path
+from typing import Iterator
+import polars as pl
+import pyarrow.parquet as pq
+from src.stations import STATION_SCHEMA
+from src.load import StagedLoad
+from src.schema_validator import run_schema_checks
+from src.soda_runner import monitor_raw_data, monitor_transformed_data
+from src.transform import clean_name, transform
+
+# Archives of several snapshots carry the snapshot time; dedup keys are scoped to it when present
+SCOPE_COLUMN = "snapshot_ts"
+DEDUP_COLUMNS = ["name", "latitude", "longitude"]
+_SUFFIXES = {".parquet", ".ndjson", ".jsonl"}
+
+def iter_batches(path: str | Path, batch_size: int = 100_000) -> Iterator[pl.DataFrame]:
+    """
+    Yield DataFrames of at most batch_size rows from a Parquet/NDJSON file, or from every such file
+    under a directory (in sorted path order).
+    """
+    path = Path(path)
+    files = sorted(p for p in path.rglob("*") if p.suffix in _SUFFIXES) if path.is_dir() else [path]
+    for file in files:
+        if file.suffix == ".parquet":
+            for record_batch in pq.ParquetFile(file).iter_batches(batch_size=batch_size):
+                yield pl.from_arrow(record_batch)
+        elif file.suffix in (".ndjson", ".jsonl"):
+            yield from _iter_ndjson_batches(file, batch_size)
+        else:
+            raise ValueError(f"Unsupported input file (expected .parquet, .ndjson or .jsonl): {file}")
+
+def _iter_ndjson_batches(path: Path, batch_size: int) -> Iterator[pl.DataFrame]:
+    lines = []
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                lines.append(line)
+            if len(lines) == batch_size:
+                yield pl.read_ndjson(io.BytesIO(b"".join(lines)), schema_overrides=STATION_SCHEMA)
+                lines = []
+    if lines:
+        yield pl.read_ndjson(io.BytesIO(b"".join(lines)), schema_overrides=STATION_SCHEMA)
+
+class KeyTracker:
+    """
+    Remembers 64-bit hashes of key values seen in earlier batches.
+    The hashes are kept as sorted runs of geometrically decreasing size (a run is merged into the
+    previous one once it is as large), so a batch is looked up with one vectorized search_sorted per
+    run, O(log n) runs, and each hash is re-sorted O(log n) times in total instead of on every batch.
+    If the scope column (snapshot_ts) is present, keys are only compared within the same scope value and
+    keys of older scopes are forgotten once a batch no longer contains them, which keeps memory bounded
+    for archives ordered by snapshot.
+    """
+
+    def __init__(self, key_columns: list[str], scope_column: str = SCOPE_COLUMN):
+        self.key_columns = key_columns
+        self.scope_column = scope_column
+        self._runs: list[pl.Series] = []
+        self._scopes: set = set()
+
+    def __len__(self) -> int:
+        return sum(run.len() for run in self._runs)
+
+    def _contains(self, hashes: pl.Series) -> pl.Series:
+        if not self._runs:
+            return pl.Series("key", [False] * hashes.len(), dtype=pl.Boolean)
+        # Sorted needles make the binary searches walk each run in order (far fewer cache misses)
+        order = hashes.arg_sort()
+        needles = hashes.gather(order)
+        found = pl.Series("key", [False] * hashes.len(), dtype=pl.Boolean)
+        for run in self._runs:
+            position = run.search_sorted(needles, side="left").clip(upper_bound=run.len() - 1)
+            found = found | (run.gather(position) == needles)
+        return found.gather(order.arg_sort())
+
+    def _add(self, hashes: pl.Series) -> None:
+        """Record hashes (unique and not seen before)."""
+        run = hashes.sort()
+        while self._runs and self._runs[-1].len() <= run.len():
+            run = pl.concat([self._runs.pop(), run]).sort()
+        if run.len():
+            self._runs.append(run)
+
+    def seen_before(self, df: pl.DataFrame, key_exprs: list[pl.Expr] | None = None) -> pl.Series:
+        """
+        Boolean mask of rows whose key appeared in an earlier call; then records this frame's keys.
+        key_exprs replace the plain key columns (e.g. to hash the cleaned name).
+        """
+        exprs = key_exprs or [pl.col(c) for c in self.key_columns]
+        if self.scope_column in df.columns:
+            exprs = exprs + [pl.col(self.scope_column)]
+        hashes = df.select(pl.struct(exprs).hash(seed=0).alias("key")).to_series()
+        if self.scope_column in df.columns:
+            scopes = set(df.get_column(self.scope_column).unique().to_list())
+            if not scopes & self._scopes:
+                # Archive moved on to new snapshots: earlier keys can no longer collide
+                self._runs = []
+            self._scopes = scopes
+        mask = self._contains(hashes)
+        self._add(hashes.filter(~mask).unique())
+        return mask
+
+def run_stream(
+    path: str | Path,
+    batch_size: int = 100_000,
+    checks_engine: str | None = None,
+    database_url: str | None = None,
+    lazy_transform: bool = True,
+    schema_engine: str = "pandera",
+) -> dict[str, int]:
+    """
+    Run the clean pipeline over path batch by batch.
+    Batches holding several snapshots (snapshot_ts column) are split per snapshot, so checks and dedup
+    apply to one snapshot at a time. Rows whose station key (cleaned name, latitude, longitude) already
+    appeared in an earlier batch are dropped before transform, matching transform's keep-first dedup
+    over the whole input. With checks enabled, transformed keys repeated across batches fail the run like
+    the duplicate_count check does within a batch; parts left empty by cross-batch dedup skip the
+    transformed checks, and the run fails if no rows come out at all (row_count over the whole stream).
+    Loading goes through a StagedLoad, so the table is only replaced once every batch passed.
+
+    Returns:
+        Summary: {"batches", "rows_in", "rows_out", "cross_batch_duplicates"}
+    """
+    raw_keys = KeyTracker(DEDUP_COLUMNS)
+    transformed_keys = KeyTracker(DEDUP_COLUMNS)
+    raw_key_exprs = [clean_name("name"), pl.col("latitude"), pl.col("longitude")]
+    summary = {"batches": 0, "rows_in": 0, "rows_out": 0, "cross_batch_duplicates": 0}
+    staged = StagedLoad(database_url) if database_url else None
+
+    try:
+        for batch in iter_batches(path, batch_size):
+            summary["batches"] += 1
+            summary["rows_in"] += batch.height
+            print(f"Batch {summary['batches']}: {batch.height} rows")
+            run_schema_checks(batch, engine=schema_engine)
+            parts = batch.partition_by(SCOPE_COLUMN, maintain_order=True) if SCOPE_COLUMN in batch.columns else [batch]
+            for part in parts:
+                if checks_engine:
+                    rc = monitor_raw_data(part, engine=checks_engine)
+                    if rc != 0:
+                        raise SystemExit(f"Soda raw-data checks failed (exit code {rc}).")
+
+                part = part.filter(~raw_keys.seen_before(part, raw_key_exprs))
+                transformed = transform(part, lazy=lazy_transform)
+                if transformed.is_empty():
+                    continue
+
+                duplicates = int(transformed_keys.seen_before(transformed).sum())
+                summary["cross_batch_duplicates"] += duplicates
+                if checks_engine:
+                    rc = monitor_transformed_data(transformed, engine=checks_engine)
+                    if rc != 0:
+                        raise SystemExit(f"Soda transformed-data checks failed (exit code {rc}).")
+                if checks_engine and duplicates:
+                    raise SystemExit(f"Duplicate stations across batches after transform ({duplicates} keys).")
+
+                if staged is not None:
+                    staged.append(transformed)
+                summary["rows_out"] += transformed.height
+        if checks_engine and summary["rows_out"] == 0:
+            raise SystemExit("Soda transformed-data checks failed: the stream produced no transformed rows.")
+        if staged is not None:
+            staged.commit()
+    except BaseException:
+        if staged is not None:
+            staged.discard()
+        raise
+    print(
+        f"Stream finished: {summary['batches']} batches, {summary['rows_in']} rows in, "
+        f"{summary['rows_out']} rows out."
+    )
+    return summary
@@ -3,18 +3,21 @@ Data cleaning with Polars -> transformation steps (e.g. dedup, normalize).
 """
 import polars as pl
 
-def transform(df: pl.DataFrame) -> pl.DataFrame:
-    """Apply cleaning/transformation steps."""
+def transform(df: pl.DataFrame, lazy: bool = False, streaming: bool = False) -> pl.DataFrame:
+    """
+    Apply cleaning/transformation steps.
+    With lazy=True the whole chain is built as one LazyFrame plan (see transform_lazy) and collected once,
+    with the streaming engine if streaming=True. Output is identical to the eager steps below.
+    """
     print("Transforming the data...")
 
+    if lazy:
+        df = transform_lazy(df.lazy()).collect(engine="streaming" if streaming else "auto")
+        print("Data transformed successfully.")
+        return df
+
     # String cleaning for name: trim, normalize whitespace, Unicode NFC
-    df = df.with_columns(
-        pl.col("name")
-        .str.strip_chars()
-        .str.replace_all(r"\s+", " ")
-        .str.normalize("NFC")
-        .alias("name")
-    )
+    df = df.with_columns(clean_name("name").alias("name"))
 
     # Remove duplicates
     df = df.unique(subset=["name", "latitude", "longitude"], keep="first")
@@ -62,6 +65,40 @@ def transform(df: pl.DataFrame) -> pl.DataFrame:
 
     return df
 
+def transform_lazy(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Same cleaning/transformation steps as transform, as a single lazy query plan."""
+    total_docks = pl.col("free_bikes") + pl.col("empty_slots")
+    return (
+        lf.with_columns(clean_name("name"))
+        .unique(subset=["name", "latitude", "longitude"], keep="first")
+        .with_columns(
+            pl.col("free_bikes").fill_null(0),
+            pl.col("empty_slots").fill_null(0),
+        )
+        .drop_nulls()
+        .filter(~((pl.col("free_bikes") == 0) & (pl.col("empty_slots") == 0)))
+        # Rounded coordinates replace the originals and move to the end, like the eager drop + rename
+        .select(
+            pl.exclude("latitude", "longitude"),
+            round_up_to_decimals("latitude", 6).alias("latitude"),
+            round_up_to_decimals("longitude", 6).alias("longitude"),
+        )
+        .with_columns(
+            total_docks.alias("total_docks"),
+            ((pl.col("free_bikes") / total_docks) * 100).cast(pl.Int64).alias("availability_pct"),
+        )
+        .sort("name", descending=False)
+    )
+
+def clean_name(col_name: str) -> pl.Expr:
+    """Trim, collapse internal whitespace to a single space and normalize to Unicode NFC."""
+    return (
+        pl.col(col_name)
+        .str.strip_chars()
+        .str.replace_all(r"\s+", " ")
+        .str.normalize("NFC")
+    )
+
 def round_up_to_decimals(col_name: str, decimals: int):
     """Round up a column to a specified number of decimals, then round to that many decimals to avoid float noise (e.g. 42.364664999999995)."""
     shift_expr = pl.col(col_name) * (10**decimals)
@@ -0,0 +1,166 @@
+from pathlib import Path
+import argparse
+import sys
+import numpy as np
+import polars as pl
+import pytest
+
+# Ensure project root is on path
+_root = Path(__file__).resolve().parent.parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from src.anomaly import AnomalyDetector, load_anomaly_thresholds
+from src.instrument import RunRecorder
+
+N = 200
+
+def _snapshot(seed: int, n: int = N, free_bikes: np.ndarray | None = None) -> pl.DataFrame:
+    """n stations with a fixed location and a noisy free_bikes around a per-station level."""
+    rng = np.random.default_rng(seed)
+    level = np.arange(n) % 20 + 5
+    return pl.DataFrame({
+        "name": [f"Station {i}" for i in range(n)],
+        "free_bikes": free_bikes if free_bikes is not None else level + rng.integers(-2, 3, n),
+        "latitude": [42.35 + i / 10_000 for i in range(n)],
+        "longitude": [-71.08] * n,
+    })
+
+def _warmed_up(state_dir=None) -> AnomalyDetector:
+    detector = AnomalyDetector(state_dir)
+    for seed in range(10):
+        rc, results = detector.check(_snapshot(seed))
+        assert rc == 0
+        detector.commit(results)
+    return detector
+
+def test_normal_snapshots_pass():
+    """Ordinary noise passes once the baselines are warm, and single-station spikes are reported as outliers."""
+    detector = _warmed_up()
+    rc, results = detector.check(_snapshot(99))
+    assert rc == 0
+    assert results["outcomes"] == {"outlier_ratio": "pass", "row_count_drift": "pass", "mean_free_bikes_z": "pass"}
+
+    spiked = _snapshot(100).with_columns(pl.when(pl.col("name") == "Station 3").then(60).otherwise(pl.col("free_bikes")).alias("free_bikes"))
+    rc, results = detector.check(spiked)
+    assert rc == 0
+    assert results["outliers"]["name"].to_list() == ["Station 3"]
+
+def test_all_stations_empty_fails_and_is_not_learned():
+    """A feed reporting every station empty fails, and does not shift the baselines."""
+    detector = _warmed_up()
+    network = dict(detector.network)
+    rc, results = detector.check(_snapshot(99, free_bikes=np.zeros(N, dtype=int)))
+    assert rc == 2
+    assert results["outcomes"]["mean_free_bikes_z"] == "fail"
+    detector.commit(results)
+    assert detector.network == {**network, "failures": 1}
+    assert detector.check(_snapshot(100))[0] == 0
+
+def test_row_count_drop_fails_and_state_persists(tmp_path):
+    """A 90% drop in row count fails against baselines restored from the state directory."""
+    _warmed_up(tmp_path / "state")
+    detector = AnomalyDetector(tmp_path / "state")
+    assert detector.network["count"] == 10
+    rc, results = detector.check(_snapshot(99).head(N // 10))
+    assert rc == 2
+    assert results["metrics"]["row_count_drift"] == pytest.approx(-0.9)
+    assert results["outcomes"]["row_count_drift"] == "fail"
+
+def test_warm_up_never_flags():
+    """Until min_samples snapshots are seen there is no baseline to compare with."""
+    detector = AnomalyDetector()
+    detector.commit(detector.check(_snapshot(0))[1])
+    rc, results = detector.check(_snapshot(1).head(10))
+    assert rc == 0
+    assert results["metrics"] == {"outlier_ratio": None, "row_count_drift": None, "mean_free_bikes_z": None}
+
+def test_baselines_only_move_on_commit(tmp_path):
+    """check only scores: until commit, the baselines in memory and on disk stay those of the last committed snapshot."""
+    state_dir = tmp_path / "state"
+    detector = _warmed_up(state_dir)
+    network = dict(detector.network)
+    rc, results = detector.check(_snapshot(99))
+    assert rc == 0 and results["baselines"]["network"]["count"] == 11
+    assert detector.network == network
+    assert AnomalyDetector(state_dir).network == network
+
+    detector.commit(results)
+    assert detector.network["count"] == 11
+    assert AnomalyDetector(state_dir).network["count"] == 11
+
+def test_failed_load_does_not_update_baselines(monkeypatch, tmp_path):
+    """A snapshot that passes the anomaly checks but fails a later stage (here the load) is not folded into the baselines."""
+    import src.ingest
+    import src.load
+    import src.main as main
+
+    args = argparse.Namespace(
+        mode="clean", replay=False, networks=None, stream=False, cache_dir=None, archive_dir=None,
+        schema_engine="compiled", soda=False, lazy_transform=False, dedup_distance=None,
+        anomaly_detection=True, anomaly_state=None, change_detection=False, load_mode="replace",
+    )
+    snapshot = _snapshot(99).with_columns(pl.lit(5, pl.Int64).alias("empty_slots"))
+    monkeypatch.setattr(src.ingest, "fetch_citybike_data", lambda session=None: snapshot)
+    monkeypatch.setattr(main, "DATABASE_URL", f"sqlite:///{tmp_path / 'pipeline.db'}")
+    detector = _warmed_up(tmp_path / "state")
+    network = dict(detector.network)
+
+    def failing_load(df, database_url):
+        raise RuntimeError("Error loading data into database: connection refused")
+
+    load = src.load.load_data_into_database
+    monkeypatch.setattr(src.load, "load_data_into_database", failing_load)
+    with pytest.raises(RuntimeError):
+        main.run_pipeline(args, RunRecorder(), anomaly_detector=detector)
+    assert detector.network == network
+    assert AnomalyDetector(tmp_path / "state").network == network
+
+    monkeypatch.setattr(src.load, "load_data_into_database", load)
+    main.run_pipeline(args, RunRecorder(), anomaly_detector=detector)
+    assert detector.network["count"] == network["count"] + 1
+
+def test_lasting_change_rebaselines_after_consecutive_failures(tmp_path):
+    """A network that really shrank fails rebaseline_after - 1 times, then becomes the new baseline."""
+    detector = _warmed_up(tmp_path / "state")
+    shrunk = _snapshot(99).head(N * 2 // 5)
+    rebaseline_after = detector.thresholds["rebaseline_after"]
+    for failures in range(1, rebaseline_after):
+        rc, results = detector.check(shrunk)
+        assert rc == 2 and results["baselines"] is None and not results["rebaselined"]
+        assert AnomalyDetector(tmp_path / "state").network["failures"] == failures
+
+    rc, results = detector.check(shrunk)
+    assert rc == 1 and results["rebaselined"]
+    detector.commit(results)
+    assert detector.network["count"] == 1 and detector.network["failures"] == 0
+    assert detector.network["row_count_mean"] == shrunk.height
+    assert detector.stations.height == shrunk.height
+    for seed in range(10):
+        rc, results = detector.check(_snapshot(seed).head(N * 2 // 5))
+        assert rc == 0
+        detector.commit(results)
+
+def test_passing_snapshot_clears_failures_and_reset_forgets_baselines(tmp_path):
+    detector = _warmed_up(tmp_path / "state")
+    assert detector.check(_snapshot(99).head(N // 10))[0] == 2
+    assert detector.network["failures"] == 1
+    detector.commit(detector.check(_snapshot(100))[1])
+    assert detector.network["failures"] == 0
+
+    detector.reset()
+    assert detector.network["count"] == 0 and detector.stations is None
+    assert AnomalyDetector(tmp_path / "state").network["count"] == 0
+
+def test_stations_missing_for_max_missed_snapshots_are_dropped():
+    """Baselines of stations that stopped reporting are aged out, so the state does not grow without bound."""
+    thresholds = load_anomaly_thresholds()
+    thresholds["station"]["max_missed"] = 2
+    detector = AnomalyDetector(thresholds=thresholds)
+    detector.commit(detector.check(_snapshot(0))[1])
+    for seed, missed in ((1, 1), (2, 2)):
+        detector.commit(detector.check(_snapshot(seed).filter(pl.col("name") != "Station 0"))[1])
+        assert detector.stations.filter(pl.col("name") == "Station 0")["missed"].to_list() == [missed]
+    detector.commit(detector.check(_snapshot(3).filter(pl.col("name") != "Station 0"))[1])
+    assert detector.stations.height == N - 1
+    assert "Station 0" not in detector.stations["name"].to_list()
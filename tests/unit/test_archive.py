@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+import polars as pl
+
+# Ensure project root is on path
+_root = Path(__file__).resolve().parent.parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from src.archive import archive_snapshot, iter_snapshots, scan_archive
+from src.runner import replay_network
+
+T0 = datetime(2024, 1, 1, 23, 30, tzinfo=timezone.utc)
+
+def _stations(latitude: float = 42.36) -> pl.DataFrame:
+    return pl.DataFrame({
+        "name": ["A", "B"],
+        "free_bikes": [3, 5],
+        "empty_slots": [2, 0],
+        "latitude": [latitude, 42.37],
+        "longitude": [-71.06, -71.07],
+    })
+
+def test_snapshots_are_partitioned_and_scanned_with_predicates(tmp_path):
+    """Files land under network/date/hour partitions; scan_archive filters by network and time range."""
+    for i in range(3):
+        archive_snapshot(_stations(), tmp_path, "raw", "blue-bikes", T0 + timedelta(hours=i))
+    archive_snapshot(_stations(), tmp_path, "raw", "velib", T0)
+
+    path = archive_snapshot(_stations(), tmp_path, "transformed", "blue-bikes", T0)
+    assert path.relative_to(tmp_path).parts[:4] == ("transformed", "network_id=blue-bikes", "date=2024-01-01", "hour=23")
+
+    lf = scan_archive(tmp_path, "raw", "blue-bikes", start=T0 + timedelta(minutes=1), end=T0 + timedelta(hours=2))
+    snapshots = lf.select("snapshot_ts", "date", "hour").unique().sort("snapshot_ts").collect()
+    assert snapshots.to_dicts() == [{
+        "snapshot_ts": T0 + timedelta(hours=1),
+        "date": datetime(2024, 1, 2).date(),
+        "hour": 0,
+    }]
+    assert scan_archive(tmp_path, "raw").select(pl.len()).collect().item() == 8
+
+def test_replay_reruns_checks_per_archived_snapshot(tmp_path):
+    """Replay validates each raw snapshot in time order; a bad snapshot fails on its own."""
+    archive_snapshot(_stations(), tmp_path, "raw", "blue-bikes", T0)
+    archive_snapshot(_stations(latitude=39.0), tmp_path, "raw", "blue-bikes", T0 + timedelta(minutes=5))
+    archive_snapshot(_stations(), tmp_path, "raw", "blue-bikes", T0 + timedelta(minutes=10))
+
+    assert [ts for ts, _ in iter_snapshots(tmp_path, start=T0 + timedelta(minutes=5))] == [
+        T0 + timedelta(minutes=5), T0 + timedelta(minutes=10),
+    ]
+    summary = replay_network(tmp_path, "blue-bikes", schema_engine="compiled")
+    assert (summary["snapshots"], summary["ok"], summary["failed"]) == (3, 2, 1)
+    assert [r["status"] for r in summary["results"]] == ["ok", "failed", "ok"]
+    assert summary["results"][0]["rows_out"] == 2
@@ -0,0 +1,65 @@
+from pathlib import Path
+import sys
+import polars as pl
+
+# Ensure project root is on path
+_root = Path(__file__).resolve().parent.parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from src.change_detection import ChangeDetector
+from src.native_checks import run_native_checks
+from src.soda_runner import VALIDATION_DIR
+from src.transform import transform
+
+TRANSFORMED_CHECKS = VALIDATION_DIR / "soda_checks_transformed.yml"
+
+def _snapshot(free_bikes: list[int], names: list[str]) -> pl.DataFrame:
+    return transform(pl.DataFrame({
+        "name": names,
+        "free_bikes": free_bikes,
+        "empty_slots": [5] * len(names),
+        "latitude": [42.35 + i / 100 for i in range(len(names))],
+        "longitude": [-71.08] * len(names),
+    }))
+
+def test_detects_new_changed_and_removed_stations(tmp_path):
+    """After a committed baseline only new/changed rows are returned, removed keys are listed separately."""
+    state_path = tmp_path / "state.parquet"
+    detector = ChangeDetector(state_path)
+    first = detector.detect(_snapshot([1, 2, 3], ["A", "B", "C"]))
+    assert not first.has_baseline and first.changed.height == 3
+    detector.commit(first)
+
+    # State survives a restart
+    detector = ChangeDetector(state_path)
+    current = _snapshot([1, 7, 3, 4], ["A", "B", "C", "D"]).filter(pl.col("name") != "C")
+    changes = detector.detect(current)
+    assert changes.has_baseline
+    assert changes.counts == {"new": 1, "changed": 1, "unchanged": 1, "removed": 1}
+    assert sorted(changes.changed["name"].to_list()) == ["B", "D"]
+    assert changes.removed["name"].to_list() == ["C"]
+    assert changes.full.height == 3
+
+def test_uncommitted_snapshot_is_not_the_baseline():
+    """A snapshot that failed its checks (never committed) is diffed again on the next run."""
+    detector = ChangeDetector()
+    detector.commit(detector.detect(_snapshot([1, 2], ["A", "B"])))
+    detector.detect(_snapshot([9, 2], ["A", "B"]))
+    assert detector.detect(_snapshot([9, 2], ["A", "B"])).counts["changed"] == 1
+
+def test_frame_level_checks_see_the_full_snapshot():
+    """row_count and duplicate_count are evaluated on the full frame even when nothing changed."""
+    detector = ChangeDetector()
+    snapshot = _snapshot([1, 2, 0], ["A", "B", "C"])
+    detector.commit(detector.detect(snapshot))
+    unchanged = detector.detect(snapshot)
+    assert unchanged.changed.height == 0
+    rc, _ = run_native_checks(unchanged.changed, "citybikes_transformed", TRANSFORMED_CHECKS, full_frame=unchanged.full)
+    assert rc == 0
+
+    # Duplicate keys disable the diff, so the whole frame is checked and the duplicate is caught
+    duplicated = detector.detect(snapshot.vstack(snapshot.head(1)))
+    assert not duplicated.has_baseline
+    rc, _ = run_native_checks(duplicated.changed, "citybikes_transformed", TRANSFORMED_CHECKS, full_frame=duplicated.full)
+    assert rc != 0
@@ -0,0 +1,30 @@
+from pathlib import Path
+import subprocess
+import sys
+
+_root = Path(__file__).resolve().parent.parent.parent
+
+def _loaded_modules(statement: str, modules: list[str]) -> list[str]:
+    """Which of modules are imported after running statement in a fresh interpreter (repo root on sys.path)."""
+    code = f"import sys; sys.path.insert(0, {str(_root)!r}); {statement}; print([m for m in {modules!r} if m in sys.modules])"
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True, cwd=_root).stdout
+    return eval(output.strip().splitlines()[-1])
+
+def test_heavy_dependencies_load_only_when_used():
+    """The package and the checks module do not pull in Pandera, requests, Soda, DuckDB or SQLAlchemy up front."""
+    heavy = ["pandera", "requests", "soda", "duckdb", "jinja2", "sqlalchemy"]
+    assert _loaded_modules("import src", heavy) == []
+    assert _loaded_modules("import src.soda_runner", heavy) == []
+    assert _loaded_modules("from src import run_schema_checks", heavy) == ["pandera"]
+
+def test_cli_modules_are_loaded_once():
+    """main.py imports the pipeline as src.*, like the modules themselves, so no module is loaded twice."""
+    statement = "import runpy; runpy.run_path('src/main.py', run_name='pipeline')"
+    bare = ["response_cache", "instrument", "scheduler", "ingest", "load", "transform", "polars"]
+    assert _loaded_modules(statement, bare) == []
+    statement = "import src.main, src.load, src.runner, src.stream, src.change_detection, src.anomaly"
+    assert _loaded_modules(statement, ["load", "ingest", "soda_runner", "schema_validator"]) == []
+
+def test_change_and_anomaly_detection_do_not_load_the_database_or_http_stack():
+    """The station key lives in src.stations, so these stages do not pull in SQLAlchemy or requests."""
+    assert _loaded_modules("import src.change_detection, src.anomaly", ["sqlalchemy", "requests", "src.load", "src.ingest"]) == []
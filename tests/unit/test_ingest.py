@@ -1,14 +1,19 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
 from pathlib import Path
 import sys
+import threading
 from unittest.mock import patch, MagicMock
 import polars as pl
+import pytest
 
 # Ensure project root is on path
 _root = Path(__file__).resolve().parent.parent.parent
 if str(_root) not in sys.path:
     sys.path.insert(0, str(_root))
 
-from src.ingest import fetch_citybike_data
+from src.ingest import STATION_SCHEMA, _stations_to_frame, decode_stations, fetch_citybike_data, fetch_citybike_data_cached, fetch_networks
+from src.response_cache import ResponseCache
 
 def test_fetch_citybike_data_returns_dataframe_with_expected_columns():
     """Ingest returns a Polars DataFrame with expected columns; uses mocked API response (no network)."""
@@ -22,9 +27,155 @@ def test_fetch_citybike_data_returns_dataframe_with_expected_columns():
             ]
         }
     }
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
 
     with patch("src.ingest.requests.get", return_value=mock_response):
         df = fetch_citybike_data()
 
     assert isinstance(df, pl.DataFrame)
     assert df.columns == ["name", "free_bikes", "empty_slots", "latitude", "longitude"]
+
+def test_decode_stations_matches_generic_decode():
+    """Fast decode yields the same frame as building it from the parsed station dicts, including nulls."""
+    stations = [
+        {"name": "Station A", "free_bikes": 5, "empty_slots": None, "latitude": 42.35, "longitude": -71.08, "extra": {"uid": "1"}},
+        {"name": "Station B", "free_bikes": 2, "empty_slots": 8, "latitude": 42.36, "longitude": -71.09, "id": "b"},
+    ]
+    payload = json.dumps({"network": {"id": "test", "stations": stations}}).encode()
+    assert decode_stations(payload).equals(_stations_to_frame(stations))
+
+def test_decode_stations_keeps_drifted_types_for_schema_checks():
+    """A fractional count is not truncated to an integer; it stays a float for the schema checks to reject."""
+    payload = json.dumps({"network": {"stations": [
+        {"name": "Station A", "free_bikes": 2.5, "empty_slots": 1, "latitude": 42.35, "longitude": -71.08},
+    ]}}).encode()
+    df = decode_stations(payload)
+    assert df.schema["free_bikes"] == pl.Float64
+    assert df["free_bikes"].to_list() == [2.5]
+
+_STATION = {"name": "Station A", "free_bikes": 2, "empty_slots": 1, "latitude": 42.35, "longitude": -71.08}
+
+@pytest.mark.parametrize("drifted", [
+    pytest.param({"name": 5}, id="numeric-name"),
+    pytest.param({"free_bikes": True}, id="boolean-count"),
+    pytest.param({"empty_slots": "3"}, id="string-count"),
+])
+def test_decode_stations_does_not_coerce_drifted_types(drifted):
+    """A field of another JSON type keeps that type (like the generic decode) for the schema checks to reject."""
+    stations = [{**_STATION, **drifted}, {**_STATION, "name": "Station B", **drifted}]
+    payload = json.dumps({"network": {"stations": stations}}).encode()
+    df = decode_stations(payload)
+    column = next(iter(drifted))
+    assert df.schema[column] != STATION_SCHEMA[column]
+    assert df.equals(_stations_to_frame(stations))
+
+@pytest.mark.parametrize("missing", ["name", "latitude", "empty_slots"])
+def test_decode_stations_rejects_missing_fields(missing):
+    """A selected field missing from every station fails like the generic decode instead of becoming an all-null column,
+    even though the network object has keys of the same name (network.name, network.location.latitude)."""
+    stations = [{k: v for k, v in _STATION.items() if k != missing}, {k: v for k, v in _STATION.items() if k != missing}]
+    payload = json.dumps({"network": {
+        "id": "blue-bikes",
+        "name": "Blue Bikes",
+        "location": {"city": "Boston, MA", "country": "US", "latitude": 42.36, "longitude": -71.06},
+        "stations": stations,
+    }}).encode()
+    with pytest.raises(pl.exceptions.ColumnNotFoundError):
+        decode_stations(payload)
+
+def test_decode_stations_keeps_fields_that_are_null_everywhere():
+    stations = [{**_STATION, "empty_slots": None}, {**_STATION, "name": "Station B", "empty_slots": None}]
+    payload = json.dumps({"network": {"stations": stations}}).encode()
+    assert decode_stations(payload).equals(_stations_to_frame(stations))
+
+def test_decode_stations_reads_pretty_printed_payloads():
+    payload = json.dumps({"network": {"stations": [_STATION]}}, indent=2).encode()
+    assert decode_stations(payload).equals(_stations_to_frame([_STATION]))
+
+def _stations_payload(n: int) -> dict:
+    return {
+        "network": {
+            "id": "test",
+            "name": "Test Bikes",
+            "location": {"city": "Boston, MA", "country": "US", "latitude": 42.36, "longitude": -71.06},
+            "stations": [
+                {"name": f"Station {i}", "free_bikes": i, "empty_slots": 10 - i, "latitude": 42.35, "longitude": -71.08, "id": str(i)}
+                for i in range(n)
+            ]
+        }
+    }
+
+@pytest.fixture
+def stub_server():
+    """Local CityBikes stand-in: 'flaky' fails once with 503, unknown networks return 404."""
+    hits = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            network_id = self.path.rsplit("/", 1)[-1]
+            hits[network_id] = hits.get(network_id, 0) + 1
+            if network_id == "flaky" and hits[network_id] == 1:
+                self.send_response(503)
+                self.end_headers()
+                return
+            sizes = {"alpha": 2, "beta": 3, "flaky": 1}
+            if network_id not in sizes:
+                self.send_response(404)
+                self.end_headers()
+                return
+            etag = f'"{network_id}-v1"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = json.dumps(_stations_payload(sizes[network_id])).encode()
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/networks", hits
+    server.shutdown()
+    server.server_close()
+
+def test_fetch_networks_combines_networks_and_reports_failures(stub_server):
+    """Batch ingest tags rows with network_id, retries transient errors and reports per-network failures."""
+    base_url, hits = stub_server
+    df, report = fetch_networks(["alpha", "beta", "flaky", "missing"], max_concurrency=2, retries=2, backoff=0.01, base_url=base_url)
+
+    assert df.columns == ["name", "free_bikes", "empty_slots", "latitude", "longitude", "network_id"]
+    assert df.group_by("network_id").len().sort("network_id").rows() == [("alpha", 2), ("beta", 3), ("flaky", 1)]
+    assert report["flaky"]["status"] == "ok" and report["flaky"]["attempts"] == 2
+    assert report["alpha"]["location"] == (42.36, -71.06)
+    assert report["missing"]["status"] == "failed"
+    # 404s are not retried
+    assert hits["missing"] == 1
+
+def test_cached_fetch_revalidates_and_reports_unchanged(stub_server, tmp_path):
+    """A 304 reuses the cached payload; it only counts as unchanged once the payload was processed."""
+    base_url, hits = stub_server
+    cache = ResponseCache(tmp_path, ttl=0)
+
+    df, unchanged = fetch_citybike_data_cached(cache, "alpha", base_url=base_url)
+    assert df.height == 2 and not unchanged
+
+    df, unchanged = fetch_citybike_data_cached(cache, "alpha", base_url=base_url)
+    assert df.height == 2 and not unchanged
+    cache.mark_processed("alpha")
+
+    df, unchanged = fetch_citybike_data_cached(cache, "alpha", base_url=base_url)
+    assert df.height == 2 and unchanged
+    assert hits["alpha"] == 3
+
+    # Within the TTL no request is sent at all
+    cache.ttl = 60
+    fetch_citybike_data_cached(cache, "alpha", base_url=base_url)
+    assert hits["alpha"] == 3
@@ -0,0 +1,65 @@
+from pathlib import Path
+import json
+import sys
+import polars as pl
+import pytest
+
+# Ensure project root is on path
+_root = Path(__file__).resolve().parent.parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+import src.instrument as instrument
+from src.instrument import RunRecorder
+
+def test_stages_record_rows_time_and_failures(tmp_path):
+    """Each stage records rows in/out and timings; a circuit-breaker halt marks the stage and the run failed."""
+    recorder = RunRecorder(labels={"mode": "clean"})
+    df = pl.DataFrame({"x": [1, 2, 3]})
+    out = recorder.call("transform", lambda data: data.filter(pl.col("x") > 1), df)
+    assert out.height == 2
+    with pytest.raises(SystemExit):
+        with recorder.stage("raw_checks", rows_in=out.height):
+            raise SystemExit("Soda raw-data checks failed (exit code 2).")
+
+    report = recorder.report()
+    transform_stage, checks_stage = report["stages"]
+    assert (transform_stage["rows_in"], transform_stage["rows_out"], transform_stage["status"]) == (3, 2, "ok")
+    assert transform_stage["wall_seconds"] >= 0 and transform_stage["cpu_seconds"] >= 0
+    assert transform_stage["peak_rss_mib"] > 0
+    assert checks_stage["status"] == "failed" and "exit code 2" in checks_stage["error"]
+    assert report["status"] == "failed"
+
+    recorder.write_json(tmp_path / "run.json")
+    assert json.loads((tmp_path / "run.json").read_text())["stages"][0]["name"] == "transform"
+
+    recorder.write_prometheus(tmp_path / "run.prom")
+    prom = (tmp_path / "run.prom").read_text()
+    assert 'bike_pipeline_run_success{mode="clean"} 0' in prom
+    assert 'bike_pipeline_stage_rows_out{mode="clean",stage="transform"} 2' in prom
+    assert "# TYPE bike_pipeline_stage_wall_seconds gauge" in prom
+
+@pytest.mark.parametrize("profile, dump", [("cprofile", "fetch.prof"), ("tracemalloc", "fetch.tracemalloc.txt")])
+def test_profiler_dumps_one_file_per_stage(tmp_path, profile, dump):
+    """With a profiler enabled, each stage writes its own dump into the profile directory."""
+    recorder = RunRecorder(profile=profile, profile_dir=tmp_path)
+    recorder.call("fetch", lambda: pl.DataFrame({"x": list(range(1000))}))
+    assert (tmp_path / dump).is_file()
+    if profile == "tracemalloc":
+        assert recorder.stages[0]["traced_peak_mib"] > 0
+
+def test_run_peak_rss_covers_every_stage(monkeypatch, tmp_path):
+    """Stages reset the high-water mark, so the run peak is the largest stage (or pre-stage) peak, not the last reading."""
+    readings = iter([100.0, 900.0, 120.0, 300.0, 110.0])
+    monkeypatch.setattr(instrument, "_peak_rss_mib", lambda: next(readings, 110.0))
+    monkeypatch.setattr(instrument, "_reset_peak_rss", lambda: True)
+    recorder = RunRecorder()
+    with recorder.stage("fetch"):
+        pass
+    with recorder.stage("transform"):
+        pass
+
+    assert [s["peak_rss_mib"] for s in recorder.stages] == [900.0, 300.0]
+    assert recorder.report()["peak_rss_mib"] == 900.0
+    recorder.write_prometheus(tmp_path / "run.prom")
+    assert f"bike_pipeline_run_peak_rss_bytes {900.0 * 2**20}" in (tmp_path / "run.prom").read_text()
@@ -0,0 +1,119 @@
+from datetime import datetime, timezone
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+import polars as pl
+from sqlalchemy import create_engine
+
+# Ensure project root is on path
+_root = Path(__file__).resolve().parent.parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from src.load import _copy_rows, get_engine, load_data_bulk, load_data_changes, load_data_history, load_data_incremental, load_data_into_database, station_trend
+from src.transform import transform
+
+def _snapshot(free_bikes: list[int], names: list[str]) -> pl.DataFrame:
+    return pl.DataFrame({
+        "name": names,
+        "free_bikes": free_bikes,
+        "empty_slots": [5] * len(names),
+        "latitude": [42.35 + i / 100 for i in range(len(names))],
+        "longitude": [-71.08] * len(names),
+    })
+
+def _table(database_url: str) -> pl.DataFrame:
+    return pl.read_database("SELECT * FROM citybikes_data ORDER BY name", create_engine(database_url))
+
+def test_incremental_load_applies_only_changes(tmp_path):
+    """Second load inserts new stations, updates changed ones and deletes missing ones."""
+    database_url = f"sqlite:///{tmp_path / 'bikes.db'}"
+    counts = load_data_incremental(_snapshot([1, 2, 3], ["A", "B", "C"]), database_url)
+    assert counts == {"inserted": 3, "updated": 0, "deleted": 0, "unchanged": 0}
+
+    current = _snapshot([1, 7, 3], ["A", "B", "C"]).filter(pl.col("name") != "C").vstack(
+        pl.DataFrame({"name": ["D"], "free_bikes": [4], "empty_slots": [5], "latitude": [42.5], "longitude": [-71.08]})
+    )
+    counts = load_data_incremental(current, database_url)
+    assert counts == {"inserted": 1, "updated": 1, "deleted": 1, "unchanged": 1}
+    assert _table(database_url).select("name", "free_bikes").rows() == [("A", 1), ("B", 7), ("D", 4)]
+
+def test_incremental_load_after_replace_load(tmp_path):
+    """Upsert mode works on a table previously written by the replace loader."""
+    database_url = f"sqlite:///{tmp_path / 'bikes.db'}"
+    load_data_into_database(_snapshot([1, 2], ["A", "B"]), database_url)
+    counts = load_data_incremental(_snapshot([1, 5], ["A", "B"]), database_url)
+    assert counts == {"inserted": 0, "updated": 1, "deleted": 0, "unchanged": 1}
+    assert _table(database_url)["free_bikes"].to_list() == [1, 5]
+
+def test_change_load_applies_upserts_and_deletes(tmp_path):
+    """load_data_changes writes only the given changed rows and deletes the removed keys."""
+    database_url = f"sqlite:///{tmp_path / 'bikes.db'}"
+    load_data_incremental(_snapshot([1, 2, 3], ["A", "B", "C"]), database_url)
+    upserts = _snapshot([1, 7, 3], ["A", "B", "C"]).filter(pl.col("name") == "B")
+    deletes = _snapshot([3], ["C"]).with_columns(pl.lit(42.37).alias("latitude")).select("name", "latitude", "longitude")
+    assert load_data_changes(upserts, deletes, database_url) == {"upserted": 1, "deleted": 1}
+    assert _table(database_url).select("name", "free_bikes").rows() == [("A", 1), ("B", 7)]
+
+class _FakeCursor:
+    """DB-API cursor stand-in recording what psycopg2's copy_expert would send to PostgreSQL."""
+
+    def __init__(self):
+        self.copies = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, sql, file):
+        self.copies.append((sql, file.read()))
+
+def test_copy_rows_streams_csv_chunks():
+    """The COPY path sends chunk_size-row CSV chunks: nulls as empty fields, commas and quotes quoted, empty strings as ""."""
+    cursor = _FakeCursor()
+    conn = SimpleNamespace(connection=SimpleNamespace(dbapi_connection=SimpleNamespace(cursor=lambda: cursor)))
+    df = pl.DataFrame({
+        "name": ["Main St, North", 'The "Hub"', None, "", "E"],
+        "free_bikes": [1, None, 3, 4, 5],
+    })
+    _copy_rows(conn, "citybikes_data", df, chunk_size=2)
+    assert [sql for sql, _ in cursor.copies] == ["COPY citybikes_data (name, free_bikes) FROM STDIN WITH (FORMAT csv)"] * 3
+    assert [chunk for _, chunk in cursor.copies] == [
+        '"Main St, North",1\n"The ""Hub""",\n',
+        ',3\n"",4\n',
+        "E,5\n",
+    ]
+
+def test_engine_is_reused_and_bulk_load_falls_back(tmp_path):
+    """Loads share one pooled engine per URL; the COPY loader falls back to write_database off PostgreSQL."""
+    database_url = f"sqlite:///{tmp_path / 'bikes.db'}"
+    assert get_engine(database_url) is get_engine(database_url)
+    load_data_bulk(_snapshot([1, 2], ["A", "B"]), database_url)
+    assert _table(database_url)["free_bikes"].to_list() == [1, 2]
+
+def test_history_load_maintains_rollups_incrementally(tmp_path):
+    """Snapshots append to history; each load folds only its own buckets into the hourly/daily rollups."""
+    database_url = f"sqlite:///{tmp_path / 'bikes.db'}"
+    snapshots = [
+        (datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc), [2, 8]),
+        (datetime(2024, 1, 1, 10, 30, tzinfo=timezone.utc), [4, 8]),
+        (datetime(2024, 1, 1, 11, 0, tzinfo=timezone.utc), [0, 8]),
+    ]
+    for ts, free_bikes in snapshots:
+        counts = load_data_history(transform(_snapshot(free_bikes, ["A", "B"])), database_url, snapshot_ts=ts)
+        assert counts["history_rows"] == 2 and counts["hourly_buckets"] == 2 and counts["daily_buckets"] == 2
+    # Reloading a snapshot does not double-count it
+    counts = load_data_history(transform(_snapshot([2, 8], ["A", "B"])), database_url, snapshot_ts=snapshots[0][0])
+    assert counts["skipped_snapshots"] == 1 and counts["history_rows"] == 0
+
+    hourly = station_trend(database_url, "A", datetime(2024, 1, 1), datetime(2024, 1, 2))
+    assert hourly.select("samples", "mean_free_bikes", "min_free_bikes", "max_free_bikes").rows() == [
+        (2, 3.0, 2, 4),
+        (1, 0.0, 0, 0),
+    ]
+    daily = station_trend(database_url, "A", datetime(2024, 1, 1), datetime(2024, 1, 2), granularity="daily", latitude=42.35, longitude=-71.08)
+    assert daily.select("samples", "sum_free_bikes", "mean_availability_pct").rows() == [(3, 6, 24.0)]
+    history = pl.read_database("SELECT COUNT(*) AS n FROM citybikes_history", create_engine(database_url)).item()
+    assert history == 6
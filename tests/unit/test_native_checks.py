@@ -0,0 +1,63 @@
+from pathlib import Path
+import sys
+import polars as pl
+import pytest
+
+# Ensure project root is on path
+_root = Path(__file__).resolve().parent.parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from src.native_checks import run_native_checks
+from src.soda_runner import VALIDATION_DIR, run_soda_scan
+from src.transform import transform
+
+RAW_CHECKS = VALIDATION_DIR / "soda_checks_raw.yml"
+TRANSFORMED_CHECKS = VALIDATION_DIR / "soda_checks_transformed.yml"
+
+RAW = pl.DataFrame({
+    "name": ["Station A", "Station B", "Station C"],
+    "free_bikes": [1, 2, 0],
+    "empty_slots": [3, 4, 9],
+    "latitude": [42.35, 42.36, 42.37],
+    "longitude": [-71.08, -71.09, -71.1],
+})
+
+def _faulty_transformed() -> pl.DataFrame:
+    """The fault injected by main.py --fault-type transform: a duplicate row and a float total_docks."""
+    df = transform(RAW)
+    return df.vstack(df.head(1)).with_columns(pl.lit(39.5).alias("total_docks"))
+
+CASES = [
+    pytest.param(RAW, "citybikes_raw", RAW_CHECKS, id="raw-clean"),
+    pytest.param(RAW.with_columns(pl.lit(-1).alias("free_bikes")), "citybikes_raw", RAW_CHECKS, id="raw-negative"),
+    pytest.param(RAW.with_columns(pl.lit(None, pl.String).alias("name")), "citybikes_raw", RAW_CHECKS, id="raw-missing-names"),
+    pytest.param(RAW.drop("latitude"), "citybikes_raw", RAW_CHECKS, id="raw-missing-column"),
+    pytest.param(RAW.clear(), "citybikes_raw", RAW_CHECKS, id="raw-empty"),
+    pytest.param(transform(RAW), "citybikes_transformed", TRANSFORMED_CHECKS, id="transformed-clean"),
+    pytest.param(_faulty_transformed(), "citybikes_transformed", TRANSFORMED_CHECKS, id="transformed-faulty"),
+    pytest.param(
+        transform(RAW).with_columns(pl.lit(150).alias("availability_pct"), pl.lit(None, pl.Float64).alias("latitude")),
+        "citybikes_transformed",
+        TRANSFORMED_CHECKS,
+        id="transformed-out-of-range",
+    ),
+]
+
+@pytest.mark.parametrize("df, dataset_name, sodacl_path", CASES)
+def test_native_engine_matches_soda(df, dataset_name, sodacl_path):
+    """Native engine gives the same exit code and per-check outcomes as Soda Core."""
+    soda_exit_code, soda_results = run_soda_scan(df, dataset_name, sodacl_path)
+    native_exit_code, native_results = run_native_checks(df, dataset_name, sodacl_path)
+
+    assert native_exit_code == soda_exit_code
+    soda_outcomes = {c["name"]: c["outcome"] for c in soda_results["checks"]}
+    native_outcomes = {c["name"]: c["outcome"] for c in native_results["checks"]}
+    assert native_outcomes == soda_outcomes
+
+def test_native_engine_rejects_unsupported_checks(tmp_path):
+    """Checks outside the supported subset raise instead of being silently skipped."""
+    sodacl_path = tmp_path / "checks.yml"
+    sodacl_path.write_text("checks for stations:\n  - invalid_percent(name) < 5 %\n")
+    with pytest.raises(ValueError, match="Unsupported SodaCL check"):
+        run_native_checks(RAW, "stations", sodacl_path)
@@ -0,0 +1,31 @@
+from pathlib import Path
+import sys
+
+# Ensure project root is on path
+_root = Path(__file__).resolve().parent.parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from src.response_cache import ResponseCache
+
+def test_least_recently_used_network_is_evicted(tmp_path):
+    """Storing past max_bytes evicts the least recently used network, not the one just stored."""
+    cache = ResponseCache(tmp_path, max_bytes=25)
+    cache.store("a", b"x" * 10, etag='"a"')
+    cache.store("b", b"x" * 10, etag='"b"')
+    cache.load("a")
+    cache.store("c", b"x" * 10, etag='"c"')
+
+    assert cache.conditional_headers("a") == {"If-None-Match": '"a"'}
+    assert cache.conditional_headers("b") == {}
+    assert cache.conditional_headers("c") == {"If-None-Match": '"c"'}
+
+def test_index_survives_reopen(tmp_path):
+    """Cache metadata is persisted, so a new process sees earlier entries."""
+    cache = ResponseCache(tmp_path)
+    cache.store("a", b"{}", last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    cache.mark_processed("a")
+
+    reopened = ResponseCache(tmp_path)
+    assert reopened.is_processed("a")
+    assert reopened.load("a") == b"{}"
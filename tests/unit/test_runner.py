@@ -0,0 +1,126 @@
+from pathlib import Path
+import sys
+import polars as pl
+import pytest
+from sqlalchemy import create_engine
+
+# Ensure project root is on path
+_root = Path(__file__).resolve().parent.parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+import src.runner as runner
+from src.runner import make_process_pool, network_bounds, process_network, run_networks
+
+def _stations(lat: float, lon: float, n: int = 4) -> pl.DataFrame:
+    return pl.DataFrame({
+        "name": [f"Station {i}" for i in range(n)],
+        "free_bikes": [i + 1 for i in range(n)],
+        "empty_slots": [2] * n,
+        "latitude": [lat + i * 0.001 for i in range(n)],
+        "longitude": [lon - i * 0.001 for i in range(n)],
+    })
+
+def test_network_bounds_use_config_or_network_location():
+    """Configured boxes win; otherwise the box is the network location +- margin on a 0.1 degree grid, or None."""
+    assert network_bounds({"latitude": [48.0, 49.5], "longitude": [1.5, 3.5]}, (48.85, 2.35)) == (48.0, 49.5, 1.5, 3.5)
+    lat_min, lat_max, lon_min, lon_max = network_bounds(location=(48.856, 2.352))
+    assert (lat_min, lat_max) == (48.3, 49.4)
+    assert (lon_min, lon_max) == (1.8, 2.9)
+    assert network_bounds() is None
+
+@pytest.mark.parametrize("fault", ["latitude-39", "swapped", "no-location"])
+def test_unconfigured_network_fails_faulty_coordinates(fault):
+    """Without configured bounds the box comes from the network location, never from the stations under test."""
+    df = _stations(40.73, -73.99)
+    location = (40.73, -73.99)
+    if fault == "latitude-39":
+        df = df.with_columns(pl.lit(39.0).alias("latitude"))
+    elif fault == "swapped":
+        df = df.with_columns(pl.col("longitude").alias("latitude"), pl.col("latitude").alias("longitude"))
+    else:
+        location = None
+    result = process_network("citi-bike-nyc", df, schema_engine="compiled", location=location)
+    assert result["status"] == "failed"
+
+def test_process_network_isolates_circuit_breaker():
+    """A station outside the network's bounds fails that network only, without SystemExit."""
+    bad = _stations(48.85, 2.35).with_columns(pl.when(pl.col("name") == "Station 0").then(39.0).otherwise(pl.col("latitude")).alias("latitude"))
+    result = process_network("velib", bad, {"latitude": [48.6, 49.1], "longitude": [2.0, 2.7]})
+    assert result["status"] == "failed"
+    assert result["data"] is None
+
+    result = process_network("velib", _stations(48.85, 2.35), schema_engine="compiled", location=(48.85, 2.35))
+    assert result["status"] == "ok"
+    assert result["data"].get_column("network_id").unique().to_list() == ["velib"]
+
+def test_run_networks_loads_passing_networks_once(monkeypatch, tmp_path):
+    """Networks run in the process pool; failed and unreachable networks are reported, the rest loaded together."""
+    boston = _stations(42.35, -71.06).with_columns(pl.lit("blue-bikes").alias("network_id"))
+    paris = _stations(48.85, 2.35).with_columns(pl.lit("velib").alias("network_id"))
+    # Outside the configured Boston box
+    broken = _stations(40.7, -74.0).with_columns(pl.lit("blue-bikes-broken").alias("network_id"))
+    # The broken network's stations lie around its reported location, but outside its configured box
+    report = {n: {"status": "ok", "seconds": 0.0, "error": None, "location": (42.35, -71.06)} for n in ("blue-bikes", "blue-bikes-broken")}
+    report["blue-bikes-broken"]["location"] = (40.7, -74.0)
+    report["velib"] = {"status": "ok", "seconds": 0.0, "error": None, "location": (48.85, 2.35)}
+    report["missing"] = {"status": "failed", "seconds": 0.0, "error": "HTTPError: 404", "location": None}
+    monkeypatch.setattr(runner, "fetch_networks", lambda network_ids, **kwargs: (pl.concat([boston, paris, broken]), report))
+    bounds_path = tmp_path / "bounds.yml"
+    bounds_path.write_text("blue-bikes-broken:\n  latitude: [42.2, 42.6]\n  longitude: [-71.3, -70.8]\n")
+    database_url = f"sqlite:///{tmp_path / 'runner.db'}"
+
+    summary = run_networks(
+        ["blue-bikes", "velib", "blue-bikes-broken", "missing"],
+        max_workers=2, database_url=database_url, bounds_path=bounds_path,
+    )
+
+    assert summary["ok"] == 2 and summary["failed"] == 2 and summary["rows_loaded"] == 8
+    assert summary["results"]["blue-bikes-broken"]["status"] == "failed"
+    assert summary["results"]["missing"]["status"] == "error"
+    loaded = pl.read_database("SELECT network_id, COUNT(*) AS n FROM citybikes_data GROUP BY network_id ORDER BY network_id", create_engine(database_url))
+    assert loaded.to_dicts() == [{"network_id": "blue-bikes", "n": 4}, {"network_id": "velib", "n": 4}]
+
+@pytest.mark.parametrize("load_mode", ["replace", "upsert"])
+def test_run_networks_keeps_rows_of_networks_missing_from_a_run(monkeypatch, tmp_path, load_mode):
+    """A network that loaded on run 1 and fails on run 2 keeps its rows; the loaded networks are replaced."""
+    boston = _stations(42.35, -71.06).with_columns(pl.lit("blue-bikes").alias("network_id"))
+    paris = _stations(48.85, 2.35).with_columns(pl.lit("velib").alias("network_id"))
+    report = {
+        "blue-bikes": {"status": "ok", "seconds": 0.0, "error": None, "location": (42.35, -71.06)},
+        "velib": {"status": "ok", "seconds": 0.0, "error": None, "location": (48.85, 2.35)},
+    }
+    database_url = f"sqlite:///{tmp_path / 'runner.db'}"
+
+    def loaded() -> list[dict]:
+        return pl.read_database(
+            "SELECT network_id, COUNT(*) AS n FROM citybikes_data GROUP BY network_id ORDER BY network_id", create_engine(database_url)
+        ).to_dicts()
+
+    monkeypatch.setattr(runner, "fetch_networks", lambda network_ids, **kwargs: (pl.concat([boston, paris]), report))
+    run_networks(["blue-bikes", "velib"], max_workers=1, database_url=database_url, load_mode=load_mode)
+    assert loaded() == [{"network_id": "blue-bikes", "n": 4}, {"network_id": "velib", "n": 4}]
+
+    # Run 2: Boston lost a station and the velib feed is down
+    failed = {**report, "velib": {"status": "failed", "seconds": 0.0, "error": "HTTPError: 503"}}
+    monkeypatch.setattr(runner, "fetch_networks", lambda network_ids, **kwargs: (boston.head(3), failed))
+    summary = run_networks(["blue-bikes", "velib"], max_workers=1, database_url=database_url, load_mode=load_mode)
+
+    assert summary["ok"] == 1 and summary["rows_loaded"] == 3
+    assert loaded() == [{"network_id": "blue-bikes", "n": 3}, {"network_id": "velib", "n": 4}]
+
+def test_run_networks_reuses_a_given_pool(monkeypatch, tmp_path):
+    """With a pool (--daemon), runs use it instead of starting their own and leave it open for the next run."""
+    paris = _stations(48.85, 2.35).with_columns(pl.lit("velib").alias("network_id"))
+    report = {"velib": {"status": "ok", "seconds": 0.0, "error": None, "location": (48.85, 2.35)}}
+    monkeypatch.setattr(runner, "fetch_networks", lambda network_ids, **kwargs: (paris, report))
+
+    def no_new_pool(max_workers=None):
+        raise AssertionError("run_networks started its own pool")
+
+    monkeypatch.setattr(runner, "make_process_pool", no_new_pool)
+    with make_process_pool(1) as pool:
+        for _ in range(2):
+            summary = run_networks(["velib"], database_url=f"sqlite:///{tmp_path / 'runner.db'}", pool=pool)
+            assert summary["ok"] == 1
+        assert pool.submit(abs, -1).result() == 1
@@ -0,0 +1,60 @@
+from pathlib import Path
+import sys
+
+# Ensure project root is on path
+_root = Path(__file__).resolve().parent.parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from src.scheduler import Scheduler
+
+class FakeClock:
+    """Monotonic clock advanced by the cycles and by the scheduler's sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> bool:
+        self.sleeps.append(seconds)
+        self.now += seconds
+        return False
+
+def test_cycles_start_on_a_drift_free_grid():
+    """Each cycle starts at start + k * interval regardless of how long the previous one took."""
+    clock = FakeClock()
+    starts = []
+
+    def cycle():
+        starts.append(clock.now)
+        clock.now += 3.5
+
+    stats = Scheduler(cycle, interval=10, max_cycles=4, clock=clock, sleep=clock.sleep).run()
+    assert starts == [0, 10, 20, 30]
+    assert stats == {"cycles": 4, "failed": 0, "skipped": 0}
+
+def test_overrunning_cycle_skips_missed_ticks_and_failures_do_not_stop_the_loop():
+    """A cycle longer than the interval drops the ticks it overlapped; a circuit-breaker halt only fails its cycle."""
+    clock = FakeClock()
+    starts = []
+    durations = iter([25, 1, 1])
+
+    def cycle():
+        starts.append(clock.now)
+        clock.now += next(durations)
+        if len(starts) == 2:
+            raise SystemExit("Pipeline Halted: Data Integrity Violation.")
+
+    stats = Scheduler(cycle, interval=10, max_cycles=3, clock=clock, sleep=clock.sleep).run()
+    assert starts == [0, 30, 40]
+    assert stats == {"cycles": 3, "failed": 1, "skipped": 2}
+
+def test_stop_ends_the_loop_after_the_current_cycle():
+    """stop() (the SIGTERM handler) lets the running cycle finish and then returns."""
+    clock = FakeClock()
+    scheduler = Scheduler(lambda: scheduler.stop(), interval=10, clock=clock, sleep=clock.sleep)
+    assert scheduler.run()["cycles"] == 1
+    assert clock.sleeps == []
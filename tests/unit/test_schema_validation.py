@@ -8,7 +8,9 @@ _root = Path(__file__).resolve().parent.parent.parent
 if str(_root) not in sys.path:
     sys.path.insert(0, str(_root))
 
-from src.schema_validator import run_schema_checks
+from pandera.errors import SchemaErrors
+from src.schema_validator import CompiledSchema, run_schema_checks
+from validation.citybikes_schema import CityBikeSchema, build_citybike_schema
 
 def test_schema_validation_pass():
     """Valid data passes: run_schema_checks returns without raising."""
@@ -33,3 +35,48 @@ def test_schema_validation_fail():
     })
     with pytest.raises(SystemExit):
         run_schema_checks(df)
+
+PARITY_CASES = [
+    pytest.param({"name": ["A", "B"], "free_bikes": [1, 0], "empty_slots": [3, 2], "latitude": [42.4, 42.3], "longitude": [-71.1, -71.0]}, id="valid"),
+    pytest.param({"name": ["A", None, "C"], "free_bikes": [-1, 2, None], "empty_slots": [1, -2, 3], "latitude": [39.0, 42.3, None], "longitude": [-71.0, -71.1, -75.0]}, id="values"),
+    pytest.param({"name": ["A", "B"], "free_bikes": [1, 2], "empty_slots": [3, 2], "latitude": [float("nan"), 42.3], "longitude": [-71.0, float("nan")]}, id="nan-coordinates"),
+    pytest.param({"name": ["A"], "free_bikes": [1.5], "empty_slots": [1], "latitude": [42], "longitude": [-71.0]}, id="dtypes"),
+    pytest.param({"free_bikes": [1], "name": ["A"], "latitude": [42.3], "longitude": [-71.0], "extra": [True]}, id="missing-column"),
+]
+
+@pytest.mark.parametrize("data", PARITY_CASES)
+def test_compiled_schema_matches_pandera(data):
+    """Compiled validation reports exactly Pandera's failure cases (or none)."""
+    df = pl.DataFrame(data)
+    try:
+        CityBikeSchema.validate(df, lazy=True)
+        expected = None
+    except SchemaErrors as err:
+        expected = err.failure_cases
+    actual = CompiledSchema(CityBikeSchema).validate(df)
+    if expected is None:
+        assert actual is None
+    else:
+        assert actual.equals(expected)
+
+def test_compiled_schema_checks_halt_pipeline():
+    """engine='compiled' keeps the SystemExit circuit breaker."""
+    df = pl.DataFrame({"name": ["A"], "free_bikes": [-1], "empty_slots": [3], "latitude": [42.4], "longitude": [-71.1]})
+    run_schema_checks(df.with_columns(pl.col("free_bikes").abs()), engine="compiled")
+    with pytest.raises(SystemExit):
+        run_schema_checks(df, engine="compiled")
+
+def test_network_schema_only_replaces_coordinate_bounds():
+    """build_citybike_schema keeps the model's contract and swaps in the network's coordinate ranges."""
+    model = CityBikeSchema.to_schema()
+    schema = build_citybike_schema(48.3, 49.4, 1.8, 2.9)
+    assert schema.name == model.name and list(schema.columns) == list(model.columns)
+    for name, column in schema.columns.items():
+        assert column.dtype == model.columns[name].dtype and column.nullable == model.columns[name].nullable
+        if name not in ("latitude", "longitude"):
+            assert column.checks == model.columns[name].checks
+    assert [c.statistics for c in schema.columns["latitude"].checks] == [{"min_value": 48.3, "max_value": 49.4, "include_min": True, "include_max": True}]
+    df = pl.DataFrame({"name": ["Velib"], "free_bikes": [1], "empty_slots": [3], "latitude": [48.85], "longitude": [2.35]})
+    assert CompiledSchema(schema).validate(df) is None
+    with pytest.raises(SchemaErrors):
+        schema.validate(df.with_columns(pl.lit(-1).alias("free_bikes")), lazy=True)
@@ -0,0 +1,87 @@
+import os
+from pathlib import Path
+import sys
+import types
+import polars as pl
+
+# Ensure project root is on path
+_root = Path(__file__).resolve().parent.parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from src.soda_runner import VALIDATION_DIR, SodaScanner, run_soda_scan
+from src.transform import transform
+
+RAW = pl.DataFrame({
+    "name": ["Station A", "Station B"],
+    "free_bikes": [1, 2],
+    "empty_slots": [3, 4],
+    "latitude": [42.35, 42.36],
+    "longitude": [-71.08, -71.09],
+})
+
+def _outcomes(scan_results: dict) -> dict[str, str]:
+    return {check["name"]: check["outcome"] for check in scan_results["checks"]}
+
+def test_clean_data_passes_raw_and_transformed_checks():
+    """Clean frames pass every raw and transformed check, including the INTEGER schema checks."""
+    exit_code, _ = run_soda_scan(RAW, "citybikes_raw", VALIDATION_DIR / "soda_checks_raw.yml")
+    assert exit_code == 0
+    exit_code, scan_results = run_soda_scan(transform(RAW), "citybikes_transformed", VALIDATION_DIR / "soda_checks_transformed.yml")
+    assert exit_code == 0
+    assert _outcomes(scan_results)["Schema - total_docks (integer)"] == "pass"
+
+def test_faulty_transformed_data_fails_checks():
+    """A duplicate row fails the duplicate check and a float total_docks warns on the schema check."""
+    faulty = transform(RAW)
+    faulty = faulty.vstack(faulty.head(1)).with_columns(pl.lit(39.5).alias("total_docks"))
+    exit_code, scan_results = run_soda_scan(faulty, "citybikes_transformed", VALIDATION_DIR / "soda_checks_transformed.yml")
+    outcomes = _outcomes(scan_results)
+    assert exit_code != 0
+    assert outcomes["No duplicate stations after transform"] == "fail"
+    assert outcomes["Schema - total_docks (integer)"] == "warn"
+
+def test_scanner_reuses_parsed_checks_until_file_changes(tmp_path):
+    """Parsed SodaCL is cached per file and re-parsed when the file's mtime changes."""
+    sodacl_path = tmp_path / "checks.yml"
+    sodacl_path.write_text("checks for stations:\n  - row_count > 0\n")
+    scanner = SodaScanner()
+    try:
+        assert scanner.scan(RAW, "stations", sodacl_path)[0] == 0
+        cached = scanner._sodacl_cache[sodacl_path]
+        assert scanner.scan(RAW, "stations", sodacl_path)[0] == 0
+        assert scanner._sodacl_cache[sodacl_path] is cached
+
+        sodacl_path.write_text("checks for stations:\n  - row_count > 5\n")
+        os.utime(sodacl_path, ns=(cached[0] + 1_000_000_000, cached[0] + 1_000_000_000))
+        assert scanner.scan(RAW, "stations", sodacl_path)[0] != 0
+    finally:
+        scanner.close()
+
+def test_scanner_parses_each_scan_without_the_private_sodacl_attribute(monkeypatch, tmp_path):
+    """A Soda version without Scan._sodacl_cfg falls back to add_sodacl_yaml_file on every scan instead of failing."""
+    added = []
+
+    class Scan:
+        def set_data_source_name(self, name): pass
+        def add_duckdb_connection(self, con): pass
+        def add_sodacl_yaml_file(self, path): added.append(path)
+        def has_error_logs(self): return False
+        def execute(self): return 0
+        def get_scan_results(self): return {"checks": []}
+
+    soda = types.ModuleType("soda")
+    soda.scan = types.ModuleType("soda.scan")
+    soda.scan.Scan = Scan
+    monkeypatch.setitem(sys.modules, "soda", soda)
+    monkeypatch.setitem(sys.modules, "soda.scan", soda.scan)
+    sodacl_path = tmp_path / "checks.yml"
+    sodacl_path.write_text("checks for stations:\n  - row_count > 0\n")
+    scanner = SodaScanner()
+    try:
+        assert scanner.scan(RAW, "stations", sodacl_path)[0] == 0
+        assert scanner.scan(RAW, "stations", sodacl_path)[0] == 0
+    finally:
+        scanner.close()
+    assert added == [str(sodacl_path)] * 2
+    assert scanner._sodacl_cache == {}
@@ -0,0 +1,72 @@
+from pathlib import Path
+import sys
+import polars as pl
+import pytest
+
+# Ensure project root is on path
+_root = Path(__file__).resolve().parent.parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from benchmarks.synthetic import station_frame
+from src.spatial import StationIndex, dedup_nearby, haversine_m
+
+STATIONS = station_frame(2000, seed=1)
+
+def _brute_force(lat: float, lon: float) -> pl.DataFrame:
+    return STATIONS.with_columns(haversine_m(pl.col("latitude"), pl.col("longitude"), lat, lon).alias("distance_m"))
+
+def test_haversine_distance():
+    """One degree of latitude is ~111.2 km; identical points are 0 m apart."""
+    distance = pl.select(haversine_m(42.0, -71.0, 43.0, -71.0)).item()
+    assert distance == pytest.approx(111_195, rel=1e-3)
+    assert pl.select(haversine_m(42.0, -71.0, 42.0, -71.0)).item() == 0
+
+@pytest.mark.parametrize("cell_size_m", [50.0, 400.0, 5000.0])
+def test_queries_match_brute_force(cell_size_m):
+    """within and nearest return the same stations as scanning every row, whatever the cell size."""
+    index = StationIndex(STATIONS, cell_size_m=cell_size_m)
+    for lat, lon in [(42.4, -71.0), (42.2, -71.3), (41.0, -72.0)]:
+        expected = _brute_force(lat, lon).sort("distance_m")
+        within = index.within(lat, lon, 1000)
+        assert within["name"].to_list() == expected.filter(pl.col("distance_m") <= 1000)["name"].to_list()
+        nearest = index.nearest(lat, lon, k=5)
+        assert nearest["name"].to_list() == expected.head(5)["name"].to_list()
+        assert nearest.columns == [*STATIONS.columns, "distance_m"]
+
+def test_pairs_match_brute_force():
+    """pairs finds every pair within the distance exactly once, as (left, right) with left < right."""
+    pairs = StationIndex(STATIONS, cell_size_m=100).pairs(300)
+    cross = (
+        STATIONS.with_row_index("left").join(STATIONS.with_row_index("right"), how="cross")
+        .filter(pl.col("left") < pl.col("right"))
+        .filter(haversine_m(pl.col("latitude"), pl.col("longitude"), pl.col("latitude_right"), pl.col("longitude_right")) <= 300)
+    )
+    assert pairs.height > 0
+    assert set(pairs.select("left", "right").iter_rows()) == set(cross.select("left", "right").iter_rows())
+
+def test_dedup_nearby_drops_jittered_copies():
+    """Same-named stations a few metres apart collapse to one; other names and far stations stay."""
+    df = pl.DataFrame({
+        "name": ["A", "B", "A", "A", "C"],
+        "free_bikes": [1, 2, 3, 4, 5],
+        "latitude": [42.35, 42.35, 42.35003, 42.36, 42.350001],
+        "longitude": [-71.08, -71.08, -71.08002, -71.08, -71.08],
+    })
+    assert dedup_nearby(df, 10)["free_bikes"].to_list() == [1, 2, 4, 5]
+    assert dedup_nearby(df, 10, by=[])["free_bikes"].to_list() == [1, 4]
+    assert dedup_nearby(df.clear(), 10).height == 0
+    # The surviving copy does not depend on row order
+    assert sorted(dedup_nearby(df.reverse(), 10)["free_bikes"].to_list()) == [1, 2, 4, 5]
+
+def test_dedup_nearby_keeps_the_far_end_of_a_chain():
+    """A 8 m from B 8 m from C (same name): B goes with A, but C is 16 m from A, the only kept station, and stays."""
+    metres = 1 / 111_195
+    df = pl.DataFrame({
+        "name": ["Hub", "Hub", "Hub"],
+        "free_bikes": [1, 2, 3],
+        "latitude": [42.35, 42.35 + 8 * metres, 42.35 + 16 * metres],
+        "longitude": [-71.08] * 3,
+    })
+    assert dedup_nearby(df, 10)["free_bikes"].to_list() == [1, 3]
+    assert dedup_nearby(df.reverse(), 10)["free_bikes"].to_list() == [3, 1]
@@ -0,0 +1,105 @@
+from pathlib import Path
+import sys
+import polars as pl
+import pytest
+from sqlalchemy import create_engine
+
+# Ensure project root is on path
+_root = Path(__file__).resolve().parent.parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from src.load import load_data_into_database
+from src.stream import KeyTracker, iter_batches, run_stream
+from src.transform import transform
+
+@pytest.fixture(autouse=True)
+def _report_dir(tmp_path, monkeypatch):
+    """Keep the checks' HTML reports out of the working tree."""
+    monkeypatch.setattr("src.soda_runner.REPORT_DIR", tmp_path)
+
+def _stations(n: int) -> pl.DataFrame:
+    return pl.DataFrame({
+        "name": [f"Station {i}" for i in range(n)],
+        "free_bikes": [i % 7 for i in range(n)],
+        "empty_slots": [(i + 3) % 5 for i in range(n)],
+        "latitude": [42.3 + i / 1000 for i in range(n)],
+        "longitude": [-71.1 - i / 1000 for i in range(n)],
+    })
+
+def _table(database_url: str) -> pl.DataFrame:
+    return pl.read_database("SELECT * FROM citybikes_data", create_engine(database_url))
+
+def test_stream_matches_whole_frame_pipeline(tmp_path):
+    """Batched run loads the same rows as transforming the whole input at once, even with duplicates split across batches."""
+    df = _stations(50)
+    # Duplicates of early rows (one with extra whitespace in the name) land in later batches
+    df = pl.concat([df, df.head(5), df.slice(10, 1).with_columns(pl.format("  {}  ", "name").alias("name"))])
+    input_path = tmp_path / "stations.parquet"
+    df.write_parquet(input_path)
+    database_url = f"sqlite:///{tmp_path / 'bikes.db'}"
+
+    summary = run_stream(input_path, batch_size=16, checks_engine="native", database_url=database_url)
+
+    expected = transform(df).with_columns(pl.col("latitude").round(6), pl.col("longitude").round(6)).sort("name")
+    assert summary["batches"] == 4
+    assert _table(database_url).sort("name").equals(expected)
+
+def test_stream_keeps_each_snapshot(tmp_path):
+    """Stations repeat across snapshots; only repeats within one snapshot are deduplicated."""
+    snapshot = _stations(5)
+    df = pl.concat([
+        snapshot.with_columns(pl.lit("2024-01-01T00:00").alias("snapshot_ts")),
+        snapshot.with_columns(pl.lit("2024-01-01T01:00").alias("snapshot_ts")),
+    ])
+    input_path = tmp_path / "stations.ndjson"
+    df.write_ndjson(input_path)
+
+    summary = run_stream(input_path, batch_size=3, checks_engine="native")
+    assert sum(batch.height for batch in iter_batches(input_path, 3)) == 10
+    assert summary["rows_out"] == 10 and summary["cross_batch_duplicates"] == 0
+
+def test_stream_failure_keeps_previous_table(tmp_path):
+    """A transformed duplicate across batches halts the run and leaves the loaded table untouched."""
+    database_url = f"sqlite:///{tmp_path / 'bikes.db'}"
+    load_data_into_database(_stations(2), database_url)
+    # Distinct raw coordinates that round up to the same 6-decimal value
+    df = pl.concat([_stations(3), _stations(1).with_columns(pl.col("latitude") - 1e-8)])
+    input_path = tmp_path / "stations.parquet"
+    df.write_parquet(input_path)
+
+    with pytest.raises(SystemExit):
+        run_stream(input_path, batch_size=3, checks_engine="native", database_url=database_url)
+    assert _table(database_url).height == 2
+
+def test_key_tracker_matches_a_set_across_many_batches():
+    """Keys are reported as seen exactly when an earlier batch had them, while the sorted runs stay few."""
+    tracker, seen = KeyTracker(["name"]), set()
+    for batch in range(40):
+        names = [f"S{(batch * 37 + i * 11) % 500}" for i in range(25)]
+        mask = tracker.seen_before(pl.DataFrame({"name": names}))
+        assert mask.to_list() == [name in seen for name in names]
+        seen.update(names)
+    assert len(tracker) == len(seen)
+    assert len(tracker._runs) <= len(seen).bit_length()
+
+def test_cli_stream_passes_lazy_transform_and_rejects_other_load_modes(monkeypatch, capsys):
+    """--stream honours --lazy-transform and refuses load modes its staged table swap cannot do."""
+    import src.main as main
+    import src.stream
+    from src.instrument import RunRecorder
+
+    calls = []
+    monkeypatch.setattr(src.stream, "run_stream", lambda path, **kwargs: calls.append(kwargs) or {})
+    monkeypatch.setattr(main, "run_once", lambda args, **kwargs: main.run_pipeline(args, RunRecorder()))
+    monkeypatch.setattr(main, "DATABASE_URL", "sqlite://")
+    for lazy in (False, True):
+        monkeypatch.setattr(sys, "argv", ["main.py", "--mode", "clean", "--stream", "--input", "archive/", *(["--lazy-transform"] if lazy else [])])
+        main.main()
+    assert [call["lazy_transform"] for call in calls] == [False, True]
+
+    monkeypatch.setattr(sys, "argv", ["main.py", "--mode", "clean", "--stream", "--input", "archive/", "--load-mode", "upsert"])
+    with pytest.raises(SystemExit) as excinfo:
+        main.main()
+    assert excinfo.value.code == 2
+    assert "--load-mode replace" in capsys.readouterr().err
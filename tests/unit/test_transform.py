@@ -1,6 +1,7 @@
 from pathlib import Path
 import sys
 import polars as pl
+import pytest
 
 # Ensure project root is on path
 _root = Path(__file__).resolve().parent.parent.parent
@@ -76,3 +77,16 @@ def test_name_string_cleaning():
     })
     transformed_df = transform(df)
     assert transformed_df["name"].to_list() == ["Test Station"], "Expected 'Test Station' after string cleaning"
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_lazy_transform_matches_eager(streaming):
+    """Lazy (and streaming) transform produces exactly the eager output, including dedup, fills, drops and rounding."""
+    df = pl.DataFrame({
+        "name": ["  Station  C ", "Station A", "Station B", "Station A", "Station D", "Station E", "Station F"],
+        "free_bikes": [3, 1, None, 1, 0, 4, 2],
+        "empty_slots": [4, 3, 6, 3, 0, None, 5],
+        "latitude": [42.1234561, 42.35, 42.36, 42.35, 42.37, 42.38, None],
+        "longitude": [-71.1234561, -71.08, -71.09, -71.08, -71.1, -71.11, -71.12],
+        "network_id": ["blue-bikes"] * 7,
+    })
+    assert transform(df, lazy=True, streaming=streaming).equals(transform(df))
@@ -2,6 +2,7 @@
 Data contract for CityBikes API response (Pandera model).
 Acts as a "bouncer" for ingestion—only data being valid by passing this schema.
 """
+from functools import lru_cache
 import pandera.polars as pa
 
 class CityBikeSchema(pa.DataFrameModel):
@@ -12,3 +13,16 @@ class CityBikeSchema(pa.DataFrameModel):
     empty_slots: int = pa.Field(ge=0)
     latitude: float = pa.Field(in_range={"min_value": 42.2, "max_value": 42.6})
     longitude: float = pa.Field(in_range={"min_value": -71.3, "max_value": -70.8})
+
+@lru_cache(maxsize=1024)
+def build_citybike_schema(lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> pa.DataFrameSchema:
+    """
+    CityBikeSchema with the given coordinate bounds (for networks other than Boston's): only the
+    in_range checks of latitude and longitude are replaced, the rest of the contract comes from the model.
+    Cached per bounds, so repeated runs reuse one schema object (and its compiled form).
+    """
+    schema = CityBikeSchema.to_schema()
+    for column, (min_value, max_value) in (("latitude", (lat_min, lat_max)), ("longitude", (lon_min, lon_max))):
+        checks = [check for check in schema.columns[column].checks if check.name != "in_range"]
+        schema = schema.update_column(column, checks=[*checks, pa.Check.in_range(min_value, max_value)])
+    return schema